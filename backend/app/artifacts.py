@@ -0,0 +1,125 @@
+"""Per-frame intermediate artifact of the grounding pipeline.
+
+Everything the grounding pipeline gets out of decode and inference is kept
+in one compressed, columnar .npz in the session directory:
+  frame_idx, height, url      (N,)    one row per sampled frame
+  pose                        (N,4,4) visual-odometry camera pose
+  det_offsets                 (N+1,)  frame i owns detections det_offsets[i]:det_offsets[i+1]
+  det_label, det_box          (M,), (M,4)  label id into labels, xyxy at inference width
+  det_depth                   (M,)    depth sampled at the box center (NaN = no depth model)
+plus a JSON meta record (fps, frame counts, sampling plan, stage stats).
+
+Lifting, sensor merge, gap filling, kinematics and validation need only this
+artifact, so a session can be re-derived with another validation mode or
+sensor config without decoding or running a model (see
+EnrichmentPipeline.rederive). The artifact travels with the session's frames,
+so result-cache hits restore it too.
+"""
+
+import os
+import json
+
+import numpy as np
+
+ARTIFACT_NAME = "grounding_artifact.npz"
+ARTIFACT_VERSION = 1
+
+
+def artifact_path(directory):
+    return os.path.join(directory, ARTIFACT_NAME)
+
+
+def has_artifact(directory):
+    return os.path.exists(artifact_path(directory))
+
+
+class GroundingArtifact:
+    def __init__(self, meta=None):
+        self.meta = dict(meta or {})
+        self.labels = []
+        self._label_ids = {}
+        # Built row by row, converted to arrays by save()/load()
+        self.frame_idx, self.height, self.url, self.pose = [], [], [], []
+        self.det_offsets = [0]
+        self.det_label, self.det_box, self.det_depth = [], [], []
+
+    def __len__(self):
+        return len(self.frame_idx)
+
+    @property
+    def num_detections(self):
+        return int(self.det_offsets[-1])
+
+    def add_frame(self, frame_idx, height, url, camera_pose, detections, depths):
+        """detections: [(label, xyxy)]; depths: matching box-center depths (None = no depth map)."""
+        self.frame_idx.append(int(frame_idx))
+        self.height.append(int(height))
+        self.url.append(url)
+        self.pose.append(camera_pose)
+        for (label, xyxy), z in zip(detections, depths):
+            label_id = self._label_ids.get(label)
+            if label_id is None:
+                label_id = self._label_ids[label] = len(self.labels)
+                self.labels.append(label)
+            self.det_label.append(label_id)
+            self.det_box.append([float(v) for v in xyxy])
+            self.det_depth.append(np.nan if z is None else float(z))
+        self.det_offsets.append(len(self.det_label))
+
+    def frames(self):
+        """Yields (frame_idx, height, url, camera_pose, [(label, xyxy, depth or None)]) in frame order."""
+        boxes = np.asarray(self.det_box, dtype=np.float64).reshape(-1, 4)
+        depths = np.asarray(self.det_depth, dtype=np.float64)
+        for i in range(len(self)):
+            lo, hi = int(self.det_offsets[i]), int(self.det_offsets[i + 1])
+            dets = [(self.labels[int(self.det_label[j])], boxes[j].tolist(), None if np.isnan(depths[j]) else float(depths[j]))
+                    for j in range(lo, hi)]
+            yield int(self.frame_idx[i]), int(self.height[i]), str(self.url[i]), np.asarray(self.pose[i]).tolist(), dets
+
+    def rebase(self, session_id):
+        """Points frame URLs at session_id (a result-cache hit restores the frames under a new session)."""
+        old = self.meta.get("session_id")
+        if old and old != session_id:
+            self.url = [str(u).replace(f"/{old}/", f"/{session_id}/", 1) for u in self.url]
+        self.meta["session_id"] = session_id
+        return self
+
+    def save(self, directory):
+        path = artifact_path(directory)
+        tmp = path + ".tmp.npz"
+        meta = dict(self.meta, version=ARTIFACT_VERSION)
+        np.savez_compressed(
+            tmp,
+            frame_idx=np.asarray(self.frame_idx, dtype=np.int64),
+            height=np.asarray(self.height, dtype=np.int32),
+            url=np.asarray(self.url, dtype=str),
+            pose=np.asarray(self.pose, dtype=np.float64).reshape(len(self), 4, 4),
+            det_offsets=np.asarray(self.det_offsets, dtype=np.int64),
+            det_label=np.asarray(self.det_label, dtype=np.int32),
+            det_box=np.asarray(self.det_box, dtype=np.float64).reshape(-1, 4),
+            det_depth=np.asarray(self.det_depth, dtype=np.float64),
+            labels=np.asarray(self.labels, dtype=str),
+            meta=np.asarray(json.dumps(meta, default=str)),
+        )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, directory):
+        """The session's artifact; raises FileNotFoundError / ValueError if missing or unreadable."""
+        with np.load(artifact_path(directory), allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != ARTIFACT_VERSION:
+                raise ValueError(f"Unsupported artifact version {meta.get('version')}")
+            artifact = cls(meta)
+            for name in ("frame_idx", "height", "url", "pose", "det_offsets", "det_label", "det_box", "det_depth"):
+                setattr(artifact, name, data[name])
+            artifact.labels = [str(label) for label in data["labels"]]
+        artifact._label_ids = {label: i for i, label in enumerate(artifact.labels)}
+        return artifact
+
+    def stats(self, directory=None):
+        info = {"frames": len(self), "detections": self.num_detections, "labels": len(self.labels)}
+        if directory is not None and has_artifact(directory):
+            info["kb"] = round(os.path.getsize(artifact_path(directory)) / 1024, 1)
+        return info
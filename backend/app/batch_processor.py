@@ -12,18 +12,24 @@ import json
 from typing import List, Dict
 from datetime import datetime
 
-# Import enrichment pipeline and exporters
-from .enrichment import EnrichmentPipeline
-from .exporters import DataExporter
+# Shared, lazily built enrichment engine (see services.py)
+from . import services
+from .frame_store import iter_frames
+from .jobs import Job
+from .progress import progress
+from .depth import BATCH_DEPTH_TIER, resolve_depth_tier
+
+FINAL_BATCH_STATES = ("complete", "failed", "cancelled")
 
 
 class BatchJob:
     """Represents a batch video processing job."""
 
-    def __init__(self, job_id: str, videos: List[str], task_type: str):
+    def __init__(self, job_id: str, videos: List[str], task_type: str, depth_tier: str = BATCH_DEPTH_TIER):
         self.job_id = job_id
         self.videos = videos
         self.task_type = task_type  # grounding, factory, exocentric
+        self.depth_tier = resolve_depth_tier(depth_tier)  # grounding depth: quality, balanced or fast
         self.status = "pending"  # pending, processing, complete, failed
         self.total = len(videos)
         self.completed = 0
@@ -42,6 +48,38 @@ class BatchJob:
             return f"YouTube Video - {url.split('v=')[-1][:11]}"
         return url
 
+    def progress_state(self) -> Dict:
+        """Compact status for the progress stream; videos are keyed by index so deltas stay small."""
+        return {
+            "status": self.status,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "current": self.current_video,
+            "batchDownloadUrl": self.batch_download_url,
+            "totalDuration": self.get_total_duration_seconds(),
+            "videos": {
+                str(i): {k: v.get(k) for k in ("url", "title", "status", "downloadUrl", "error", "duration")}
+                for i, v in enumerate(self.video_statuses)
+            },
+        }
+
+    def publish_progress(self):
+        progress.publish(f"batch:{self.job_id}", self.progress_state(), final=self.status in FINAL_BATCH_STATES)
+
+    def frame_reporter(self, index: int) -> Job:
+        """Job handle for one video's enrichment run; its frame progress goes to the batch stream."""
+        def forward(job):
+            event = job.progress_event()
+            progress.publish(f"batch:{self.job_id}", {"videos": {str(index): {
+                "stage": event["stage"], "progress": event["progress"], "frames": event["frames"],
+                "total_frames": event["total_frames"], "fps": event["fps"], "eta_seconds": event["eta_seconds"],
+                "quality": event["quality"],
+            }}})
+        job = Job("batch-video", {"batch_id": self.job_id, "index": index}, listener=forward)
+        job.state = "running"
+        return job
+
     def get_total_duration_seconds(self) -> int:
         """Calculate total duration of all videos in seconds."""
         total = 0
@@ -54,10 +92,6 @@ class BatchJob:
 # In-memory job storage
 batch_jobs: Dict[str, BatchJob] = {}
 
-# Initialize enrichment and export engines (shared across all jobs)
-enrichment_engine = EnrichmentPipeline()
-export_engine = DataExporter()
-
 
 async def process_batch_job(job_id: str):
     """Process all videos in a batch job sequentially."""
@@ -67,6 +101,7 @@ async def process_batch_job(job_id: str):
         return
 
     job.status = "processing"
+    job.publish_progress()
 
     # Get absolute paths - use app/static (where FastAPI mounts from)
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -76,6 +111,7 @@ async def process_batch_job(job_id: str):
     for i, video_url in enumerate(job.videos):
         job.current_video = video_url
         job.video_statuses[i]["status"] = "processing"
+        job.publish_progress()
 
         try:
             print(f"[Batch {job_id}] Processing video {i+1}/{job.total}: {video_url}")
@@ -83,12 +119,13 @@ async def process_batch_job(job_id: str):
             # Step 1: Download video
             local_path, duration = await download_youtube_video(video_url)
             job.video_statuses[i]["duration"] = duration
+            job.publish_progress()
 
             # Step 2: Process video based on task type
             if job.task_type == "grounding":
-                result_path = await process_grounding_video(local_path, output_dir, f"video_{i+1}")
+                result_path = await process_grounding_video(local_path, output_dir, f"video_{i+1}", job=job.frame_reporter(i), depth_tier=job.depth_tier)
             elif job.task_type == "factory":
-                result_path = await process_factory_video(local_path, output_dir, f"video_{i+1}")
+                result_path = await process_factory_video(local_path, output_dir, f"video_{i+1}", job=job.frame_reporter(i))
             elif job.task_type == "exocentric":
                 result_path = await process_exocentric_video(local_path, output_dir, f"video_{i+1}")
             else:
@@ -100,6 +137,7 @@ async def process_batch_job(job_id: str):
             job.video_statuses[i]["downloadUrl"] = download_url
             job.video_statuses[i]["resultPath"] = result_path
             job.completed += 1
+            job.publish_progress()
 
             print(f"[Batch {job_id}] Video {i+1}/{job.total} complete: {result_path}")
 
@@ -117,6 +155,7 @@ async def process_batch_job(job_id: str):
             job.video_statuses[i]["status"] = "failed"
             job.video_statuses[i]["error"] = error_msg
             job.failed += 1
+            job.publish_progress()
 
     # Create batch download ZIP
     try:
@@ -126,6 +165,7 @@ async def process_batch_job(job_id: str):
     except Exception as e:
         print(f"[Batch {job_id}] Error creating batch ZIP: {e}")
         job.status = "failed"
+    job.publish_progress()
 
 
 async def download_youtube_video(video_url: str) -> tuple:
@@ -222,7 +262,7 @@ async def get_video_duration(video_path: str) -> int:
     return 0
 
 
-async def process_grounding_video(local_path: str, output_dir: str, filename: str) -> str:
+async def process_grounding_video(local_path: str, output_dir: str, filename: str, job: Job = None, depth_tier: str = BATCH_DEPTH_TIER) -> str:
     """
     Process video through REAL grounding/enrichment pipeline.
     Returns path to exported ZIP containing frames + timeline JSON.
@@ -247,13 +287,16 @@ async def process_grounding_video(local_path: str, output_dir: str, filename: st
     def run_pipeline():
         # Convert absolute path to relative path expected by enrichment pipeline
         rel_path = f"/static/downloads/{os.path.basename(local_path)}"
-        result = enrichment_engine._run_grounding_pipeline(
-            video_rel_path=rel_path,
+        result = services.enricher.get().run_pipeline(
+            "grounding",
+            rel_path,
             sensor_path=None,
             mode="monocular",
-            user_prompts="tools, objects",
+            prompts="tools, objects",
             frame_dir=frames_dir,
-            session_id=session_id
+            session_id=session_id,
+            depth=depth_tier,
+            job=job
         )
         return result
 
@@ -269,12 +312,10 @@ async def process_grounding_video(local_path: str, output_dir: str, filename: st
         timeline_json = json.dumps(result, indent=2)
         zf.writestr("timeline.json", timeline_json)
 
-        # Add all extracted frames
+        # Add all extracted frames (straight from the session's frame store)
         if os.path.exists(frames_dir):
-            for frame_file in os.listdir(frames_dir):
-                frame_path = os.path.join(frames_dir, frame_file)
-                if os.path.isfile(frame_path):
-                    zf.write(frame_path, f"frames/{frame_file}")
+            for name, data in iter_frames(frames_dir):
+                zf.writestr(f"frames/{name}", data)
 
         # Add source video
         if os.path.exists(local_path):
@@ -290,7 +331,7 @@ async def process_grounding_video(local_path: str, output_dir: str, filename: st
     return export_path
 
 
-async def process_factory_video(local_path: str, output_dir: str, filename: str) -> str:
+async def process_factory_video(local_path: str, output_dir: str, filename: str, job: Job = None) -> str:
     """
     Process video through REAL factory/foundry pipeline.
     Returns path to exported ZIP containing multi-view frames + timeline JSON.
@@ -315,11 +356,15 @@ async def process_factory_video(local_path: str, output_dir: str, filename: str)
     def run_pipeline():
         # Convert absolute path to relative path expected by enrichment pipeline
         rel_path = f"/static/downloads/{os.path.basename(local_path)}"
-        result = enrichment_engine._run_factory_pipeline(
-            video_rel_path=rel_path,
-            user_prompts="tools, objects",
+        result = services.enricher.get().run_pipeline(
+            "factory",
+            rel_path,
+            sensor_path=None,
+            mode="factory",
+            prompts="tools, objects",
             frame_dir=frames_dir,
-            session_id=session_id
+            session_id=session_id,
+            job=job
         )
         return result
 
@@ -335,15 +380,11 @@ async def process_factory_video(local_path: str, output_dir: str, filename: str)
         timeline_json = json.dumps(result, indent=2)
         zf.writestr("timeline.json", timeline_json)
 
-        # Add all multi-view frames (main, side, wrist)
+        # Add all multi-view frames (main/, side/, wrist/ entries of the frame store)
         if os.path.exists(frames_dir):
-            for view_dir in ["main", "side", "wrist"]:
-                view_path = os.path.join(frames_dir, view_dir)
-                if os.path.exists(view_path):
-                    for frame_file in os.listdir(view_path):
-                        frame_path = os.path.join(view_path, frame_file)
-                        if os.path.isfile(frame_path):
-                            zf.write(frame_path, f"frames/{view_dir}/{frame_file}")
+            for name, data in iter_frames(frames_dir):
+                if name.split("/")[0] in ("main", "side", "wrist"):
+                    zf.writestr(f"frames/{name}", data)
 
         # Add source video
         if os.path.exists(local_path):
@@ -381,8 +422,11 @@ async def process_exocentric_video(local_path: str, output_dir: str, filename: s
     loop = asyncio.get_event_loop()
 
     def run_pipeline():
-        result = exo_extractor.process_video(local_path)
-        return result
+        try:
+            return exo_extractor.process_video(local_path)
+        finally:
+            # Weights stay cached in the registry; this just drops our reference
+            exo_extractor.release_models()
 
     # Run in thread pool to avoid blocking
     result = await loop.run_in_executor(None, run_pipeline)
@@ -443,11 +487,12 @@ def create_batch_zip(job_id: str, video_statuses: List[dict], output_dir: str) -
         return None
 
 
-def create_batch_job(videos: List[str], task_type: str) -> str:
+def create_batch_job(videos: List[str], task_type: str, depth_tier: str = None) -> str:
     """Create a new batch job and start processing in background."""
     job_id = str(uuid.uuid4())
-    job = BatchJob(job_id, videos, task_type)
+    job = BatchJob(job_id, videos, task_type, depth_tier or BATCH_DEPTH_TIER)
     batch_jobs[job_id] = job
+    job.publish_progress()
 
     # Start processing in background
     asyncio.create_task(process_batch_job(job_id))
@@ -473,7 +518,8 @@ def get_batch_status(job_id: str) -> Dict:
         "current": job.current_video,
         "videos": job.video_statuses,
         "batchDownloadUrl": job.batch_download_url,
-        "totalDuration": total_duration
+        "totalDuration": total_duration,
+        "depthTier": job.depth_tier
     }
 
 
@@ -485,6 +531,7 @@ def cancel_batch_job(job_id: str) -> Dict:
 
     if job.status == "processing":
         job.status = "cancelled"
+        job.publish_progress()
         return {"status": "cancelled", "message": "Job cancelled successfully"}
 
     return {"status": job.status, "message": f"Job is already {job.status}"}
@@ -0,0 +1,121 @@
+"""Depth quality/speed tiers for the grounding pipeline.
+
+"quality" (the default) is the original path: the Depth-Anything pipeline's
+full-resolution output is normalized and mapped to metres over every pixel.
+
+The cheaper tiers run the model at a reduced input size and return a
+SparseDepth per frame instead of a dense map: the raw prediction stays at
+model resolution, its min/max are computed once per frame, and metric depth
+is only evaluated at the pixels the caller asks for (box centers, or the
+median over each box).
+
+Env: FIDELITY_DEPTH_TIER (default for interactive runs, quality),
+FIDELITY_BATCH_DEPTH_TIER (default for /enrich/batch runs, same as above).
+"""
+
+import os
+import numpy as np
+from PIL import Image
+
+# tier -> model input size (short side, rounded to the ViT patch) and how a box is sampled
+DEPTH_TIERS = {
+    "quality": None,
+    "balanced": {"size": 364, "sample": "median"},
+    "fast": {"size": 252, "sample": "center"},
+}
+DEFAULT_DEPTH_TIER = os.getenv("FIDELITY_DEPTH_TIER", "quality").lower()
+BATCH_DEPTH_TIER = os.getenv("FIDELITY_BATCH_DEPTH_TIER", DEFAULT_DEPTH_TIER).lower()
+
+# Normalized relative depth 0 (far) .. 1 (near) maps linearly onto these metres
+FAR_M, NEAR_M = 2.0, 0.1
+_PATCH = 14
+
+
+def resolve_depth_tier(tier):
+    tier = (tier or DEFAULT_DEPTH_TIER).lower()
+    if tier not in DEPTH_TIERS:
+        raise ValueError(f"Unknown depth tier '{tier}' (use one of {tuple(DEPTH_TIERS)})")
+    return tier
+
+
+def dense_depth(d_arr):
+    """The quality tier: min/max normalization and metric mapping over the whole frame."""
+    d_norm = (d_arr - d_arr.min()) / (d_arr.max() - d_arr.min() + 1e-6)
+    return np.interp(d_norm, (0, 1), (FAR_M, NEAR_M))
+
+
+class SparseDepth:
+    """Relative depth at model resolution; metric values are computed only where asked."""
+
+    def __init__(self, raw, width, height, sample="center"):
+        self.raw = np.asarray(raw, dtype=np.float32)
+        self.shape = (height, width)  # coordinates are given in the frame's (inference) pixels
+        self.sample_mode = sample
+        self._sx = self.raw.shape[1] / float(width)
+        self._sy = self.raw.shape[0] / float(height)
+        # Per-frame normalization constants, computed once
+        self._lo = float(self.raw.min())
+        self._span = float(self.raw.max()) - self._lo + 1e-6
+
+    def _metric(self, value):
+        norm = min(max((float(value) - self._lo) / self._span, 0.0), 1.0)
+        return FAR_M + (NEAR_M - FAR_M) * norm
+
+    def _cell(self, x, y):
+        h, w = self.raw.shape
+        return min(max(int(y * self._sy), 0), h - 1), min(max(int(x * self._sx), 0), w - 1)
+
+    def at(self, x, y):
+        return self._metric(self.raw[self._cell(x, y)])
+
+    def __getitem__(self, yx):
+        y, x = yx
+        return self.at(x, y)
+
+    def box_median(self, xyxy):
+        x1, y1, x2, y2 = xyxy
+        r1, c1 = self._cell(min(x1, x2), min(y1, y2))
+        r2, c2 = self._cell(max(x1, x2), max(y1, y2))
+        return self._metric(np.median(self.raw[r1:r2 + 1, c1:c2 + 1]))
+
+    def sample(self, xyxy):
+        """Depth for a detection box, as configured for the tier."""
+        if self.sample_mode == "median": return self.box_median(xyxy)
+        x1, y1, x2, y2 = map(int, xyxy)
+        return self.at((x1 + x2) // 2, (y1 + y2) // 2)
+
+
+def sparse_depth_batch(depth_model, rgbs, tier):
+    """SparseDepth for each frame, running the model at the tier's reduced input size."""
+    cfg = DEPTH_TIERS[tier]
+    size = max(_PATCH, int(cfg["size"]) // _PATCH * _PATCH)
+    raws = _predict_raw(depth_model, rgbs, size)
+    return [SparseDepth(raw, rgb.shape[1], rgb.shape[0], cfg["sample"]) for raw, rgb in zip(raws, rgbs)]
+
+
+def _predict_raw(depth_model, rgbs, size):
+    images = [Image.fromarray(rgb) for rgb in rgbs]
+    model = getattr(depth_model, "model", None)
+    processor = getattr(depth_model, "image_processor", None)
+    if model is not None and processor is not None:
+        # Straight to the model: the pipeline would resize to its native 518 px and
+        # interpolate the prediction back up to full frame size
+        import torch
+        inputs = processor(images=images, return_tensors="pt", size={"height": size, "width": size},
+                           keep_aspect_ratio=True, ensure_multiple_of=_PATCH)
+        dtype = next(model.parameters()).dtype
+        with torch.no_grad():
+            out = model(pixel_values=inputs["pixel_values"].to(model.device, dtype=dtype)).predicted_depth
+        return list(out.float().cpu().numpy())
+
+    # Any other depth callable: feed it downscaled frames
+    small = []
+    for im in images:
+        scale = size / float(min(im.size))
+        small.append(im.resize((max(1, round(im.size[0] * scale)), max(1, round(im.size[1] * scale))), Image.BILINEAR) if scale < 1 else im)
+    outputs = depth_model(small, batch_size=len(small))
+    raws = []
+    for d_res in outputs:
+        raw = d_res.get("predicted_depth", d_res["depth"])
+        raws.append(np.squeeze(np.asarray(raw.cpu().numpy() if hasattr(raw, "cpu") else raw, dtype=np.float32)))
+    return raws
@@ -0,0 +1,134 @@
+"""Per-vocabulary YOLO-World detector views.
+
+YOLOWorld.set_classes() runs every prompt through CLIP and mutates the model
+in place, which is both slow and unsafe when several jobs share the registry's
+single copy of the weights. Instead, each distinct vocabulary is encoded once,
+its text embeddings are kept in a small LRU cache, and a DetectorView swaps
+them into the shared model only for the duration of its own predict() call.
+
+Cache size: FIDELITY_VOCAB_CACHE (default 32 vocabularies).
+"""
+
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+VOCAB_CACHE_SIZE = int(os.getenv("FIDELITY_VOCAB_CACHE", "32"))
+
+
+def normalize_vocabulary(prompts):
+    """Strips whitespace and drops empty / repeated prompts, keeping first-seen order."""
+    seen = []
+    for p in prompts or []:
+        p = " ".join(str(p).split())
+        if p and p not in seen: seen.append(p)
+    return tuple(seen)
+
+
+class _Embedding:
+    def __init__(self, txt_feats, names):
+        self.txt_feats = txt_feats
+        self.names = names
+
+
+class VocabularyCache:
+    """LRU of encoded vocabularies, keyed by (model weights, normalized prompts)."""
+
+    def __init__(self, max_entries=VOCAB_CACHE_SIZE):
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+vocab_cache = VocabularyCache()
+
+# One lock per shared model: the swap-in + predict must not interleave across views
+_model_locks = weakref.WeakKeyDictionary()
+_locks_guard = threading.Lock()
+
+
+def _lock_for(model):
+    with _locks_guard:
+        lock = _model_locks.get(model)
+        if lock is None:
+            lock = _model_locks[model] = threading.RLock()
+        return lock
+
+
+def _model_key(model):
+    return getattr(model, "ckpt_path", None) or type(model).__name__
+
+
+def _world_module(model):
+    """The underlying WorldModel, if this is a YOLO-World model we can swap embeddings on."""
+    inner = getattr(model, "model", None)
+    if inner is not None and hasattr(inner, "txt_feats") and hasattr(inner, "model"):
+        return inner
+    return None
+
+
+class DetectorView:
+    """A shared YOLO-World model seen through one fixed vocabulary."""
+
+    def __init__(self, model, vocabulary):
+        self.model = model
+        self.vocabulary = normalize_vocabulary(vocabulary)
+        self.names = {i: name for i, name in enumerate(self.vocabulary)}
+        self._key = (_model_key(model), self.vocabulary)
+        self._lock = _lock_for(model)
+
+    def predict(self, source, **kwargs):
+        with self._lock:
+            self._install()
+            return self.model.predict(source, **kwargs)
+
+    def _install(self):
+        inner = _world_module(self.model)
+        if inner is None:
+            # Not a YOLO-World model (or an unexpected ultralytics layout): plain set_classes
+            self.model.set_classes(list(self.vocabulary))
+            return
+
+        entry = vocab_cache.get(self._key)
+        if entry is None:
+            self.model.set_classes(list(self.vocabulary))
+            entry = _Embedding(inner.txt_feats, list(self.vocabulary))
+            vocab_cache.put(self._key, entry)
+            return
+
+        # Same effect as set_classes(), minus the CLIP text encoding
+        inner.txt_feats = entry.txt_feats
+        inner.model[-1].nc = len(entry.names)
+        inner.names = entry.names
+        predictor = getattr(self.model, "predictor", None)
+        if predictor is not None and getattr(predictor, "model", None) is not None:
+            predictor.model.names = entry.names
+
+
+def detector_for(model, prompts):
+    """Returns a DetectorView for `prompts` on the shared `model`."""
+    return DetectorView(model, prompts)
@@ -2,21 +2,31 @@ import os
 import cv2
 import numpy as np
 import yt_dlp
-import torch
-import copy
 import glob
 import shutil
-import pandas as pd
 import uuid
-import ssl
 import urllib.request
-from ultralytics import YOLOWorld
-from transformers import pipeline
-from PIL import Image
 
 # --- IMPORTS ---
-from .validation.engine import ValidationPipeline
-from .sensors import SyntheticIMU 
+from .validation.engine import ValidationPipeline, DEFAULT_SMOOTHING_ALPHA, FATAL_SCORE
+from .validation.online import OnlineQA
+from .validation.validators import MIN_COMMERCIAL_FRAMES
+from .sensors import SyntheticIMU, SensorStream
+from .frame_source import open_frame_source, decoder_backend
+from .inference_batcher import InferenceBatcher, DEFAULT_BATCH_SIZE, DEFAULT_MAX_BATCH_BYTES
+from .depth import SparseDepth, resolve_depth_tier
+from .stages import StagedPipeline
+from .model_registry import registry
+from .detectors import detector_for
+from .result_cache import result_cache
+from .interpolation import fill_gaps, track_to_array
+from .timeline import Timeline
+from .sampling import plan_samples
+from .frame_writer import FrameWriter, DEFAULT_CODEC as DEFAULT_FRAME_CODEC, DEFAULT_QUALITY as DEFAULT_FRAME_QUALITY
+from .roi import RoiDetector, is_hand, DEFAULT_EXPAND as DEFAULT_ROI_EXPAND, DEFAULT_ROI_SIZE
+from .jobs import JobCancelled
+from .artifacts import GroundingArtifact, has_artifact
+from .tracking import BoxTracker, detections_from_results, DEFAULT_INTERVAL as DEFAULT_TRACK_INTERVAL, DEFAULT_MIN_CONFIDENCE
 
 class GroundedState:
     def __init__(self, frame_idx, timestamp, frame_filename=""):
@@ -45,7 +55,45 @@ class GroundedState:
         self.action_local = [0.0, 0.0, 0.0]
         self.next_state = None 
 
+class FramePacket:
+    """One sampled, resized frame travelling through the staged pipeline."""
+    def __init__(self, frame_idx, image, ext=".jpg"):
+        self.frame_idx = frame_idx
+        self.image = image # Resized BGR
+        self.height = image.shape[0]
+        self.filename = f"frame_{frame_idx:06d}{ext}"
+        self.rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        self.gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        self.camera_pose = None
+        self.detections = None # [(label, xyxy)] when boxes come from the tracking / ROI stage
+
+class VisualOdometry:
+    """Accumulates camera pose from sparse LK flow between consecutive sampled frames."""
+    def __init__(self):
+        self.prev_gray = None
+        self.cam_pose_accum = np.eye(4)
+
+    def update(self, gray):
+        prev_gray = self.prev_gray
+        if prev_gray is not None:
+            p0 = cv2.goodFeaturesToTrack(prev_gray, mask=None, maxCorners=40, qualityLevel=0.3, minDistance=7, blockSize=7)
+            if p0 is not None:
+                p1, st, err = cv2.calcOpticalFlowPyrLK(prev_gray, gray, p0, None, winSize=(15,15), maxLevel=2)
+                if p1 is not None and len(p1) > 8:
+                    E, mask = cv2.findEssentialMat(p1, p0, focal=1.0, pp=(0.0, 0.0), method=cv2.RANSAC, prob=0.99, threshold=1.0)
+                    if E is not None and E.shape == (3,3):
+                        _, R, t_vec, mask = cv2.recoverPose(E, p1, p0)
+                        T_step = np.eye(4); T_step[:3, :3] = R; T_step[:3, 3] = t_vec.flatten() * 0.05
+                        self.cam_pose_accum = self.cam_pose_accum @ T_step
+        self.prev_gray = gray
+        return self.cam_pose_accum.tolist()
+
 class EnrichmentPipeline:
+    # Sampling config (part of the result cache key)
+    FACTORY_TARGET_FRAMES = 120 # High quality SKU
+    GROUNDING_TARGET_FRAMES = 150
+    INFERENCE_WIDTH = 384
+
     def __init__(self):
         base_dir = os.path.dirname(os.path.abspath(__file__))
         self.download_dir = os.path.join(base_dir, "static", "downloads")
@@ -55,47 +103,46 @@ class EnrichmentPipeline:
         os.makedirs(self.download_dir, exist_ok=True)
         os.makedirs(self.frames_base_dir, exist_ok=True)
 
-        self.job_status = {
-            "state": "idle",
-            "progress": 0,
-            "total_frames": 0,
-            "result": None,
-            "summary": None,
-            "error": None,
-        }
-
-        self.device = -1
-        if torch.cuda.is_available(): self.device = 0
-        elif torch.backends.mps.is_available(): self.device = "mps"
-        print(f"🚀 Enrichment Hardware: {'GPU/MPS' if self.device != -1 else 'CPU'}")
+        # Micro-batching for detection + depth (see inference_batcher.py)
+        self.infer_batch_size = DEFAULT_BATCH_SIZE
+        self.infer_max_bytes = DEFAULT_MAX_BATCH_BYTES
+        # Bounded queue depth between pipeline stages (backpressure)
+        self.stage_queue_size = int(os.getenv("FIDELITY_STAGE_QUEUE", "8"))
+        # Grounding: QA the first N recorded frames and stop decoding if they are already fatal (0 = off)
+        self.early_abort_frames = int(os.getenv("FIDELITY_EARLY_ABORT_FRAMES", "0"))
 
-        # Fix SSL certificate verification for model downloads (macOS issue)
-        try:
-            ssl._create_default_https_context = ssl._create_unverified_context
-        except Exception:
-            pass
-
-        print("1. Loading YOLO-World...")
-        self.vision_model = YOLOWorld('yolov8s-world.pt')
         self.default_vocab = ["human hand", "robot gripper", "fingers", "tool", "cup", "box", "electronics"]
-        self.vision_model.set_classes(self.default_vocab)
-        
-        print("2. Loading Depth Model...")
-        try:
-            self.depth_model = pipeline(
-                task="depth-estimation", 
-                model="depth-anything/Depth-Anything-V2-Small-hf", 
-                device=self.device
-            )
-        except:
-            self.depth_model = None
-            print("Warning: Depth Model failed to load.")
 
-    def get_status(self):
-        return self.job_status
-
-    def get_result(self):
-        return self.job_status.get("result")
+        # Models come from the process-wide registry on first use, so every
+        # EnrichmentPipeline instance shares one copy of the weights.
+        self._vision_model = None
+        self._depth_model = None
+        self._depth_failed = False
+
+    @property
+    def vision_model(self):
+        if self._vision_model is None:
+            print("1. Loading YOLO-World...")
+            self._vision_model = registry.acquire("yolo-world")
+        return self._vision_model
+
+    @property
+    def depth_model(self):
+        if self._depth_model is None and not self._depth_failed:
+            print("2. Loading Depth Model...")
+            try:
+                self._depth_model = registry.acquire("depth-anything")
+            except Exception:
+                self._depth_failed = True
+                print("Warning: Depth Model failed to load.")
+        return self._depth_model
+
+    def release_models(self):
+        """Drops this pipeline's registry references so idle weights can be evicted."""
+        if self._vision_model is not None: registry.release("yolo-world")
+        if self._depth_model is not None: registry.release("depth-anything")
+        self._vision_model = None
+        self._depth_model = None
 
     # --- INGESTION ---
     def ingest(self, source_type, url, token=None):
@@ -128,42 +175,164 @@ class EnrichmentPipeline:
             return None
 
     # --- MAIN ROUTER ---
-    def process_request(self, payload):
+    def run_job(self, payload, job=None):
+        """Runs one /enrich/process payload and returns its result; progress goes to job (see jobs.py) if given."""
         task_type = payload.get('task_type', 'grounding')
         video_rel = payload.get('path')
         sensor_path = payload.get('sensor_path')
         mode = payload.get('mode', 'monocular') 
         prompts = payload.get('prompts')
-        
-        self.job_status = { "state": "processing", "progress": 0, "result": None, "error": None }
-        
+        use_cache = payload.get('use_cache', True)
+        # sensor_rich alignment: {"interpolation": "nearest"|"linear"|"slerp", "window_ms": 0, "clock_offset_ms": 0}
+        sensor_config = payload.get('sensor_config')
+        # Keyframe selection: "uniform" stride or "adaptive" (budget follows motion)
+        sampling = payload.get('sampling', 'uniform')
+        # Grounding detect-every-k: {"interval": 4, "min_confidence": 0.5}; absent = detect every frame
+        tracking = payload.get('tracking')
+        # Factory ROI detection around the last hand box: true or {"expand": 2.0, "imgsz": 192}
+        roi = payload.get('roi')
+        # Persisted frame encoding: {"codec": "jpeg"|"webp"|"png", "quality": 90}; defaults from FIDELITY_FRAME_*
+        frame_format = payload.get('frame_format')
+        # Grounding QA parameters: {"smoothing_alpha": 0.3}; also accepted by /enrich/rederive
+        validation = payload.get('config')
+        # Grounding depth tier: "quality" (dense, full resolution) | "balanced" | "fast"; default FIDELITY_DEPTH_TIER
+        depth = payload.get('depth')
+        # Grounding early abort after N frames; default FIDELITY_EARLY_ABORT_FRAMES, 0 = off
+        early_abort = payload.get('early_abort_frames')
+
+        session_id = str(uuid.uuid4())[:8]
+        session_frame_dir = os.path.join(self.frames_base_dir, session_id)
+        os.makedirs(session_frame_dir, exist_ok=True)
+
         try:
-            session_id = str(uuid.uuid4())[:8]
-            session_frame_dir = os.path.join(self.frames_base_dir, session_id)
-            os.makedirs(session_frame_dir, exist_ok=True)
+            return self.run_pipeline(task_type, video_rel, sensor_path, mode, prompts, session_frame_dir, session_id, use_cache=use_cache, sensor_config=sensor_config, sampling=sampling, tracking=tracking, roi=roi, frame_format=frame_format, validation=validation, depth=depth, early_abort=early_abort, job=job)
+        except JobCancelled:
+            # Nothing will ever reference a cancelled session's frames
+            shutil.rmtree(session_frame_dir, ignore_errors=True)
+            raise
+
+    def _report(self, job, **fields):
+        """Per-frame progress to the job, stopping here if it was cancelled (nothing to do without a job)."""
+        if job is None: return
+        job.check_cancelled()
+        job.update(**fields)
+
+    def run_pipeline(self, task_type, video_rel, sensor_path, mode, prompts, frame_dir, session_id, use_cache=True, sensor_config=None, sampling="uniform", tracking=None, roi=None, frame_format=None, validation=None, depth=None, early_abort=None, job=None):
+        """Runs the factory or grounding pipeline, answering from the result cache when possible."""
+        key = None
+        video_path = self._video_full_path(video_rel)
+        if use_cache and result_cache.enabled and video_path:
+            key = result_cache.make_key(
+                video_path, task_type,
+                mode=None if task_type == 'factory' else mode,
+                prompts=prompts,
+                sampling=self._sampling_config(task_type, sampling),
+                models=self._model_versions(task_type),
+                sensor_path=sensor_path if task_type != 'factory' and mode == 'sensor_rich' else None,
+                options=self._cache_options(task_type, mode, sensor_config, tracking, roi, frame_format, validation, depth, early_abort)
+            )
+            cached = result_cache.lookup(key, frame_dir, session_id)
+            if cached is not None: return cached
 
-            if task_type == 'factory':
-                # FACTORY: Video -> Multi-View Assets + Synthetic Sensors
-                result = self._run_factory_pipeline(video_rel, prompts, session_frame_dir, session_id)
-            else:
-                # GROUNDING: Video + (Optional) Sensors -> Physics Validation
-                result = self._run_grounding_pipeline(video_rel, sensor_path, mode, prompts, session_frame_dir, session_id)
-            
-            self.job_status["result"] = result
-            self.job_status["summary"] = result.get('summary_stats', {})
-            self.job_status["state"] = "completed"
-            self.job_status["progress"] = 100
-            
-        except Exception as e:
-            print(f"Pipeline Error: {e}")
-            self.job_status["state"] = "error"
-            self.job_status["error"] = str(e)
+        if task_type == 'factory':
+            # FACTORY: Video -> Multi-View Assets + Synthetic Sensors
+            result = self._run_factory_pipeline(video_rel, prompts, frame_dir, session_id, sampling=sampling, roi=roi, frame_format=frame_format, job=job)
+        else:
+            # GROUNDING: Video + (Optional) Sensors -> Physics Validation
+            result = self._run_grounding_pipeline(video_rel, sensor_path, mode, prompts, frame_dir, session_id, sensor_config=sensor_config, sampling=sampling, tracking=tracking, frame_format=frame_format, validation=validation, depth=depth, early_abort=early_abort, job=job)
+
+        if key: result_cache.store(key, result, frame_dir, session_id)
+        return result
+
+    def _video_full_path(self, video_rel_path):
+        """Same resolution as the pipelines: static path, else the last ingested video."""
+        if not video_rel_path: return None
+        if not video_rel_path.startswith("http"):
+            clean_rel = video_rel_path.replace("/static/", "")
+            full_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", clean_rel)
+            if os.path.exists(full_path): return full_path
+        fallback = os.path.join(self.download_dir, "current_ego.mp4")
+        return fallback if os.path.exists(fallback) else None
+
+    def _sampling_config(self, task_type, strategy="uniform"):
+        target = self.FACTORY_TARGET_FRAMES if task_type == 'factory' else self.GROUNDING_TARGET_FRAMES
+        return {"strategy": strategy, "target_frames": target, "width": self.INFERENCE_WIDTH, "decoder": decoder_backend()}
+
+    def _sampling_metadata(self, plan_stats, frame_indices, weights):
+        """Per-keyframe weights (1.0 = one uniform stride of source frames) for the result metadata."""
+        meta = dict(plan_stats)
+        meta["frame_indices"] = [int(i) for i in frame_indices]
+        meta["weights"] = [round(float(w), 4) for w in weights[:len(frame_indices)]] if weights is not None else [1.0] * len(frame_indices)
+        return meta
+
+    def _sensor_options(self, sensor_config):
+        """Payload sensor_config (milliseconds) -> SensorStream keyword arguments (seconds)."""
+        cfg = sensor_config or {}
+        return {
+            "interpolation": cfg.get("interpolation", "nearest"),
+            "window": float(cfg.get("window_ms", 0)) / 1000.0,
+            "clock_offset": float(cfg.get("clock_offset_ms", 0)) / 1000.0,
+        }
+
+    def _validation_options(self, validation):
+        """Payload config ({"smoothing_alpha"}) -> ValidationPipeline keyword arguments (empty for the defaults)."""
+        cfg = validation or {}
+        options = {}
+        if cfg.get("smoothing_alpha") is not None and float(cfg["smoothing_alpha"]) != DEFAULT_SMOOTHING_ALPHA:
+            options["smoothing_alpha"] = float(cfg["smoothing_alpha"])
+        return options
+
+    def _tracking_options(self, tracking):
+        """Payload tracking (True or {"interval", "min_confidence"}) -> BoxTracker keyword arguments."""
+        cfg = tracking if isinstance(tracking, dict) else {}
+        return {
+            "interval": int(cfg.get("interval", DEFAULT_TRACK_INTERVAL)),
+            "min_confidence": float(cfg.get("min_confidence", DEFAULT_MIN_CONFIDENCE)),
+        }
+
+    def _roi_options(self, roi):
+        """Payload roi (True or {"expand", "imgsz"}) -> RoiDetector keyword arguments."""
+        cfg = roi if isinstance(roi, dict) else {}
+        return {
+            "expand": float(cfg.get("expand", DEFAULT_ROI_EXPAND)),
+            "imgsz": int(cfg.get("imgsz", DEFAULT_ROI_SIZE)),
+        }
+
+    def _frame_writer(self, frame_dir, frame_format):
+        """FrameWriter for payload frame_format ({"codec", "quality"}), FIDELITY_FRAME_* defaults otherwise."""
+        cfg = frame_format or {}
+        return FrameWriter(frame_dir, codec=cfg.get("codec", DEFAULT_FRAME_CODEC), quality=cfg.get("quality", DEFAULT_FRAME_QUALITY))
+
+    def _early_abort_frames(self, early_abort):
+        """Frames before the early-abort check (0 = off); at least MIN_COMMERCIAL_FRAMES, below which every clip scores 0.0."""
+        frames = self.early_abort_frames if early_abort is None else int(early_abort)
+        return max(frames, MIN_COMMERCIAL_FRAMES) if frames > 0 else 0
+
+    def _cache_options(self, task_type, mode, sensor_config, tracking, roi=None, frame_format=None, validation=None, depth=None, early_abort=None):
+        """Pipeline options that change the output (None for the defaults)."""
+        options = {}
+        if task_type == 'factory':
+            if roi: options["roi"] = self._roi_options(roi)
+        else:
+            if mode == 'sensor_rich': options.update(self._sensor_options(sensor_config))
+            if tracking: options["tracking"] = self._tracking_options(tracking)
+            if self._validation_options(validation): options["validation"] = self._validation_options(validation)
+            if resolve_depth_tier(depth) != "quality": options["depth"] = resolve_depth_tier(depth)
+            if self._early_abort_frames(early_abort): options["early_abort_frames"] = self._early_abort_frames(early_abort)
+        codec = (frame_format or {}).get("codec", DEFAULT_FRAME_CODEC)
+        quality = (frame_format or {}).get("quality", DEFAULT_FRAME_QUALITY)
+        if codec != "jpeg" or quality is not None: options["frames"] = {"codec": codec, "quality": quality}
+        return options or None
+
+    def _model_versions(self, task_type):
+        names = ["yolo-world"] if task_type == 'factory' else ["yolo-world", "depth-anything"]
+        return {name: registry.version(name) for name in names}
 
     # =========================================================================
     # PIPELINE 1: DATA FOUNDRY (Factory Mode)
     # Generates Multi-View Assets from Single View
     # =========================================================================
-    def _run_factory_pipeline(self, video_rel_path, user_prompts, frame_dir, session_id):
+    def _run_factory_pipeline(self, video_rel_path, user_prompts, frame_dir, session_id, sampling="uniform", roi=None, frame_format=None, job=None):
         print("🏭 Starting Data Foundry Pipeline...")
         
         # 1. Resolve Video Path
@@ -180,120 +349,116 @@ class EnrichmentPipeline:
              full_path = os.path.join(self.download_dir, "current_ego.mp4")
              if not os.path.exists(full_path): raise Exception(f"Video source not found: {full_path}")
         
-        cap = cv2.VideoCapture(full_path)
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        source = open_frame_source(full_path, width=384)
+        fps = source.fps
+        total_frames = source.total_frames
         if total_frames <= 0: total_frames = 300
         
         # Config
-        TARGET_FRAMES = 120 # High quality SKU
+        TARGET_FRAMES = self.FACTORY_TARGET_FRAMES
         step_size = max(1, total_frames // TARGET_FRAMES)
+        self._report(job, stage="sampling", total_frames=TARGET_FRAMES)
+        sample_indices, sample_weights, sampling_stats = plan_samples(sampling, full_path, total_frames, TARGET_FRAMES)
         
         imu_gen = SyntheticIMU(fps=fps)
         timeline = []
         
-        # Sub-directories for Multi-View
-        main_dir = os.path.join(frame_dir, "main")
-        side_dir = os.path.join(frame_dir, "side")
-        wrist_dir = os.path.join(frame_dir, "wrist")
-        os.makedirs(main_dir, exist_ok=True)
-        os.makedirs(side_dir, exist_ok=True)
-        os.makedirs(wrist_dir, exist_ok=True)
-
-        current_frame = 0
-        frames_processed = 0
+        # Multi-View: main/, side/ and wrist/ views (in the frame store, or as sub-directories)
+        writer = self._frame_writer(frame_dir, frame_format)
+        if writer.storage == "files":
+            for view in ("main", "side", "wrist"):
+                os.makedirs(os.path.join(frame_dir, view), exist_ok=True)
+
         last_hand_bbox = None # For smooth wrist camera tracking
+        detector = detector_for(self.vision_model, self.default_vocab)
+        # ROI mode: each frame's crop depends on the previous hand box, so detection runs in order in its own stage
+        roi_detector = RoiDetector(detector, **self._roi_options(roi)) if roi else None
+        batcher = InferenceBatcher(None if roi_detector else detector, batch_size=self.infer_batch_size, max_batch_bytes=self.infer_max_bytes)
+
+        # Decode -> (persist main view) -> [ROI detection] -> batched detection, each on its own thread
+        pipe = StagedPipeline(maxsize=self.stage_queue_size)
+        pipe.source("decode", self._decode_frames(source, step_size, TARGET_FRAMES, 384, sample_indices, ext=writer.ext))
+        pipe.tap("persist", lambda pkt: writer.write(f"main/{pkt.filename}", pkt.image), after="decode")
+        if roi_detector: pipe.stage("roi", lambda pkt: [self._apply_roi(roi_detector, pkt)])
+        pipe.stage("inference", lambda pkt: batcher.add(pkt.rgb, pkt), flush=batcher.flush)
+        stages = pipe.run()
         
-        while cap.isOpened() and frames_processed < TARGET_FRAMES:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, current_frame)
-            ret, frame = cap.read()
-            if not ret: break
-            
-            self.job_status["progress"] = int((frames_processed / TARGET_FRAMES) * 100)
-            
-            # 1. Process Main View (Resize & Save)
-            h, w = frame.shape[:2]
-            scale = 384 / w
-            new_h = int(h * scale)
-            main_view = cv2.resize(frame, (384, new_h))
-            
-            main_fname = f"frame_{current_frame:06d}.jpg"
-            cv2.imwrite(os.path.join(main_dir, main_fname), main_view)
-            
-            # 2. Detect Hand (For Wrist Cam & IMU)
-            rgb = cv2.cvtColor(main_view, cv2.COLOR_BGR2RGB)
-            results = self.vision_model.predict(rgb, verbose=False, conf=0.1)
-            
-            hand_pos = [0.5, 0.5, 0.5] # Default center
-            hand_bbox = None
+        try:
+            for frames_processed, (pkt, det, _) in enumerate(stages):
+                self._report(job, stage="frames", frames=frames_processed, progress=int((frames_processed / TARGET_FRAMES) * 100), stage_stats=pipe.stats())
+                current_frame, main_view, new_h, main_fname = pkt.frame_idx, pkt.image, pkt.height, pkt.filename
+
+                # 2. Detect Hand (For Wrist Cam & IMU)
+                hand_pos = [0.5, 0.5, 0.5] # Default center
+                hand_bbox = None
             
-            if results:
-                for box in results[0].boxes:
-                    label = results[0].names[int(box.cls[0])]
-                    if "hand" in label.lower() or "gripper" in label.lower():
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
+                detections = pkt.detections if roi_detector else detections_from_results(det)
+                for label, xyxy in detections:
+                    if is_hand(label):
+                        x1, y1, x2, y2 = map(int, xyxy)
                         cx, cy = (x1+x2)//2, (y1+y2)//2
                         hand_pos = [cx/384, cy/new_h, 0.5]
                         hand_bbox = (x1, y1, x2, y2)
                         last_hand_bbox = hand_bbox
                         break
             
-            # 3. Generate WRIST VIEW (Digital Zoom/Crop on Hand)
-            # Commercial Value: Simulates an eye-in-hand camera
-            wrist_view = np.zeros((128, 128, 3), dtype=np.uint8)
-            target_bbox = hand_bbox if hand_bbox else last_hand_bbox
+                # 3. Generate WRIST VIEW (Digital Zoom/Crop on Hand)
+                # Commercial Value: Simulates an eye-in-hand camera
+                wrist_view = np.zeros((128, 128, 3), dtype=np.uint8)
+                target_bbox = hand_bbox if hand_bbox else last_hand_bbox
             
-            if target_bbox:
-                bx1, by1, bx2, by2 = target_bbox
-                # Add context padding (1.5x)
-                bw, bh = bx2-bx1, by2-by1
-                cx, cy = (bx1+bx2)//2, (by1+by2)//2
-                size = max(bw, bh) * 1.5
-                x_start = max(0, int(cx - size/2))
-                y_start = max(0, int(cy - size/2))
-                x_end = min(384, int(cx + size/2))
-                y_end = min(new_h, int(cy + size/2))
+                if target_bbox:
+                    bx1, by1, bx2, by2 = target_bbox
+                    # Add context padding (1.5x)
+                    bw, bh = bx2-bx1, by2-by1
+                    cx, cy = (bx1+bx2)//2, (by1+by2)//2
+                    size = max(bw, bh) * 1.5
+                    x_start = max(0, int(cx - size/2))
+                    y_start = max(0, int(cy - size/2))
+                    x_end = min(384, int(cx + size/2))
+                    y_end = min(new_h, int(cy + size/2))
                 
-                if x_end > x_start and y_end > y_start:
-                    crop = main_view[y_start:y_end, x_start:x_end]
-                    wrist_view = cv2.resize(crop, (128, 128))
-            else:
-                # Fallback: Center crop
-                cy, cx = new_h//2, 384//2
-                wrist_view = cv2.resize(main_view[cy-64:cy+64, cx-64:cx+64], (128,128))
-
-            cv2.imwrite(os.path.join(wrist_dir, main_fname), wrist_view)
-
-            # 4. Generate SIDE VIEW (Perspective Warp)
-            # Commercial Value: Simulates a static 3rd person camera for NeRFs/3D recon
-            src_pts = np.float32([[0, 0], [384, 0], [0, new_h], [384, new_h]])
-            # Squeeze left side, expand right side to simulate looking from right
-            dst_pts = np.float32([[0, new_h*0.1], [384, 0], [0, new_h*0.9], [384, new_h]])
-            matrix = cv2.getPerspectiveTransform(src_pts, dst_pts)
-            side_view = cv2.warpPerspective(main_view, matrix, (384, new_h))
-            cv2.imwrite(os.path.join(side_dir, main_fname), side_view)
-
-            # 5. Hallucinate Sensors
-            synth_sensors = imu_gen.compute(hand_pos)
-            
-            # 6. Build Timeline
-            timeline.append({
-                "timestamp": current_frame / fps,
-                "frame_idx": current_frame,
-                "observations": {
-                    "main_camera": f"/static/processed_frames/{session_id}/main/{main_fname}",
-                    "side_camera": f"/static/processed_frames/{session_id}/side/{main_fname}",
-                    "wrist_camera": f"/static/processed_frames/{session_id}/wrist/{main_fname}"
-                },
-                "sensors": synth_sensors,
-                "robot_state": {"qpos": [0]*7, "gripper": 0}, # Placeholder
-                "detected_objects": [results[0].names[int(b.cls[0])] for b in results[0].boxes] if results else []
-            })
-            
-            current_frame += step_size
-            frames_processed += 1
+                    if x_end > x_start and y_end > y_start:
+                        crop = main_view[y_start:y_end, x_start:x_end]
+                        wrist_view = cv2.resize(crop, (128, 128))
+                else:
+                    # Fallback: Center crop
+                    cy, cx = new_h//2, 384//2
+                    wrist_view = cv2.resize(main_view[cy-64:cy+64, cx-64:cx+64], (128,128))
+
+                writer.write(f"wrist/{main_fname}", wrist_view)
+
+                # 4. Generate SIDE VIEW (Perspective Warp)
+                # Commercial Value: Simulates a static 3rd person camera for NeRFs/3D recon
+                src_pts = np.float32([[0, 0], [384, 0], [0, new_h], [384, new_h]])
+                # Squeeze left side, expand right side to simulate looking from right
+                dst_pts = np.float32([[0, new_h*0.1], [384, 0], [0, new_h*0.9], [384, new_h]])
+                matrix = cv2.getPerspectiveTransform(src_pts, dst_pts)
+                side_view = cv2.warpPerspective(main_view, matrix, (384, new_h))
+                writer.write(f"side/{main_fname}", side_view)
+
+                # 5. Hallucinate Sensors
+                synth_sensors = imu_gen.compute(hand_pos)
             
-        cap.release()
+                # 6. Build Timeline
+                timeline.append({
+                    "timestamp": current_frame / fps,
+                    "frame_idx": current_frame,
+                    "observations": {
+                        "main_camera": writer.url(session_id, f"main/{main_fname}", frames_processed),
+                        "side_camera": writer.url(session_id, f"side/{main_fname}", frames_processed),
+                        "wrist_camera": writer.url(session_id, f"wrist/{main_fname}", frames_processed)
+                    },
+                    "sensors": synth_sensors,
+                    "robot_state": {"qpos": [0]*7, "gripper": 0}, # Placeholder
+                    "detected_objects": [label for label, _ in detections]
+                })
+        finally:
+            stages.close()
+            source.release()
+            writer.close()
+        decode_stats = source.stats()
+        print(f"🎞️ Decode: {decode_stats['decode_fps']} fps ({decode_stats['frames_decoded']} decoded, {decode_stats['seeks']} seeks)")
         
         return {
             "type": "factory_sku",
@@ -304,7 +469,13 @@ class EnrichmentPipeline:
                 "view_names": ["Main (RGB)", "Side (Synth)", "Wrist (Crop)"],
                 "sensor_type": "FULLY_SYNTHETIC",
                 "mode": "factory",
-                "quality_score": 1.0
+                "quality_score": 1.0,
+                "decode_stats": decode_stats,
+                "inference_stats": batcher.stats(),
+                "stage_stats": pipe.stats(),
+                "roi_stats": roi_detector.stats() if roi_detector else None,
+                "write_stats": writer.stats(),
+                "sampling": self._sampling_metadata(sampling_stats, [f["frame_idx"] for f in timeline], sample_weights)
             },
             "quality_score": 1.0
         }
@@ -312,7 +483,7 @@ class EnrichmentPipeline:
     # =========================================================================
     # PIPELINE 2: GROUNDING (Validation Mode)
     # =========================================================================
-    def _run_grounding_pipeline(self, video_rel_path, sensor_path, mode, user_prompts, frame_dir, session_id):
+    def _run_grounding_pipeline(self, video_rel_path, sensor_path, mode, user_prompts, frame_dir, session_id, sensor_config=None, sampling="uniform", tracking=None, frame_format=None, validation=None, depth=None, early_abort=None, job=None):
         print(f"🔬 Starting Grounding Pipeline ({mode})...")
         # 1. Setup Video
         clean_rel = video_rel_path.replace("/static/", "")
@@ -321,144 +492,182 @@ class EnrichmentPipeline:
             full_path = os.path.join(self.download_dir, "current_ego.mp4")
             if not os.path.exists(full_path): raise Exception("Video not found")
 
-        # Config
+        # Config: a per-vocabulary view, so the shared model's classes are never overwritten
         if user_prompts:
             custom = [p.strip() for p in user_prompts.split(',') if p.strip()]
-            self.vision_model.set_classes(["human hand"] + custom)
+            detector = detector_for(self.vision_model, ["human hand"] + custom)
         else:
-            self.vision_model.set_classes(self.default_vocab)
+            detector = detector_for(self.vision_model, self.default_vocab)
         
-        cap = cv2.VideoCapture(full_path)
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        source = open_frame_source(full_path, width=self.INFERENCE_WIDTH)
+        fps = source.fps
+        total_frames = source.total_frames
         if total_frames <= 0: total_frames = 3000
         
-        # 2. Setup Sensors
+        # 2. Processing Loop: raw per-frame outputs go into the artifact, everything after is derived from it
+        TARGET_FRAMES = self.GROUNDING_TARGET_FRAMES
+        step_size = max(1, total_frames // TARGET_FRAMES)
+        self._report(job, stage="sampling", total_frames=TARGET_FRAMES)
+        sample_indices, sample_weights, sampling_stats = plan_samples(sampling, full_path, total_frames, TARGET_FRAMES)
+        INF_W = self.INFERENCE_WIDTH
+        
+        artifact = GroundingArtifact()
+        artifact.meta.update({
+            "fps": fps,
+            "total_frames": total_frames,
+            "step_size": step_size,
+            "inference_width": INF_W,
+            "session_id": session_id,
+            "sampling_stats": sampling_stats,
+            "sample_weights": [float(w) for w in sample_weights] if sample_weights is not None else None,
+        })
+        abort_at = self._early_abort_frames(early_abort)
+        # Live QA on the raw hand track, reported with every frame's progress
+        live_qa = OnlineQA()
+        # Tracking mode: keyframe detection + LK propagation happen in order in their own stage,
+        # so the batcher is left with depth only
+        tracker = BoxTracker(detector, **self._tracking_options(tracking)) if tracking else None
+        batcher = InferenceBatcher(None if tracker else detector, self.depth_model, batch_size=self.infer_batch_size, max_batch_bytes=self.infer_max_bytes, depth_tier=depth)
+        odometry = VisualOdometry()
+
+        # Decode -> (persist) -> visual odometry -> [tracking] -> batched depth + detection, each on its own thread.
+        # Depth sampling stays on this thread so frames are recorded in order.
+        pipe = StagedPipeline(maxsize=self.stage_queue_size)
+        writer = self._frame_writer(frame_dir, frame_format)
+        pipe.source("decode", self._decode_frames(source, step_size, TARGET_FRAMES, INF_W, sample_indices, ext=writer.ext))
+        pipe.tap("persist", lambda pkt: writer.write(pkt.filename, pkt.image), after="decode")
+        pipe.stage("odometry", lambda pkt: [self._apply_odometry(odometry, pkt)])
+        if tracker: pipe.stage("tracking", lambda pkt: [self._apply_tracking(tracker, pkt)])
+        pipe.stage("inference", lambda pkt: batcher.add(pkt.rgb, pkt), flush=batcher.flush)
+        stages = pipe.run()
+        
+        try:
+            for frames_processed, (pkt, det, depth_map) in enumerate(stages):
+                self._report(job, stage="frames", frames=frames_processed, progress=int((frames_processed / TARGET_FRAMES) * 100), stage_stats=pipe.stats(), quality=live_qa.snapshot())
+
+                # --- C. VISION: boxes plus depth at each box center ---
+                detections = pkt.detections if tracker else detections_from_results(det)
+                depths = []
+                for label, xyxy in detections:
+                    if depth_map is None:
+                        depths.append(None)
+                        continue
+                    if isinstance(depth_map, SparseDepth):
+                        # Cheap depth tiers: metric depth evaluated at this box only
+                        depths.append(depth_map.sample(xyxy))
+                        continue
+                    x1,y1,x2,y2 = map(int, xyxy)
+                    cx, cy = (x1+x2)//2, (y1+y2)//2
+                    depths.append(float(depth_map[min(cy, pkt.height-1), min(cx, INF_W-1)]))
+
+                artifact.add_frame(pkt.frame_idx, pkt.height, writer.url(session_id, pkt.filename, frames_processed), pkt.camera_pose, detections, depths)
+                hand_pos_3d, _ = self._lift([(label, xyxy, d) for (label, xyxy), d in zip(detections, depths)], INF_W, pkt.height)
+                live_qa.update({"state": {"human_joints": hand_pos_3d}})
+
+                # Early abort: a clip whose first N frames are already unviable is not worth the rest of the decode and inference.
+                # Gap filling only helps, so the full QA probe is only needed when the raw track already scores fatal.
+                # Too few hand frames to judge (they would score 0.0 regardless) is not a reason to stop.
+                if abort_at and len(artifact) == abort_at and live_qa.hand_frames >= MIN_COMMERCIAL_FRAMES and live_qa.score() <= FATAL_SCORE:
+                    verdict = self._early_verdict(artifact, frame_dir, mode, sensor_path, sensor_config, validation)
+                    if verdict:
+                        artifact.meta["early_abort"] = verdict
+                        break
+        finally:
+            stages.close()
+            source.release()
+            writer.close()
+        decode_stats = source.stats()
+        print(f"🎞️ Decode: {decode_stats['decode_fps']} fps ({decode_stats['frames_decoded']} decoded, {decode_stats['seeks']} seeks)")
+
+        artifact.meta.update({
+            "stats": {
+                "decode_stats": decode_stats,
+                "inference_stats": batcher.stats(),
+                "stage_stats": pipe.stats(),
+                "tracking_stats": tracker.stats() if tracker else None,
+                "write_stats": writer.stats(),
+            },
+        })
+        try:
+            artifact.save(frame_dir)
+        except OSError as e:
+            print(f"Artifact save failed: {e}")  # only re-derivation needs it
+
+        self._report(job, stage="validation", frames=len(artifact), quality=live_qa.snapshot())
+        return self._derive_timeline(artifact, frame_dir, mode, sensor_path, sensor_config, validation)
+
+    def _lift(self, detections, inf_w, inf_h):
+        """(label, xyxy, depth) detections -> (hand position or None, object poses), pinhole camera at fx = frame width."""
+        hand_pos_3d, objects = None, []
+        for label, xyxy, depth in detections:
+            x1,y1,x2,y2 = map(int, xyxy)
+            cx, cy = (x1+x2)//2, (y1+y2)//2
+            z = 0.5 if depth is None else depth
+        
+            fx = inf_w; wx = (cx-inf_w/2)*z/fx; wy = (cy-inf_h/2)*z/fx
+            pose = [wx, wy, z]
+        
+            if "hand" in label.lower(): hand_pos_3d = pose
+            else: objects.append({"label":label, "pos":pose})
+        return hand_pos_3d, objects
+
+    def _early_verdict(self, artifact, frame_dir, mode, sensor_path=None, sensor_config=None, validation=None):
+        """QA of the frames recorded so far: the early-abort record if the score is already fatal, else None."""
+        probe = self._derive_timeline(artifact, frame_dir, mode, sensor_path, sensor_config, validation)
+        if probe["quality_score"] > FATAL_SCORE: return None
+        issues = [line.strip() for line in probe["validation_log"] if line.startswith("❌")]
+        print(f"⛔ Early abort after {len(artifact)} frames: quality {probe['quality_score']:.2f} ({'; '.join(issues)})")
+        return {"frames": len(artifact), "quality_score": probe["quality_score"], "issues": issues}
+
+    def _derive_timeline(self, artifact, frame_dir, mode, sensor_path=None, sensor_config=None, validation=None):
+        """Lifting, sensor merge, gap filling, kinematics and QA from a GroundingArtifact; no decode or inference."""
+        meta = artifact.meta
+        fps = meta["fps"]
+        total_frames = meta["total_frames"]
+        step_size = meta["step_size"]
+        INF_W = meta["inference_width"]
+        session_id = meta["session_id"]
+
+        # 3. Setup Sensors (typed columns, aligned per frame by binary search)
         real_sensor_data = None
         if mode == 'sensor_rich' and sensor_path and os.path.exists(sensor_path):
             try:
-                df = pd.read_csv(sensor_path)
-                cols = ['ax', 'ay', 'az', 'gx', 'gy', 'gz']
-                for c in cols: 
-                    if c in df.columns: df[c] = df[c].astype(float)
-                real_sensor_data = df.to_dict('records')
+                real_sensor_data = SensorStream.from_csv(sensor_path, **self._sensor_options(sensor_config))
+                if len(real_sensor_data) == 0: real_sensor_data = None
             except Exception as e: print(f"Sensor load failed: {e}")
         
         imu_gen = SyntheticIMU(fps=fps)
 
-        # 3. Processing Loop
-        TARGET_FRAMES = 150 
-        step_size = max(1, total_frames // TARGET_FRAMES)
-        INF_W = 384
-        
         raw_states = []
-        prev_gray = None
-        cam_pose_accum = np.eye(4)
-        
-        current_frame = 0
-        frames_processed = 0
-        
-        while cap.isOpened() and frames_processed < TARGET_FRAMES:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, current_frame)
-            ret, frame = cap.read()
-            if not ret: break
-            
-            self.job_status["progress"] = int((frames_processed / TARGET_FRAMES) * 100)
-            
-            frame_filename = f"frame_{current_frame:06d}.jpg"
-            frame_save_path = os.path.join(frame_dir, frame_filename)
-            
-            h, w = frame.shape[:2]
-            scale = INF_W / w
-            inf_h = int(h * scale)
-            frame_resized = cv2.resize(frame, (INF_W, inf_h))
-            cv2.imwrite(frame_save_path, frame_resized)
-            
-            rgb = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2RGB)
-            gray = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2GRAY)
-            
+        for current_frame, inf_h, frame_url, camera_pose, detections in artifact.frames():
             t = current_frame / fps
-            g_t = GroundedState(current_frame, t, f"/static/processed_frames/{session_id}/{frame_filename}")
-
-            # --- A. VISUAL ODOMETRY ---
-            if prev_gray is not None:
-                p0 = cv2.goodFeaturesToTrack(prev_gray, mask=None, maxCorners=40, qualityLevel=0.3, minDistance=7, blockSize=7)
-                if p0 is not None:
-                    p1, st, err = cv2.calcOpticalFlowPyrLK(prev_gray, gray, p0, None, winSize=(15,15), maxLevel=2)
-                    if p1 is not None and len(p1) > 8:
-                        E, mask = cv2.findEssentialMat(p1, p0, focal=1.0, pp=(0.0, 0.0), method=cv2.RANSAC, prob=0.99, threshold=1.0)
-                        if E is not None and E.shape == (3,3):
-                            _, R, t_vec, mask = cv2.recoverPose(E, p1, p0)
-                            T_step = np.eye(4); T_step[:3, :3] = R; T_step[:3, 3] = t_vec.flatten() * 0.05
-                            cam_pose_accum = cam_pose_accum @ T_step
-            g_t.state["camera_pose"] = cam_pose_accum.tolist()
-            prev_gray = gray
-
-            # --- B. DEPTH ---
-            depth_map = None
-            if self.depth_model:
-                try:
-                    d_res = self.depth_model(Image.fromarray(rgb))
-                    d_arr = np.array(d_res["depth"])
-                    d_norm = (d_arr - d_arr.min()) / (d_arr.max() - d_arr.min() + 1e-6)
-                    depth_map = np.interp(d_norm, (0, 1), (2.0, 0.1))
-                except: pass
-
-            # --- C. VISION & LIFTING ---
-            results = self.vision_model.predict(rgb, verbose=False, conf=0.1)
-            hand_pos_3d = None
-            
-            if results:
-                for box in results[0].boxes:
-                    label = results[0].names[int(box.cls[0])]
-                    x1,y1,x2,y2 = map(int, box.xyxy[0])
-                    cx, cy = (x1+x2)//2, (y1+y2)//2
-                    
-                    z = 0.5
-                    if depth_map is not None:
-                        cy_s = min(cy, inf_h-1); cx_s = min(cx, INF_W-1)
-                        z = float(depth_map[cy_s, cx_s])
-                    
-                    fx = INF_W; wx = (cx-INF_W/2)*z/fx; wy = (cy-inf_h/2)*z/fx
-                    pose = [wx, wy, z]
-                    
-                    if "hand" in label.lower(): hand_pos_3d = pose
-                    else: g_t.state["objects_poses"].append({"label":label, "pos":pose})
+            g_t = GroundedState(current_frame, t, frame_url)
+            g_t.state["camera_pose"] = camera_pose
 
+            # --- LIFTING ---
+            hand_pos_3d, objects = self._lift(detections, INF_W, inf_h)
+            g_t.state["objects_poses"].extend(objects)
             g_t.state["human_joints"] = hand_pos_3d
 
             # --- D. SENSORS (Merge Logic) ---
             if mode == 'sensor_rich' and real_sensor_data:
-                # Find row with closest timestamp
-                if 'timestamp' in real_sensor_data[0]:
-                    closest_row = min(real_sensor_data, key=lambda x: abs(x.get('timestamp', 0) - t))
-                else:
-                    idx = int((current_frame / total_frames) * len(real_sensor_data))
-                    closest_row = real_sensor_data[min(idx, len(real_sensor_data)-1)]
-
-                g_t.sensors = {
-                    "accel": [float(closest_row.get('ax',0)), float(closest_row.get('ay',0)), float(closest_row.get('az',0))],
-                    "gyro": [float(closest_row.get('gx',0)), float(closest_row.get('gy',0)), float(closest_row.get('gz',0))]
-                }
+                g_t.sensors = real_sensor_data.sample(t, fraction=current_frame / total_frames)
             else:
                 # Monocular Hallucination
                 if hand_pos_3d: g_t.sensors = imu_gen.compute(hand_pos_3d)
                 else: g_t.sensors = imu_gen.compute([0,0,0] if not imu_gen.prev_pos is None else [0,0,0])
 
             raw_states.append(g_t)
-            current_frame += step_size
-            frames_processed += 1
-
-        cap.release()
         
         # 4. Final Polish & QA
         filled_states = self._interpolate_hands(raw_states)
         
         final_timeline = []
-        dt = step_size / fps
         for i in range(len(filled_states)):
             curr = filled_states[i]
             nxt = filled_states[i+1] if i < len(filled_states)-1 else curr
+            # Adaptive keyframes are unevenly spaced: use the actual gap to the next one
+            dt = ((nxt.frame_idx - curr.frame_idx) or step_size) / fps
             
             if curr.state["human_joints"] and nxt.state["human_joints"]:
                 v = (np.array(nxt.state["human_joints"]) - np.array(curr.state["human_joints"])) / dt
@@ -478,19 +687,24 @@ class EnrichmentPipeline:
             })
 
         print(f"🔍 Running {mode.upper()} QA...")
-        validator = ValidationPipeline()
-        validated = validator.process(final_timeline, mode=mode)
+        validator = ValidationPipeline(**self._validation_options(validation))
+        validated = validator.process(Timeline.from_frames(final_timeline), mode=mode)
         
         return {
             "type": "grounded_trajectory",
-            "timeline": validated['timeline'],
+            "timeline": validated['timeline'].to_frames(),
             "metadata": { 
                 "mode": mode, 
                 "fps": fps, 
                 "session_id": session_id,
                 "frames_dir": frame_dir,
                 "sensor_source": "REAL" if real_sensor_data else "SYNTHETIC",
-                "quality_score": validated['quality_score']
+                "quality_score": validated['quality_score'],
+                "validation_stats": validated['stats'],
+                "early_abort": meta.get("early_abort"),
+                **meta.get("stats", {}),
+                "artifact_stats": artifact.stats(frame_dir),
+                "sampling": self._sampling_metadata(meta["sampling_stats"], [s.frame_idx for s in filled_states], meta["sample_weights"])
             },
             "validation_log": validated['validation_log'],
             "quality_score": validated['quality_score'],
@@ -503,25 +717,50 @@ class EnrichmentPipeline:
             }
         }
 
+    def rederive(self, session_id, mode='monocular', sensor_path=None, sensor_config=None, validation=None):
+        """Re-runs lifting, kinematics and validation of a grounding session from its artifact, with new parameters."""
+        frame_dir = os.path.join(self.frames_base_dir, session_id)
+        if not session_id or os.path.basename(session_id) != session_id or not has_artifact(frame_dir): raise FileNotFoundError(f"No grounding artifact for session {session_id}")
+        artifact = GroundingArtifact.load(frame_dir).rebase(session_id)
+        print(f"♻️ Re-deriving session {session_id} ({mode}) from {len(artifact)} cached frames...")
+        result = self._derive_timeline(artifact, frame_dir, mode, sensor_path, sensor_config, validation)
+        result["metadata"]["artifact_stats"]["rederived"] = True
+        return result
+
+    def _decode_frames(self, source, step_size, target_frames, width, frame_indices=None, ext=".jpg"):
+        """Decode stage: yields a FramePacket at inference width for every sampled frame (strided, or the given indices)."""
+        frames = source.frames_at(frame_indices) if frame_indices is not None else source.frames(step=step_size, max_frames=target_frames)
+        for current_frame, frame in frames:
+            h, w = frame.shape[:2]
+            if w != width:
+                # Sources opened without a target width still get resized here
+                frame = cv2.resize(frame, (width, int(h * (width / w))))
+            yield FramePacket(current_frame, frame, ext)
+
+    def _apply_odometry(self, odometry, pkt):
+        """Odometry stage: poses must be accumulated strictly in frame order."""
+        pkt.camera_pose = odometry.update(pkt.gray)
+        return pkt
+
+    def _apply_tracking(self, tracker, pkt):
+        """Tracking stage: keyframe detection or LK propagation, strictly in frame order."""
+        pkt.detections = tracker.update(pkt.rgb, pkt.gray)
+        return pkt
+
+    def _apply_roi(self, roi_detector, pkt):
+        """ROI stage: crop around the previous frame's hand, so strictly in frame order."""
+        pkt.detections = roi_detector.detect(pkt.rgb)
+        return pkt
+
     def _interpolate_hands(self, states):
-        """Robustly fills gaps in hand tracking"""
-        filled = copy.deepcopy(states)
-        valid_indices = [i for i, s in enumerate(filled) if s.state["human_joints"] is not None]
-        if not valid_indices: return filled 
-
-        for i in range(len(filled)):
-            if filled[i].state["human_joints"] is None:
-                prev_idx = next((x for x in reversed(valid_indices) if x < i), None)
-                next_idx = next((x for x in valid_indices if x > i), None)
-                
-                if prev_idx is not None and next_idx is not None:
-                    p1 = np.array(filled[prev_idx].state["human_joints"])
-                    p2 = np.array(filled[next_idx].state["human_joints"])
-                    gap = next_idx - prev_idx
-                    t = (i - prev_idx) / gap
-                    filled[i].state["human_joints"] = (p1 + (p2 - p1) * t).tolist()
-                elif prev_idx is not None:
-                    filled[i].state["human_joints"] = filled[prev_idx].state["human_joints"]
-                elif next_idx is not None:
-                    filled[i].state["human_joints"] = filled[next_idx].state["human_joints"]
-        return filled
\ No newline at end of file
+        """Robustly fills gaps in hand tracking (in place; see interpolation.fill_gaps)"""
+        joints = [s.state["human_joints"] for s in states]
+        points, valid = track_to_array(joints)
+        if not valid.any(): return states
+
+        contacts = [s.state["contacts"] for s in states]
+        points, filled, contacts = fill_gaps(points, valid, contacts, extrapolate="hold")
+        for i in np.flatnonzero(filled):
+            states[i].state["human_joints"] = points[i].tolist()
+            states[i].state["contacts"] = contacts[i]
+        return states
\ No newline at end of file
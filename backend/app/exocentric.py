@@ -1,17 +1,17 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import json
 import os
 import uuid
 
+from .frame_source import open_frame_source
+from .model_registry import registry
+
 class ExocentricExtractor:
     def __init__(self):
-        # 1. Pose Model (YOLOv8-Pose) - Automatic download if missing
-        print("Loading YOLOv8-Pose...")
-        self.pose_model = YOLO("yolov8n-pose.pt")
-        # 2. Object Model
-        self.obj_model = YOLO("yolov8n.pt")
+        # Models come from the shared registry on first use (cheap to construct per video)
+        self._pose_model = None
+        self._obj_model = None
         
         # Camera Intrinsics Heuristic (Assumed for webcam/phone footage)
         self.focal_length = 1000.0
@@ -22,6 +22,28 @@ class ExocentricExtractor:
         self.download_dir = os.path.join(self.static_dir, "downloads")
         os.makedirs(self.download_dir, exist_ok=True)
 
+    @property
+    def pose_model(self):
+        # 1. Pose Model (YOLOv8-Pose) - Automatic download if missing
+        if self._pose_model is None:
+            print("Loading YOLOv8-Pose...")
+            self._pose_model = registry.acquire("yolov8n-pose")
+        return self._pose_model
+
+    @property
+    def obj_model(self):
+        # 2. Object Model
+        if self._obj_model is None:
+            self._obj_model = registry.acquire("yolov8n")
+        return self._obj_model
+
+    def release_models(self):
+        """Drops this extractor's registry references so idle weights can be evicted."""
+        if self._pose_model is not None: registry.release("yolov8n-pose")
+        if self._obj_model is not None: registry.release("yolov8n")
+        self._pose_model = None
+        self._obj_model = None
+
     def estimate_depth(self, bbox_height, frame_height):
         # Simple pinhole model: Depth is inversely proportional to height
         if bbox_height == 0: return 5.0
@@ -53,11 +75,11 @@ class ExocentricExtractor:
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video file not found: {video_path}")
 
-        cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        source = open_frame_source(video_path)
+        fps = source.fps
+        width = source.width
+        height = source.height
+        total_frames = source.total_frames
         
         # Output structure
         output_data = {
@@ -70,15 +92,9 @@ class ExocentricExtractor:
             "timeline": []
         }
 
-        frame_idx = 0
-        
         print(f"Starting Exocentric Inference on {video_path} ({width}x{height})")
 
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
+        for frame_idx, frame in source.frames():
             frame_data = {
                 "frame": int(frame_idx),
                 "timestamp": float(frame_idx / fps),
@@ -155,10 +171,10 @@ class ExocentricExtractor:
                             })
 
             output_data["timeline"].append(frame_data)
-            frame_idx += 1
-            if frame_idx % 30 == 0: print(f"Processed {frame_idx}/{total_frames}")
+            if (frame_idx + 1) % 30 == 0: print(f"Processed {frame_idx + 1}/{total_frames}")
 
-        cap.release()
+        source.release()
+        output_data["metadata"]["decode_stats"] = source.stats()
         
         # --- RETURN DATA DIRECTLY ---
         print("Finalizing Serialization...")
@@ -5,6 +5,9 @@ import h5py
 import shutil
 from datetime import datetime
 
+from .timeline import Timeline
+from .frame_store import find_frame, MEDIA_TYPES
+
 class DataExporter:
     def __init__(self):
         # Path setup relative to this file
@@ -26,11 +29,48 @@ class DataExporter:
             return os.path.abspath(os.path.join(os.path.dirname(__file__), "static", clean_rel))
         return rel_path
 
+    def _copy_frame(self, rel_path, dst_dir, stem):
+        """
+        Copies a timeline frame (loose /static file or frame-store entry) to dst_dir/<stem><ext>,
+        ext being the stored frame's (.jpg, .webp or .png per the session's codec). Returns the file name, or None.
+        """
+        abs_src = self._resolve_abs_path(rel_path)
+        if abs_src and os.path.exists(abs_src):
+            dst_filename = stem + self._frame_ext(abs_src)
+            shutil.copy2(abs_src, os.path.join(dst_dir, dst_filename))
+            return dst_filename
+        found = find_frame(rel_path)
+        if found is None: return None
+        data, name = found
+        dst_filename = stem + self._frame_ext(name)
+        with open(os.path.join(dst_dir, dst_filename), "wb") as f: f.write(data)
+        return dst_filename
+
+    def _frame_ext(self, name):
+        ext = os.path.splitext(name)[1].lower()
+        return ext if ext in MEDIA_TYPES else ".jpg"
+
+    def _state_vectors(self, timeline, default_gripper):
+        """qpos + gripper per frame, zeros where the frame has no robot_state.qpos."""
+        has_qpos = timeline.mask("qpos")
+        qpos = timeline.column("qpos")
+        if not has_qpos.any(): qpos = np.zeros((len(timeline), 7))
+        gripper = np.where(timeline.mask("gripper_width"), timeline.column("gripper_width"), default_gripper)
+        states = np.hstack([qpos.reshape(len(timeline), -1), gripper[:, None]])
+        states[~has_qpos] = 0.0
+        return states, has_qpos
+
+    def _vectors(self, timeline, name, width=3):
+        """(N, width) column, zeros for frames (or whole timelines) without the field."""
+        if not timeline.mask(name).any(): return np.zeros((len(timeline), width))
+        return timeline.column(name).reshape(len(timeline), -1)
+
     def to_lerobot(self, timeline, dataset_name, source_video_path=None):
         """
         Exports data to LeRobot format + Source Video + Extracted Frames in a ZIP file.
         """
-        if not timeline:
+        timeline = Timeline.coerce(timeline)
+        if not len(timeline):
             return {"status": "error", "message": "Timeline is empty"}
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -43,48 +83,18 @@ class DataExporter:
         os.makedirs(folder_path, exist_ok=True)
         os.makedirs(frames_out_dir, exist_ok=True)
         
-        obs_state = []
-        actions = []
-        
         print(f"📦 Exporting {len(timeline)} frames to LeRobot format...")
 
-        for i, frame in enumerate(timeline):
-            # 1. State Vector (Joints + Gripper)
-            current_vec = [0.0] * 8 
-            if "robot_state" in frame and "qpos" in frame["robot_state"]:
-                qpos = frame["robot_state"]["qpos"]
-                gripper = frame["robot_state"].get("gripper_width", 0.04)
-                current_vec = qpos + [gripper]
-            
-            obs_state.append(current_vec)
-            
-            # 2. Action Vector (Next State)
-            if i < len(timeline) - 1:
-                next_frame = timeline[i+1]
-                next_vec = [0.0] * 8
-                if "robot_state" in next_frame and "qpos" in next_frame["robot_state"]:
-                    n_qpos = next_frame["robot_state"]["qpos"]
-                    n_grip = next_frame["robot_state"].get("gripper_width", 0.04)
-                    next_vec = n_qpos + [n_grip]
-                actions.append(next_vec)
-            else:
-                actions.append(current_vec)
-
-            # 3. Copy Frame Image
-            # Check observation structure from EnrichmentPipeline
-            img_path = None
-            if "observation" in frame:
-                if isinstance(frame["observation"], dict):
-                    img_path = frame["observation"].get("image_path")
-                elif isinstance(frame["observation"], str):
-                    img_path = frame["observation"] # Legacy string format
-            
+        # 1. State Vector (Joints + Gripper)
+        obs_state, _ = self._state_vectors(timeline, default_gripper=0.04)
+        # 2. Action Vector (Next State; the last frame repeats its own)
+        actions = np.vstack([obs_state[1:], obs_state[-1:]])
+
+        # 3. Copy Frame Images
+        for i, img_path in enumerate(timeline.image_paths()):
             if img_path:
-                abs_src = self._resolve_abs_path(img_path)
-                if abs_src and os.path.exists(abs_src):
-                    # Save as frame_00000.jpg
-                    dst_filename = f"frame_{i:06d}.jpg"
-                    shutil.copy2(abs_src, os.path.join(frames_out_dir, dst_filename))
+                # Save as frame_00000.jpg (or .webp/.png, as stored)
+                self._copy_frame(img_path, frames_out_dir, f"frame_{i:06d}")
 
         # 4. Create HDF5
         h5_path = os.path.join(folder_path, "episode_0.hdf5")
@@ -121,7 +131,8 @@ class DataExporter:
         """
         Exports to RLDS/OpenX style structure (compatible with TFDS).
         """
-        if not timeline:
+        timeline = Timeline.coerce(timeline)
+        if not len(timeline):
             return {"status": "error", "message": "Timeline is empty"}
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -163,41 +174,17 @@ class DataExporter:
                 obs_grp = f.create_group("observations")
                 act_grp = f.create_group("actions")
                 
-                states = []
-                acts = []
-                
-                for i, frame in enumerate(timeline):
-                    curr = [0.0]*8
-                    if "robot_state" in frame and "qpos" in frame["robot_state"]:
-                        qpos = frame["robot_state"]["qpos"]
-                        grip = frame["robot_state"].get("gripper_width", 0.0)
-                        curr = qpos + [grip]
-                    states.append(curr)
-                        
-                    nxt = [0.0]*8
-                    if i < len(timeline)-1:
-                        next_f = timeline[i+1]
-                        if "robot_state" in next_f and "qpos" in next_f["robot_state"]:
-                            nxt = next_f["robot_state"]["qpos"] + [next_f["robot_state"].get("gripper_width", 0.0)]
-                        else:
-                            nxt = curr
-                    else:
-                        nxt = curr
-                    acts.append(nxt)
-
-                    # Copy Frames
-                    img_path = None
-                    if "observation" in frame:
-                        if isinstance(frame["observation"], dict):
-                            img_path = frame["observation"].get("image_path")
-                        elif isinstance(frame["observation"], str):
-                            img_path = frame["observation"]
-                    
+                states, has_qpos = self._state_vectors(timeline, default_gripper=0.0)
+                # Next frame's state when it has one, otherwise hold the current state
+                acts = states.copy()
+                step = has_qpos[1:]
+                acts[:-1][step] = states[1:][step]
+
+                # Copy Frames
+                for i, img_path in enumerate(timeline.image_paths()):
                     if img_path:
-                        abs_src = self._resolve_abs_path(img_path)
-                        if abs_src and os.path.exists(abs_src):
-                            # RLDS usually expects just the file, we name it sequentially
-                            shutil.copy2(abs_src, os.path.join(images_dir, f"{i}.jpg"))
+                        # RLDS usually expects just the file, we name it sequentially
+                        self._copy_frame(img_path, images_dir, str(i))
 
                 obs_grp.create_dataset("state", data=np.array(states, dtype=np.float32))
                 act_grp.create_dataset("joint_command", data=np.array(acts, dtype=np.float32))
@@ -229,7 +216,8 @@ class DataExporter:
         Exports only the frames from timeline as a ZIP file.
         For egocentric enrichment frame downloads.
         """
-        if not timeline:
+        timeline = Timeline.coerce(timeline)
+        if not len(timeline):
             return {"status": "error", "message": "Timeline is empty"}
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -243,20 +231,10 @@ class DataExporter:
 
         print(f"📦 Exporting {len(timeline)} frames...")
 
-        for i, frame in enumerate(timeline):
+        for i, img_path in enumerate(timeline.image_paths()):
             # Copy frame image
-            img_path = None
-            if "observation" in frame:
-                if isinstance(frame["observation"], dict):
-                    img_path = frame["observation"].get("image_path")
-                elif isinstance(frame["observation"], str):
-                    img_path = frame["observation"]
-
             if img_path:
-                abs_src = self._resolve_abs_path(img_path)
-                if abs_src and os.path.exists(abs_src):
-                    dst_filename = f"frame_{i:06d}.jpg"
-                    shutil.copy2(abs_src, os.path.join(frames_out_dir, dst_filename))
+                self._copy_frame(img_path, frames_out_dir, f"frame_{i:06d}")
 
         # Create metadata file
         metadata = {
@@ -290,7 +268,8 @@ class DataExporter:
         - Robot state data
         - Detected objects
         """
-        if not timeline:
+        timeline = Timeline.coerce(timeline)
+        if not len(timeline):
             return {"status": "error", "message": "Timeline is empty"}
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -309,11 +288,12 @@ class DataExporter:
 
         print(f"📦 Exporting Factory SKU with {len(timeline)} frames...")
 
-        # Prepare sensor data arrays
+        # Sensor data straight from the timeline columns (zeros where a frame has none)
+        n = len(timeline)
         imu_data = {
-            "timestamps": [],
-            "accelerometer": [],  # m/s²
-            "gyroscope": []  # rad/s
+            "timestamps": np.where(timeline.mask("timestamp"), timeline.column("timestamp"), np.arange(n) * 0.033).tolist(),
+            "accelerometer": self._vectors(timeline, "accel").tolist(),  # m/s²
+            "gyroscope": self._vectors(timeline, "gyro").tolist()  # rad/s
         }
 
         camera_positions = {
@@ -325,38 +305,23 @@ class DataExporter:
         robot_states = []
         detected_objects_timeline = []
 
-        for i, frame in enumerate(timeline):
+        for i, frame in enumerate(timeline.to_frames()):
             # 1. Copy multi-view camera frames
             observations = frame.get("observations", {})
 
             # Main camera
             if "main_camera" in observations:
-                main_path = self._resolve_abs_path(observations["main_camera"])
-                if main_path and os.path.exists(main_path):
-                    dst_filename = f"frame_{i:06d}.jpg"
-                    shutil.copy2(main_path, os.path.join(main_cam_dir, dst_filename))
+                self._copy_frame(observations["main_camera"], main_cam_dir, f"frame_{i:06d}")
 
             # Side camera (synthetic)
             if "side_camera" in observations:
-                side_path = self._resolve_abs_path(observations["side_camera"])
-                if side_path and os.path.exists(side_path):
-                    dst_filename = f"frame_{i:06d}.jpg"
-                    shutil.copy2(side_path, os.path.join(side_cam_dir, dst_filename))
+                self._copy_frame(observations["side_camera"], side_cam_dir, f"frame_{i:06d}")
 
             # Wrist camera (synthetic)
             if "wrist_camera" in observations:
-                wrist_path = self._resolve_abs_path(observations["wrist_camera"])
-                if wrist_path and os.path.exists(wrist_path):
-                    dst_filename = f"frame_{i:06d}.jpg"
-                    shutil.copy2(wrist_path, os.path.join(wrist_cam_dir, dst_filename))
-
-            # 2. Extract IMU sensor data
-            sensors = frame.get("sensors", {})
-            imu_data["timestamps"].append(frame.get("timestamp", i * 0.033))
-            imu_data["accelerometer"].append(sensors.get("accel", [0.0, 0.0, 0.0]))
-            imu_data["gyroscope"].append(sensors.get("gyro", [0.0, 0.0, 0.0]))
-
-            # 3. Camera positions (from state data if available)
+                self._copy_frame(observations["wrist_camera"], wrist_cam_dir, f"frame_{i:06d}")
+
+            # 2. Camera positions (from state data if available)
             state = frame.get("state", {})
             # Main camera is typically at the human/robot head position
             camera_positions["main"].append({
@@ -381,7 +346,7 @@ class DataExporter:
                 "note": "Eye-in-hand view following detected hand"
             })
 
-            # 4. Robot state
+            # 3. Robot state
             robot_state = frame.get("robot_state", {})
             robot_states.append({
                 "frame_idx": i,
@@ -390,7 +355,7 @@ class DataExporter:
                 "gripper_state": robot_state.get("gripper", 0)
             })
 
-            # 5. Detected objects
+            # 4. Detected objects
             detected_objects_timeline.append({
                 "frame_idx": i,
                 "objects": frame.get("detected_objects", [])
@@ -0,0 +1,215 @@
+"""Single-file frame store for a processing session.
+
+Instead of one loose image file per frame per view, a session directory holds
+  frames.bin  - encoded images appended back to back
+  frames.idx  - one "name<TAB>offset<TAB>length" line per image, appended after its bytes
+Names are the relative paths the loose files would have had ("frame_000004.jpg",
+"main/frame_000004.jpg"). Readers memory-map frames.bin, so serving or zipping
+a frame is a slice, not an open/stat/read per file.
+
+Frames are addressed by name or by index within a view: the view is the name's
+directory ("" for top level) and the index is the frame's position in name
+order, which is frame order. /frames/<session>/[<view>/]<index> serves them.
+"""
+
+import os
+import re
+import mmap
+import shutil
+import threading
+from collections import OrderedDict
+
+BLOB_NAME = "frames.bin"
+INDEX_NAME = "frames.idx"
+FRAMES_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "processed_frames")
+
+MEDIA_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".webp": "image/webp", ".png": "image/png"}
+
+_SESSION_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def has_store(directory):
+    return os.path.exists(os.path.join(directory, INDEX_NAME))
+
+
+def frame_url(session_id, view, index):
+    """Public URL of a stored frame."""
+    return f"/frames/{session_id}/{view}/{index}" if view else f"/frames/{session_id}/{index}"
+
+
+def _unshare(path):
+    """
+    Gives path its own inode if it is hard-linked elsewhere (a result-cache entry
+    restored by linking), so appends never reach the other copy.
+    """
+    try:
+        if os.stat(path).st_nlink <= 1: return
+    except FileNotFoundError:
+        return
+    tmp = path + ".cow"
+    shutil.copy2(path, tmp)
+    os.replace(tmp, path)
+
+
+class FrameStoreWriter:
+    """Append-only writer; safe to call from several encoder threads."""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        # Copy-on-write: existing files may be shared with a cache entry
+        for name in (BLOB_NAME, INDEX_NAME): _unshare(os.path.join(directory, name))
+        self._blob = open(os.path.join(directory, BLOB_NAME), "ab")
+        self._index = open(os.path.join(directory, INDEX_NAME), "a")
+        self._offset = self._blob.tell()
+        self._lock = threading.Lock()
+
+    def append(self, name, data):
+        """Stores data under name and returns its offset in frames.bin."""
+        if "\t" in name or "\n" in name: raise ValueError(f"Invalid frame name {name!r}")
+        with self._lock:
+            offset = self._offset
+            self._blob.write(data)
+            self._blob.flush()
+            # Index line only after the bytes are in the blob, so readers never see a dangling entry
+            self._index.write(f"{name}\t{offset}\t{len(data)}\n")
+            self._index.flush()
+            self._offset += len(data)
+        return offset
+
+    def close(self, fsync=True):
+        with self._lock:
+            for f in (self._blob, self._index):
+                if f.closed: continue
+                f.flush()
+                if fsync: os.fsync(f.fileno())
+                f.close()
+
+
+class FrameStore:
+    """Read-only, memory-mapped view of a session's frames.bin / frames.idx."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.entries = OrderedDict()
+        with open(os.path.join(directory, INDEX_NAME)) as f:
+            self.index_size = os.fstat(f.fileno()).st_size
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) != 3: continue  # torn final line of a store still being written
+                self.entries[parts[0]] = (int(parts[1]), int(parts[2]))
+
+        self._file = open(os.path.join(directory, BLOB_NAME), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._size = size
+
+        self.views = {}
+        for name in sorted(self.entries):
+            self.views.setdefault(os.path.dirname(name), []).append(name)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def names(self):
+        return list(self.entries)
+
+    def read(self, name):
+        """Encoded bytes of a frame, or None."""
+        entry = self.entries.get(name)
+        if entry is None or self._map is None: return None
+        offset, length = entry
+        if offset + length > self._size: return None
+        return self._map[offset:offset + length]
+
+    def name_at(self, index, view=""):
+        names = self.views.get(view, [])
+        return names[index] if 0 <= index < len(names) else None
+
+    def close(self):
+        if self._map is not None: self._map.close()
+        self._file.close()
+
+
+# Open readers, reopened when the index has grown (the session is still being written)
+_readers = OrderedDict()
+_readers_lock = threading.Lock()
+_MAX_READERS = 16
+
+
+def open_store(directory):
+    """Shared FrameStore for directory, or None if it has no store."""
+    idx_path = os.path.join(directory, INDEX_NAME)
+    try:
+        size = os.path.getsize(idx_path)
+    except OSError:
+        return None
+    with _readers_lock:
+        store = _readers.get(directory)
+        if store is not None and store.index_size == size:
+            _readers.move_to_end(directory)
+            return store
+        store = FrameStore(directory)
+        _readers[directory] = store
+        while len(_readers) > _MAX_READERS:
+            _readers.popitem(last=False)  # unreferenced maps are closed when collected
+        return store
+
+
+def lookup(session_id, key, root=FRAMES_ROOT):
+    """
+    (bytes, name) for /frames/<session_id>/<key>, where key is "[view/]index" or a
+    stored name. None if there is no such frame.
+    """
+    if not _SESSION_RE.match(session_id or ""): return None
+    store = open_store(os.path.join(root, session_id))
+    if store is None: return None
+
+    view, _, last = key.strip("/").rpartition("/")
+    name = store.name_at(int(last), view) if last.isdigit() else key.strip("/")
+    data = store.read(name) if name else None
+    return (data, name) if data is not None else None
+
+
+def media_type(name):
+    return MEDIA_TYPES.get(os.path.splitext(name)[1].lower(), "application/octet-stream")
+
+
+def find_frame(url, root=FRAMES_ROOT):
+    """(bytes, stored name) of a frame referenced by a timeline URL (/frames/... or a /static/processed_frames/... name kept in a store), or None."""
+    if not url: return None
+    for prefix in ("/frames/", "/static/processed_frames/"):
+        if url.startswith(prefix):
+            session_id, _, key = url[len(prefix):].partition("/")
+            found = lookup(session_id, key, root)
+            return (bytes(found[0]), found[1]) if found else None
+    return None
+
+
+def read_frame(url, root=FRAMES_ROOT):
+    """Bytes of a frame referenced by a timeline URL, or None."""
+    found = find_frame(url, root)
+    return found[0] if found else None
+
+
+def iter_frames(directory):
+    """(name, bytes) for every frame of a session: from its store, else from loose image files."""
+    if has_store(directory):
+        # Private reader: callers often delete the session right after zipping it
+        store = FrameStore(directory)
+        try:
+            for name in store.names():
+                data = store.read(name)
+                if data is not None: yield name, bytes(data)
+        finally:
+            store.close()
+        return
+    for dirpath, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if os.path.splitext(filename)[1].lower() not in MEDIA_TYPES: continue
+            path = os.path.join(dirpath, filename)
+            with open(path, "rb") as f:
+                yield os.path.relpath(path, directory).replace(os.sep, "/"), f.read()
@@ -0,0 +1,156 @@
+"""Asynchronous frame persistence.
+
+Sampled frames (and the factory's side / wrist views) are encoded and written
+on a small thread pool, so JPEG/WebP/PNG encoding overlaps with decode and
+inference instead of running inline. cv2.imencode releases the GIL, so the
+workers really run in parallel.
+
+Frames go either into the session's single-file frame store (see frame_store,
+the default) or to loose image files.
+
+close() waits for every pending write, fsyncs the files and their directories,
+and writes a manifest (frames_manifest.json) of everything written.
+
+Env: FIDELITY_FRAME_CODEC (jpeg|webp|png, default jpeg), FIDELITY_FRAME_QUALITY
+(codec default if unset), FIDELITY_FRAME_WRITERS (worker threads, default 4),
+FIDELITY_FRAME_STORAGE (store|files, default store).
+"""
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from .frame_store import FrameStoreWriter, frame_url
+
+# codec -> (extension, OpenCV quality flag)
+CODECS = {
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+    "png": (".png", cv2.IMWRITE_PNG_COMPRESSION),  # "quality" is the 0-9 compression level
+}
+
+DEFAULT_CODEC = os.getenv("FIDELITY_FRAME_CODEC", "jpeg").lower()
+DEFAULT_QUALITY = int(os.getenv("FIDELITY_FRAME_QUALITY")) if os.getenv("FIDELITY_FRAME_QUALITY") else None
+DEFAULT_WORKERS = int(os.getenv("FIDELITY_FRAME_WRITERS", "4"))
+DEFAULT_STORAGE = os.getenv("FIDELITY_FRAME_STORAGE", "store").lower()
+STORAGES = ("store", "files")
+
+MANIFEST_NAME = "frames_manifest.json"
+
+
+class FrameWriter:
+    def __init__(self, root, codec=DEFAULT_CODEC, quality=DEFAULT_QUALITY, workers=DEFAULT_WORKERS, fsync=True, max_pending=None, storage=DEFAULT_STORAGE):
+        codec = (codec or "jpeg").lower()
+        if codec not in CODECS:
+            raise ValueError(f"Unknown frame codec '{codec}' (use one of {tuple(CODECS)})")
+        if storage not in STORAGES:
+            raise ValueError(f"Unknown frame storage '{storage}' (use one of {STORAGES})")
+        self.root = root
+        self.codec = codec
+        self.quality = quality
+        self.ext, flag = CODECS[codec]
+        self.params = [flag, int(quality)] if quality is not None else []
+        self.fsync = fsync
+        self.storage = storage
+        self._store = FrameStoreWriter(root) if storage == "store" else None
+
+        workers = max(1, int(workers))
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="frame-writer")
+        # Bounds the frames held in memory while waiting for a worker
+        self._slots = threading.BoundedSemaphore(max_pending or workers * 4)
+        self._lock = threading.Lock()
+        self._futures = []
+        self._closed = False
+
+        self.manifest = []
+        self.bytes_written = 0
+        self.encode_seconds = 0.0
+
+    def filename(self, stem):
+        return stem + self.ext
+
+    def url(self, session_id, rel_path, index):
+        """Public URL of a frame: rel_path is its "[view/]name", index its position within the view."""
+        if self._store is not None:
+            return frame_url(session_id, os.path.dirname(rel_path), index)
+        return f"/static/processed_frames/{session_id}/{rel_path}"
+
+    def write(self, rel_path, image):
+        """Queues image for root/rel_path ("/"-separated); blocks only when too many writes are pending."""
+        if self._closed: raise RuntimeError("FrameWriter is closed")
+        self._slots.acquire()
+        try:
+            future = self._pool.submit(self._write, rel_path, image)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock: self._futures.append(future)
+        return rel_path
+
+    def _write(self, rel_path, image):
+        try:
+            t0 = time.perf_counter()
+            ok, buf = cv2.imencode(self.ext, image, self.params)
+            if not ok: raise IOError(f"Could not encode {rel_path} as {self.codec}")
+            entry = {"path": rel_path, "bytes": len(buf)}
+            if self._store is not None:
+                entry["offset"] = self._store.append(rel_path, buf.tobytes())
+            else:
+                with open(os.path.join(self.root, rel_path), "wb") as f:
+                    f.write(buf.tobytes())
+                    if self.fsync: os.fsync(f.fileno())
+            with self._lock:
+                self.encode_seconds += time.perf_counter() - t0
+                self.bytes_written += len(buf)
+                self.manifest.append(entry)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Waits for pending writes (re-raising the first failure), syncs directories and writes the manifest."""
+        if self._closed: return
+        self._closed = True
+        try:
+            for future in self._futures: future.result()
+        finally:
+            self._pool.shutdown(wait=True)
+            if self._store is not None: self._store.close(fsync=self.fsync)
+
+        self.manifest.sort(key=lambda e: e["path"])
+        with open(os.path.join(self.root, MANIFEST_NAME), "w") as f:
+            json.dump({"codec": self.codec, "quality": self.quality, "storage": self.storage, "frames": self.manifest}, f)
+        if self.fsync:
+            for d in sorted({os.path.dirname(os.path.join(self.root, e["path"])) for e in self.manifest} | {self.root}):
+                self._fsync_dir(d)
+
+    def _fsync_dir(self, path):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return  # e.g. directories cannot be opened on Windows
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self):
+        return {
+            "storage": self.storage,
+            "codec": self.codec,
+            "quality": self.quality,
+            "frames": len(self.manifest),
+            "mb_written": round(self.bytes_written / 1e6, 2),
+            "encode_seconds": round(self.encode_seconds, 3),
+        }
@@ -0,0 +1,61 @@
+"""Vectorized gap filling for per-frame tracks (hand joints, poses...)."""
+
+import numpy as np
+
+
+def fill_gaps(points, valid, contacts=None, extrapolate="hold"):
+    """
+    Linearly interpolates the rows of `points` where `valid` is False.
+
+    points:      (N, ...) float array; the content of invalid rows is ignored.
+    valid:       (N,) bool mask of rows that carry real data.
+    contacts:    optional (N,) contact states; each filled row takes the state of
+                 the last valid row before it (the first valid row for a leading gap).
+    extrapolate: "hold" repeats the nearest valid row into leading/trailing gaps,
+                 "none" leaves them unfilled.
+
+    Returns (points, filled_mask, contacts), where filled_mask marks the rows that
+    were written. Interior values equal p1 + (p2 - p1) * t, t = (i - i1) / (i2 - i1).
+    """
+    valid = np.asarray(valid, dtype=bool)
+    n = len(valid)
+    out_contacts = None if contacts is None else list(contacts)
+    filled = np.zeros(n, dtype=bool)
+    if not valid.any(): return np.array(points, dtype=float), filled, out_contacts
+
+    shape = np.shape(points)
+    pts = np.asarray(points, dtype=float).reshape(n, -1)
+    out = pts.copy()
+
+    idx = np.arange(n)
+    prev = np.maximum.accumulate(np.where(valid, idx, -1))
+    nxt = np.minimum.accumulate(np.where(valid, idx, n)[::-1])[::-1]
+
+    interior = ~valid & (prev >= 0) & (nxt < n)
+    p, q = prev[interior], nxt[interior]
+    t = (idx[interior] - p) / (q - p)
+    out[interior] = pts[p] + (pts[q] - pts[p]) * t[:, None]
+    filled |= interior
+
+    if extrapolate == "hold":
+        leading = ~valid & (prev < 0)
+        trailing = ~valid & (nxt >= n)
+        out[leading] = pts[nxt[leading]]
+        out[trailing] = pts[prev[trailing]]
+        filled |= leading | trailing
+
+    if out_contacts is not None:
+        source = np.where(prev >= 0, prev, nxt)
+        for i in np.flatnonzero(filled): out_contacts[i] = contacts[source[i]]
+
+    return out.reshape(shape), filled, out_contacts
+
+
+def track_to_array(values):
+    """Per-frame vectors (None / empty = missing) -> ((N, ...) array, valid mask)."""
+    valid = np.array([bool(v) for v in values], dtype=bool)
+    present = [v for v in values if v]
+    row_shape = np.shape(present[0]) if present else (0,)
+    arr = np.zeros((len(values),) + row_shape)
+    if present: arr[valid] = np.asarray(present, dtype=float)
+    return arr, valid
@@ -0,0 +1,225 @@
+"""Registry of enrichment jobs.
+
+Every /enrich/process call becomes a Job with its own id, state, progress,
+timings and result, run on a bounded worker pool; calls beyond the
+concurrency limit wait in the pool's queue. Cancellation is cooperative: the
+pipelines check it once per frame and stop with JobCancelled.
+
+Every update is also published to the progress broker as "job:<id>" (see
+progress.py), which streams it to /enrich/jobs/<id>/events subscribers.
+
+Env: FIDELITY_MAX_JOBS (concurrent jobs, default 2), FIDELITY_JOB_HISTORY
+(finished jobs kept with their results, default 50).
+"""
+
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .progress import progress as progress_broker
+
+MAX_CONCURRENT_JOBS = int(os.getenv("FIDELITY_MAX_JOBS", "2"))
+JOB_HISTORY = int(os.getenv("FIDELITY_JOB_HISTORY", "50"))
+
+ACTIVE_STATES = ("queued", "running")
+FINAL_STATES = ("completed", "error", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind, params=None, listener=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params or {}
+        self.state = "queued"
+        self.progress = 0
+        self.stage = None         # phase reported by the pipeline: sampling | frames | validation
+        self.frames = 0
+        self.total_frames = None
+        self.stage_stats = None
+        self.quality = None       # live QA snapshot from the grounding loop (validation/online.py)
+        self.result = None
+        self.summary = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.listener = listener  # called with the job after every update
+        self._frames_started = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    # --- called from the worker ---
+
+    def update(self, **fields):
+        """Progress / stage_stats from the running pipeline."""
+        with self._lock:
+            for key, value in fields.items(): setattr(self, key, value)
+            if "frames" in fields and self._frames_started is None: self._frames_started = time.time()
+        if self.listener is not None: self.listener(self)
+
+    def check_cancelled(self):
+        if self._cancel.is_set(): raise JobCancelled(f"Job {self.id} cancelled")
+
+    # --- called from the API ---
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def request_cancel(self):
+        """Sets the cancel flag; a job that has not started yet is cancelled on the spot (returns True then)."""
+        with self._lock:
+            self._cancel.set()
+            if self.state != "queued": return False
+            self.state = "cancelled"
+            self.finished_at = time.time()
+        if self.listener is not None: self.listener(self)
+        return True
+
+    def start(self):
+        """queued -> running; False if the job was cancelled first."""
+        with self._lock:
+            if self.state != "queued": return False
+            self.state = "running"
+            self.started_at = time.time()
+        if self.listener is not None: self.listener(self)
+        return True
+
+    def to_dict(self, include_result=False):
+        with self._lock:
+            now = time.time()
+            started = self.started_at
+            info = {
+                "job_id": self.id,
+                "kind": self.kind,
+                "state": self.state,
+                "progress": self.progress,
+                "stage": self.stage,
+                "frames": self.frames,
+                "total_frames": self.total_frames,
+                "params": self.params,
+                "created_at": self.created_at,
+                "started_at": started,
+                "finished_at": self.finished_at,
+                "queue_seconds": round((started or now) - self.created_at, 3),
+                "run_seconds": round((self.finished_at or now) - started, 3) if started else 0.0,
+                "summary": self.summary,
+                "error": self.error,
+                "cancel_requested": self._cancel.is_set(),
+                "stage_stats": self.stage_stats,
+                "quality": self.quality,
+                "has_result": self.result is not None,
+            }
+            if include_result: info["result"] = self.result
+            return info
+
+    def progress_event(self):
+        """Compact progress: frames, phase, per-stage throughput and ETA."""
+        with self._lock:
+            stats = self.stage_stats or {}
+            event = {
+                "job_id": self.id,
+                "state": self.state,
+                "progress": self.progress,
+                "stage": self.stage,
+                "frames": self.frames,
+                "total_frames": self.total_frames,
+                "fps": {name: s.get("wall_fps", 0.0) for name, s in stats.items()},
+                "bottleneck": max(stats, key=lambda name: stats[name].get("utilization", 0.0)) if stats else None,
+                "eta_seconds": None,
+                "quality": self.quality,
+                "error": self.error,
+            }
+            if self.state == "running" and self._frames_started and self.frames and self.total_frames:
+                rate = self.frames / max(time.time() - self._frames_started, 1e-6)
+                event["eta_seconds"] = round(max(0, self.total_frames - self.frames) / rate, 1)
+            elif self.state in FINAL_STATES:
+                event["eta_seconds"] = 0.0
+            return event
+
+    def legacy_status(self):
+        """The single-job /enrich/status shape (state: processing | completed | error | cancelled)."""
+        info = self.to_dict(include_result=True)
+        info["state"] = "processing" if self.state in ACTIVE_STATES else self.state
+        return info
+
+
+class JobRegistry:
+    def __init__(self, max_workers=MAX_CONCURRENT_JOBS, history=JOB_HISTORY):
+        self.max_workers = max(1, int(max_workers))
+        self.history = max(1, int(history))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="enrich-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, params=None):
+        """Queues fn(job) -> result and returns the Job right away."""
+        job = Job(kind, params, listener=self._publish)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._publish(job)
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def _publish(self, job):
+        progress_broker.publish(f"job:{job.id}", job.progress_event(), final=job.state in FINAL_STATES and job.finished_at is not None)
+
+    def _run(self, job, fn):
+        # A job cancelled while queued already reported its terminal state
+        if not job.start(): return
+        print(f"🧵 Job {job.id} ({job.kind}) started")
+        try:
+            result = fn(job)
+            summary = result.get("summary_stats") if isinstance(result, dict) else None
+            job.update(state="completed", progress=100, result=result, summary=summary)
+        except JobCancelled:
+            job.update(state="cancelled")
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            job.update(state="error", error=str(e))
+        finally:
+            job.update(finished_at=time.time())
+        print(f"🧵 Job {job.id} {job.state} in {job.finished_at - job.started_at:.1f}s")
+
+    def _prune(self):
+        """Drops the oldest finished jobs (and their results) beyond the history limit."""
+        finished = [jid for jid, j in self._jobs.items() if j.state not in ACTIVE_STATES]
+        for jid in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[jid]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, state=None, kind=None):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [j for j in reversed(jobs) if (state is None or j.state == state) and (kind is None or j.kind == kind)]
+
+    def latest(self, kind=None):
+        jobs = self.list(kind=kind)
+        return jobs[0] if jobs else None
+
+    def cancel(self, job_id):
+        """Requests cancellation; queued jobs are cancelled right away, running ones stop at their next frame."""
+        job = self.get(job_id)
+        if job is None: return None
+        if job.state in ACTIVE_STATES: job.request_cancel()
+        return job
+
+    def stats(self):
+        jobs = self.list()
+        counts = {}
+        for j in jobs: counts[j.state] = counts.get(j.state, 0) + 1
+        return {"max_concurrent": self.max_workers, "history": self.history, "jobs": len(jobs), "by_state": counts}
+
+
+jobs = JobRegistry()
@@ -1,24 +1,29 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Form, BackgroundTasks, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse 
+from .startup import startup_timer
+
+with startup_timer.measure("fastapi"):
+    from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Form, HTTPException
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.staticfiles import StaticFiles
+    from fastapi.responses import FileResponse, Response, StreamingResponse
+    from fastapi.concurrency import run_in_threadpool
 import json
 import asyncio
+import numpy as np
 import os
 import shutil
 
 # --- INTERNAL MODULES ---
-from .sim import SimManager
-from .logger import DataLogger
-from .vision import VisionPipeline
-from .augment import AugmentationEngine
-from .enrichment import EnrichmentPipeline
-from .youtube_search import run_youtube_ai_search
-from .exocentric import ExocentricExtractor
-from .validation.auditor import DataAuditor
-from .retargeting import KinematicSolver
-from .exporters import DataExporter
-from .batch_processor import create_batch_job, get_batch_status, cancel_batch_job 
+# Heavy modules (sim, vision, enrichment, exocentric...) are imported by the
+# service factories in services.py on first use, not here.
+with startup_timer.measure("app.services"):
+    from . import services
+with startup_timer.measure("app.timeline"):
+    from .timeline import Timeline
+with startup_timer.measure("app.batch_processor"):
+    from .batch_processor import create_batch_job, get_batch_status, cancel_batch_job 
+with startup_timer.measure("app.jobs"):
+    from .jobs import jobs
+    from .progress import progress
 
 app = FastAPI()
 
@@ -35,25 +40,25 @@ os.makedirs(DATA_DIR, exist_ok=True)
 
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
-# --- INITIALIZE SERVICES ---
-try:
-    sim = SimManager()
-except Exception as exc:
-    sim = None
-    print(f"Sim Warning: {exc}")
-
-logger = DataLogger()
-vision = VisionPipeline()
-augmenter = AugmentationEngine()
-enricher = EnrichmentPipeline()
-exo_extractor = ExocentricExtractor()
-exporter = DataExporter()
-
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
 @app.on_event("startup")
-def startup():
-    if sim: sim.load_env()
+async def startup():
+    # Don't block accepting connections on PyBullet / model loading
+    startup_timer.mark_ready()
+    asyncio.get_running_loop().run_in_executor(None, services.warm_up)
+
+async def _service(lazy):
+    """A LazyService's instance; a first-use build (PyBullet, models) runs in the threadpool, not on the event loop."""
+    if lazy.instance is not None: return lazy.instance
+    return await run_in_threadpool(lazy.get)
+
+# --- HEALTH ---
+@app.get("/health/ready")
+async def health_ready(): return services.readiness()
+
+@app.get("/health/startup")
+async def health_startup(): return startup_timer.report()
 
 def _resolve_video_path(payload):
     video_rel_path = payload.get("video_path", "")
@@ -66,7 +71,7 @@ def _resolve_video_path(payload):
 @app.post("/export/lerobot")
 async def export_lerobot(payload: dict):
     try:
-        result = exporter.to_lerobot(
+        result = (await _service(services.exporter)).to_lerobot(
             payload.get('timeline'), 
             payload.get('name'), 
             source_video_path=_resolve_video_path(payload)
@@ -84,7 +89,7 @@ async def export_lerobot(payload: dict):
 @app.post("/export/rlds")
 async def export_rlds(payload: dict):
     try:
-        result = exporter.to_rlds(
+        result = (await _service(services.exporter)).to_rlds(
             payload.get('timeline'),
             payload.get('name'),
             source_video_path=_resolve_video_path(payload)
@@ -106,7 +111,7 @@ async def export_frames(payload: dict):
     For egocentric enrichment downloads.
     """
     try:
-        result = exporter.export_frames_only(
+        result = (await _service(services.exporter)).export_frames_only(
             payload.get('timeline'),
             payload.get('name', 'enrichment_frames')
         )
@@ -127,7 +132,7 @@ async def export_factory_sku(payload: dict):
     Includes: main/side/wrist camera views, IMU sensor data, robot states, detected objects.
     """
     try:
-        result = exporter.export_factory_sku(
+        result = (await _service(services.exporter)).export_factory_sku(
             payload.get('timeline'),
             payload.get('name', 'factory_sku'),
             source_video_path=_resolve_video_path(payload)
@@ -146,26 +151,27 @@ async def export_factory_sku(payload: dict):
 @app.post("/process/retarget")
 async def process_retarget(payload: dict):
     try:
+        from .retargeting import KinematicSolver
         solver = KinematicSolver()
         config = payload.get('config', {})
-        joint_data = solver.solve_sequence(payload.get('timeline', []), config)
+        timeline = Timeline.from_frames(payload.get('timeline', []))
+        joint_data = solver.solve_sequence(timeline, config)
         
-        updated_timeline = payload.get('timeline', [])
-        for i, joints in enumerate(joint_data):
-            if joints:
-                if "robot_state" not in updated_timeline[i]: updated_timeline[i]["robot_state"] = {}
-                updated_timeline[i]["robot_state"]["qpos"] = joints
-                if "gripper_width" not in updated_timeline[i]["robot_state"]:
-                    updated_timeline[i]["robot_state"]["gripper_width"] = 0.04
+        solved = np.array([bool(joints) for joints in joint_data], dtype=bool)
+        if solved.any():
+            timeline.set_column("qpos", np.array(joint_data, dtype=float), solved, rows=solved)
+            has_grip = timeline.mask("gripper_width")
+            new_grip = solved & ~has_grip
+            timeline.set_column("gripper_width", np.where(new_grip, 0.04, timeline.column("gripper_width")), has_grip | solved, rows=new_grip)
         
-        return {"status": "ok", "timeline": updated_timeline}
+        return {"status": "ok", "timeline": timeline.to_frames()}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 # --- ENRICHMENT ENDPOINTS ---
 @app.post("/enrich/ingest")
 async def enrich_ingest(payload: dict):
-    path = enricher.ingest(payload.get('type'), payload.get('url'), payload.get('token'))
+    path = (await _service(services.enricher)).ingest(payload.get('type'), payload.get('url'), payload.get('token'))
     if path: return {"status": "ok", "path": path}
     return {"status": "error", "message": "Download failed"}
 
@@ -205,22 +211,104 @@ async def enrich_upload_dual(
         return {"status": "error", "message": str(e)}
 
 @app.post("/enrich/process")
-async def enrich_process(payload: dict, background_tasks: BackgroundTasks):
-    background_tasks.add_task(enricher.process_request, payload)
-    return {"status": "started"}
+async def enrich_process(payload: dict):
+    """Queues an enrichment job; runs once one of the FIDELITY_MAX_JOBS workers is free."""
+    params = {k: payload.get(k) for k in ("task_type", "path", "mode", "sampling") if payload.get(k) is not None}
+    job = jobs.submit("enrich", lambda job: services.enricher.get().run_job(payload, job), params)
+    return {"status": "started", "job_id": job.id}
 
 @app.get("/enrich/status")
-async def enrich_status(): return enricher.get_status()
+async def enrich_status():
+    """Status of the most recent job (see /enrich/jobs for all of them)."""
+    job = jobs.latest("enrich")
+    if job is None: return {"state": "idle", "progress": 0, "result": None, "summary": None, "error": None}
+    return job.legacy_status()
 
 @app.get("/enrich/result")
 async def enrich_result():
-    result = enricher.get_result()
+    job = jobs.latest("enrich")
+    result = job.result if job else None
     if not result: return {"status": "error", "message": "Result not ready"}
     return {"status": "ok", "result": result}
 
+@app.post("/enrich/rederive")
+def enrich_rederive(payload: dict):
+    """
+    Re-derives a grounding session's timeline from its per-frame artifact with new
+    parameters (mode, sensor_path, sensor_config, config); no decode or inference.
+    """
+    session_id = payload.get('session_id')
+    if not session_id: raise HTTPException(status_code=400, detail="No session_id provided")
+    try:
+        result = services.enricher.get().rederive(
+            session_id,
+            mode=payload.get('mode', 'monocular'),
+            sensor_path=payload.get('sensor_path'),
+            sensor_config=payload.get('sensor_config'),
+            validation=payload.get('config')
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"status": "ok", "result": result}
+
+@app.get("/enrich/jobs")
+async def list_jobs(state: str = None):
+    """All known jobs, newest first, without their results."""
+    return {"jobs": [j.to_dict() for j in jobs.list(state=state)], "stats": jobs.stats()}
+
+@app.get("/enrich/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None: raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/enrich/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = jobs.get(job_id)
+    if job is None: raise HTTPException(status_code=404, detail="Job not found")
+    if job.result is None: return {"status": "error", "message": f"Result not ready (job {job.state})"}
+    return {"status": "ok", "result": job.result}
+
+@app.post("/enrich/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Queued jobs never start; running ones stop at their next frame."""
+    job = jobs.cancel(job_id)
+    if job is None: raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/enrich/events")
+async def stream_all_job_events():
+    """SSE: compact progress deltas for every enrichment job (snapshot of each known job first)."""
+    return _event_stream(progress.subscribe(prefix="job:"))
+
+@app.get("/enrich/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """SSE: frames, stage, per-stage fps and ETA of one job; ends once the job has finished."""
+    if jobs.get(job_id) is None: raise HTTPException(status_code=404, detail="Job not found")
+    return _event_stream(progress.subscribe(topic=f"job:{job_id}"))
+
+def _event_stream(subscription):
+    return StreamingResponse(subscription.stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/frames/{session_id}/{key:path}")
+def get_frame(session_id: str, key: str):
+    """One frame of a session's frame store: /frames/<session>/[<view>/]<index> (or the stored name)."""
+    from .frame_store import lookup, media_type
+    found = lookup(session_id, key)
+    if found is None: raise HTTPException(status_code=404, detail="Frame not found")
+    data, name = found
+    return Response(content=data, media_type=media_type(name), headers={"Cache-Control": "public, max-age=86400"})
+
+@app.get("/cache/stats")
+async def cache_stats():
+    from .result_cache import result_cache
+    return result_cache.stats()
+
 # --- OTHER ENDPOINTS ---
 @app.post("/validate/audit")
 async def validate_audit(payload: dict):
+    from .validation.auditor import DataAuditor
     auditor = DataAuditor()
     return auditor.audit(payload.get('timeline', []), payload.get('intent', ''))
 
@@ -228,6 +316,7 @@ async def validate_audit(payload: dict):
 async def search_youtube(payload: dict):
     query = (payload.get("query") or "").strip()
     filters = payload.get("filters", {})
+    from .youtube_search import run_youtube_ai_search
     return run_youtube_ai_search(
         query=query,
         page=payload.get("page", 1),
@@ -250,7 +339,13 @@ async def start_batch_ingestion(payload: dict):
     if task_type not in ["grounding", "factory", "exocentric"]:
         raise HTTPException(status_code=400, detail="Invalid task type")
 
-    job_id = create_batch_job(videos, task_type)
+    # Grounding depth tier for the whole batch: "quality" | "balanced" | "fast" (default FIDELITY_BATCH_DEPTH_TIER)
+    from .depth import DEPTH_TIERS
+    depth_tier = payload.get("depthTier")
+    if depth_tier and depth_tier not in DEPTH_TIERS:
+        raise HTTPException(status_code=400, detail="Invalid depth tier")
+
+    job_id = create_batch_job(videos, task_type, depth_tier)
     return {"job_id": job_id, "status": "started"}
 
 @app.get("/enrich/batch/{job_id}/status")
@@ -261,6 +356,12 @@ async def get_batch_job_status(job_id: str):
         raise HTTPException(status_code=404, detail=status["error"])
     return status
 
+@app.get("/enrich/batch/{job_id}/events")
+async def stream_batch_events(job_id: str):
+    """SSE: batch status plus per-video deltas (status, frames, ETA); ends once the batch is done."""
+    if "error" in get_batch_status(job_id): raise HTTPException(status_code=404, detail="Job not found")
+    return _event_stream(progress.subscribe(topic=f"batch:{job_id}"))
+
 @app.get("/enrich/batch/{job_id}/download")
 async def download_batch_zip(job_id: str):
     """Download all batch videos as ZIP - Mac compatible."""
@@ -341,12 +442,12 @@ async def process_exocentric(payload: dict):
     if rel_path.startswith("http"): rel_path = "static/current_video.mp4" 
     abs_path = os.path.join(BASE_DIR, rel_path.strip("/"))
     if not os.path.exists(abs_path): return {"status": "error", "message": f"File not found: {abs_path}"}
-    try: return exo_extractor.process_video(abs_path)
+    try: return (await _service(services.exo_extractor)).process_video(abs_path)
     except Exception as e: return {"status": "error", "message": str(e)}
 
 @app.post("/robot/spawn")
 async def spawn_robot(payload: dict):
-    _require_sim()
+    sim = await _require_sim()
     pos = payload.get("pos", [0, 0, 0])
     physics_pos = [pos[0], -pos[2], pos[1]] 
     sim.spawn_robot_at(physics_pos)
@@ -354,8 +455,8 @@ async def spawn_robot(payload: dict):
 
 @app.post("/vision/segment")
 async def segment_click(payload: dict):
-    _require_sim()
-    data = vision.segment_object(payload['x'], payload['y'], payload['type'])
+    sim = await _require_sim()
+    data = (await _service(services.vision)).segment_object(payload['x'], payload['y'], payload['type'])
     if data:
         if data.get('texture_update'): sim.load_static_scene("scene_background.obj")
         z = payload.get('z_offset', 0.0)
@@ -370,41 +471,43 @@ async def segment_click(payload: dict):
 
 @app.post("/env/load")
 async def load_environment(payload: dict):
-    _require_sim()
+    sim = await _require_sim()
     sim.load_prebuilt_env(payload.get("type", "default"))
     return {"status": "ok"}
 
 @app.post("/reset")
 async def reset_env(payload: dict):
-    _require_sim()
+    sim = await _require_sim()
     if payload.get("randomize"): sim.randomize_domain()
     else: sim.load_env()
     return {"status": "ok"}
 
 @app.post("/record/start")
 async def start_record(payload: dict):
+    logger = await _service(services.logger)
     logger.start(payload.get("task_name", "task"))
     return {"status": "recording_started", "file": logger.file_path}
 
 @app.post("/record/stop")
 async def stop_record(payload: dict):
-    path = logger.stop(payload.get("success", False))
+    path = (await _service(services.logger)).stop(payload.get("success", False))
     return {"status": "stopped", "path": path}
 
 @app.get("/dataset/latest")
 async def get_latest_dataset():
-    path = augmenter.get_latest_file()
+    path = (await _service(services.augmenter)).get_latest_file()
     return {"filename": os.path.basename(path) if path else "No Data"}
 
 @app.post("/dataset/augment")
 async def augment_dataset(payload: dict):
+    augmenter = await _service(services.augmenter)
     filename = augmenter.get_latest_file()
     if not filename: return {"status": "error"}
     return augmenter.augment_file(filename, payload.get('types', []))
 
 @app.post("/ingest/youtube")
 async def ingest_yt(payload: dict):
-    path = vision.download_youtube(payload['url'])
+    path = (await _service(services.vision)).download_youtube(payload['url'])
     return {"video_path": path}
 
 @app.post("/ingest/upload")
@@ -415,21 +518,26 @@ async def upload_video(file: UploadFile = File(...)):
 
 @app.post("/scene/freeze")
 async def freeze_scene(payload: dict):
-    _require_sim()
-    if vision.capture_frame(payload['time']):
+    sim = await _require_sim()
+    if (await _service(services.vision)).capture_frame(payload['time']):
         sim.load_static_scene("scene_background.obj")
         return {"status": "ok"}
     return {"status": "error"}
 
-def _require_sim():
-    if not sim:
-        raise HTTPException(status_code=503, detail=f"Simulation unavailable: {SIM_ERROR or 'unknown error'}")
+async def _require_sim():
+    try:
+        return await _service(services.sim)
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"Simulation unavailable: {exc or 'unknown error'}")
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    if not sim:
-        await websocket.send_json({"error": f"Simulation unavailable: {SIM_ERROR or 'unknown error'}"})
+    try:
+        sim = await _service(services.sim)
+        logger = await _service(services.logger)
+    except Exception as exc:
+        await websocket.send_json({"error": f"Simulation unavailable: {exc or 'unknown error'}"})
         await websocket.close()
         return
     try:
@@ -0,0 +1,229 @@
+"""Process-wide model registry.
+
+YOLO-World, Depth-Anything and the YOLOv8 / SAM / LaMa weights are loaded at
+most once per process, on first use, and shared by every pipeline that asks
+for them. Consumers hold a reference while they use a model; models nobody
+references stay resident as a cache until the memory budget forces them out
+(least recently used first).
+
+A failed load is retried on the next acquire once FIDELITY_MODEL_RETRY_SECONDS
+have passed (default 30); before that, acquire fails fast with the stored error.
+
+Budget: FIDELITY_MODEL_BUDGET_MB (0 or unset = unlimited).
+"""
+
+import os
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+
+MODEL_BUDGET_MB = float(os.getenv("FIDELITY_MODEL_BUDGET_MB", "0"))
+MODEL_RETRY_SECONDS = float(os.getenv("FIDELITY_MODEL_RETRY_SECONDS", "30"))
+
+_device = None
+
+
+def select_device():
+    """Hugging Face style device id: 0 for CUDA, "mps" on Apple, -1 for CPU."""
+    global _device
+    if _device is None:
+        import torch
+        _device = -1
+        if torch.cuda.is_available(): _device = 0
+        elif torch.backends.mps.is_available(): _device = "mps"
+        print(f"🚀 Model Hardware: {'GPU/MPS' if _device != -1 else 'CPU'}")
+    return _device
+
+
+def _allow_model_downloads():
+    # Fix SSL certificate verification for model downloads (macOS issue)
+    try:
+        ssl._create_default_https_context = ssl._create_unverified_context
+    except Exception:
+        pass
+
+
+def _measure_mb(model):
+    """Parameter memory of a torch-backed model, or None if it can't be measured."""
+    for inner in (getattr(model, "model", None), model):
+        params = getattr(inner, "parameters", None)
+        if callable(params):
+            try:
+                return sum(p.numel() * p.element_size() for p in params()) / (1024 * 1024)
+            except Exception:
+                continue
+    return None
+
+
+class ModelEntry:
+    def __init__(self, name, loader, est_mb, version=None):
+        self.name = name
+        self.loader = loader
+        self.est_mb = est_mb
+        self.version = version or name
+        self.model = None
+        self.size_mb = 0.0
+        self.refs = 0
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.last_used = 0.0
+        self.error = None
+        self.failed_at = 0.0
+        self.lock = threading.Lock()
+
+    def status(self):
+        return {
+            "version": self.version,
+            "loaded": self.model is not None,
+            "refs": self.refs,
+            "size_mb": round(self.size_mb or self.est_mb, 1),
+            "loads": self.loads,
+            "load_seconds": round(self.load_seconds, 2),
+            "error": self.error,
+        }
+
+
+class ModelRegistry:
+    def __init__(self, budget_mb=MODEL_BUDGET_MB, retry_seconds=MODEL_RETRY_SECONDS):
+        self.budget_mb = budget_mb
+        self.retry_seconds = retry_seconds
+        self._entries = {}
+        self._lock = threading.RLock()
+
+    def register(self, name, loader, est_mb=100.0, version=None):
+        with self._lock:
+            self._entries[name] = ModelEntry(name, loader, est_mb, version)
+
+    def acquire(self, name):
+        """Returns the shared model, loading it on first use. Pair with release()."""
+        entry = self._entry(name)
+        with entry.lock:
+            if entry.model is None:
+                self._load(entry)
+            with self._lock:
+                entry.refs += 1
+                entry.last_used = time.monotonic()
+            return entry.model
+
+    def release(self, name):
+        entry = self._entry(name)
+        with self._lock:
+            entry.refs = max(0, entry.refs - 1)
+            entry.last_used = time.monotonic()
+
+    @contextmanager
+    def lease(self, name):
+        """Holds a reference for the duration of a with-block."""
+        model = self.acquire(name)
+        try:
+            yield model
+        finally:
+            self.release(name)
+
+    def version(self, name):
+        """Weights identifier, used to invalidate cached results when a model changes."""
+        return self._entry(name).version
+
+    def is_loaded(self, name):
+        entry = self._entries.get(name)
+        return entry is not None and entry.model is not None
+
+    def resident_mb(self):
+        with self._lock:
+            return sum(e.size_mb for e in self._entries.values() if e.model is not None)
+
+    def status(self):
+        with self._lock:
+            return {
+                "budget_mb": self.budget_mb or None,
+                "resident_mb": round(self.resident_mb(), 1),
+                "models": {name: e.status() for name, e in self._entries.items()},
+            }
+
+    def _entry(self, name):
+        entry = self._entries.get(name)
+        if entry is None: raise KeyError(f"Unknown model '{name}'")
+        return entry
+
+    def _load(self, entry):
+        if entry.error:
+            # Don't retry a failed download/load on every request, but don't give up on it either
+            if time.monotonic() - entry.failed_at < self.retry_seconds:
+                raise RuntimeError(f"Model '{entry.name}' unavailable: {entry.error}")
+            print(f"🔁 Retrying model '{entry.name}' (last error: {entry.error})")
+
+        self._make_room(entry.est_mb)
+        _allow_model_downloads()
+        t0 = time.perf_counter()
+        try:
+            model = entry.loader()
+        except Exception as e:
+            entry.error = str(e)
+            entry.failed_at = time.monotonic()
+            raise
+        entry.error = None
+        entry.load_seconds += time.perf_counter() - t0
+        entry.loads += 1
+        entry.size_mb = _measure_mb(model) or entry.est_mb
+        entry.model = model
+        print(f"📦 Model '{entry.name}' loaded in {entry.load_seconds:.1f}s (~{entry.size_mb:.0f} MB)")
+
+    def _make_room(self, needed_mb):
+        if not self.budget_mb: return
+        with self._lock:
+            idle = sorted(
+                (e for e in self._entries.values() if e.model is not None and e.refs == 0),
+                key=lambda e: e.last_used
+            )
+            while idle and self.resident_mb() + needed_mb > self.budget_mb:
+                victim = idle.pop(0)
+                print(f"♻️ Evicting model '{victim.name}' ({victim.size_mb:.0f} MB) to stay under budget")
+                victim.model = None
+                victim.size_mb = 0.0
+            if self.resident_mb() + needed_mb > self.budget_mb:
+                print(f"Warning: model budget {self.budget_mb:.0f} MB exceeded; all resident models are in use")
+
+
+# --- LOADERS ---
+# Imports stay inside the loaders so importing this module never pulls in torch.
+
+YOLO_WORLD_WEIGHTS = 'yolov8s-world.pt'
+DEPTH_ANYTHING_MODEL = "depth-anything/Depth-Anything-V2-Small-hf"
+
+def _load_yolo_world():
+    from ultralytics import YOLOWorld
+    return YOLOWorld(YOLO_WORLD_WEIGHTS)
+
+def _load_depth_anything():
+    from transformers import pipeline
+    return pipeline(
+        task="depth-estimation",
+        model=DEPTH_ANYTHING_MODEL,
+        device=select_device()
+    )
+
+def _load_yolo(weights):
+    def load():
+        from ultralytics import YOLO
+        return YOLO(weights)
+    return load
+
+def _load_sam():
+    from ultralytics import SAM
+    try: return SAM('mobile_sam.pt')
+    except: return SAM('sam_b.pt')
+
+def _load_lama():
+    from simple_lama_inpainting import SimpleLama
+    return SimpleLama()
+
+
+registry = ModelRegistry()
+registry.register("yolo-world", _load_yolo_world, est_mb=110, version=YOLO_WORLD_WEIGHTS)
+registry.register("depth-anything", _load_depth_anything, est_mb=100, version=DEPTH_ANYTHING_MODEL)
+registry.register("yolov8n-pose", _load_yolo("yolov8n-pose.pt"), est_mb=15, version="yolov8n-pose.pt")
+registry.register("yolov8n", _load_yolo("yolov8n.pt"), est_mb=15, version="yolov8n.pt")
+registry.register("yolov8n-seg", _load_yolo("yolov8n-seg.pt"), est_mb=15, version="yolov8n-seg.pt")
+registry.register("sam", _load_sam, est_mb=40)
+registry.register("lama", _load_lama, est_mb=200)
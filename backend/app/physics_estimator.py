@@ -1,12 +1,16 @@
-from ultralytics import YOLOWorld
 import numpy as np
 import cv2
 
+from .model_registry import registry
+from .detectors import detector_for
+
 class PhysicsEstimator:
     def __init__(self):
         print("Loading Physics Engine (YOLO-World)...")
-        # YOLO-World is highly efficient and detects open-vocabulary objects
-        self.model = YOLOWorld('yolov8s-world.pt') 
+        # YOLO-World is highly efficient and detects open-vocabulary objects.
+        # Shared with the enrichment pipeline through the model registry: loaded
+        # here, but only referenced while a scan runs so it stays evictable.
+        with registry.lease("yolo-world"): pass
         
         # Define common tabletop objects to look for
         self.classes = [
@@ -16,7 +20,6 @@ class PhysicsEstimator:
             "screwdriver", "pliers", "hammer", "tool",
             "toy block", "lego", "pen", "notebook"
         ]
-        self.model.set_classes(self.classes)
         print("Physics Engine Ready.")
 
         # Heuristic Knowledge Base
@@ -45,8 +48,10 @@ class PhysicsEstimator:
         """
         Runs YOLO-World on the image.
         """
-        # Run inference
-        results = self.model.predict(image_array, verbose=False)
+        # Run inference through our own vocabulary view: encoded once (vocab cache),
+        # never clobbers other users of the weights
+        with registry.lease("yolo-world") as model:
+            results = detector_for(model, self.classes).predict(image_array, verbose=False)
         
         detected_objects = []
         h, w = image_array.shape[:2]
@@ -0,0 +1,165 @@
+"""Push-based progress for enrichment and batch jobs.
+
+Producers publish the current compact state of a topic ("job:<id>",
+"batch:<id>") from any thread; publishing only merges it into the broker's
+copy. Each subscriber (one SSE connection) remembers what it last sent per
+topic and, at most every FIDELITY_PROGRESS_INTERVAL seconds, sends only the
+keys that changed since. A slow client therefore gets fewer, larger deltas
+instead of an ever-growing queue, and every state is sent in full once, as
+the first event of a connection.
+
+A stream subscribed to one topic ends after that topic's final state has been
+sent. Streams subscribed to a prefix ("job:") run until the client leaves.
+"""
+
+import os
+import copy
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+
+PUSH_INTERVAL = float(os.getenv("FIDELITY_PROGRESS_INTERVAL", "0.5"))
+KEEPALIVE_SECONDS = 15.0
+MAX_TOPICS = 256
+
+
+def _merge(dst, src):
+    """Recursive dict update."""
+    for key, value in src.items():
+        if isinstance(value, dict) and isinstance(dst.get(key), dict):
+            _merge(dst[key], value)
+        else:
+            dst[key] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+    return dst
+
+
+def _diff(old, new):
+    """Keys of new whose value differs from old (recursing into dicts)."""
+    delta = {}
+    for key, value in new.items():
+        prev = old.get(key)
+        if isinstance(value, dict) and isinstance(prev, dict):
+            sub = _diff(prev, value)
+            if sub: delta[key] = sub
+        elif key not in old or prev != value:
+            delta[key] = value
+    return delta
+
+
+class Subscription:
+    def __init__(self, broker, topic=None, prefix=None):
+        self.broker = broker
+        self.topic = topic
+        self.prefix = prefix
+        self.loop = asyncio.get_running_loop()
+        self.wake = asyncio.Event()
+        self.dirty = set()
+        self.sent = {}
+
+    def matches(self, topic):
+        return topic == self.topic or (self.prefix is not None and topic.startswith(self.prefix))
+
+    def notify(self, topic):
+        # Called under the broker lock, possibly from a worker thread
+        self.dirty.add(topic)
+        self.loop.call_soon_threadsafe(self.wake.set)
+
+    async def events(self, interval=PUSH_INTERVAL):
+        """Yields (event_name, data) until the subscribed topic is final (or forever, for a prefix)."""
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield "ping", None
+                continue
+            self.wake.clear()
+
+            finished = False
+            for topic, delta, first, final in self.broker.collect(self):
+                data = {"id": topic.partition(":")[2], **delta}
+                yield ("snapshot" if first else "progress"), data
+                if final and topic == self.topic: finished = True
+            if finished: return
+            await asyncio.sleep(interval)
+
+    async def stream(self, interval=PUSH_INTERVAL):
+        """Server-sent events text for a StreamingResponse."""
+        try:
+            async for name, data in self.events(interval):
+                if data is None:
+                    yield ": ping\n\n"
+                else:
+                    yield f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+        finally:
+            self.broker.unsubscribe(self)
+
+
+class ProgressBroker:
+    def __init__(self, max_topics=MAX_TOPICS):
+        self.max_topics = max_topics
+        self._state = OrderedDict()   # topic -> current state
+        self._final = set()
+        self._subs = []
+        self._lock = threading.Lock()
+
+    def publish(self, topic, state, final=False):
+        """Merges state into topic; final marks the topic's last update."""
+        with self._lock:
+            current = self._state.get(topic)
+            if current is None: current = self._state[topic] = {}
+            _merge(current, state)
+            self._state.move_to_end(topic)
+            if final: self._final.add(topic)
+            for sub in self._subs:
+                if sub.matches(topic): sub.notify(topic)
+            self._prune()
+
+    def _prune(self):
+        # Forget the oldest finished topics; live ones are never dropped
+        excess = len(self._state) - self.max_topics
+        for topic in [t for t in self._state if t in self._final][:max(0, excess)]:
+            del self._state[topic]
+            self._final.discard(topic)
+
+    def state(self, topic):
+        with self._lock:
+            return copy.deepcopy(self._state.get(topic))
+
+    def subscribe(self, topic=None, prefix=None):
+        """Must be called on the event loop that will consume the subscription."""
+        sub = Subscription(self, topic=topic, prefix=prefix)
+        with self._lock:
+            self._subs.append(sub)
+            # Current state goes out as the first event
+            for known in self._state:
+                if sub.matches(known): sub.notify(known)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            if sub in self._subs: self._subs.remove(sub)
+
+    def collect(self, sub):
+        """(topic, delta, first, final) for every topic changed since sub last sent it."""
+        out = []
+        with self._lock:
+            for topic in sorted(sub.dirty):
+                current = self._state.get(topic)
+                if current is None: continue
+                first = topic not in sub.sent
+                delta = _diff(sub.sent.get(topic, {}), current)
+                final = topic in self._final
+                if delta or first or final:
+                    sub.sent[topic] = copy.deepcopy(current)
+                    out.append((topic, delta, first, final))
+            sub.dirty.clear()
+        return out
+
+    def stats(self):
+        with self._lock:
+            return {"topics": len(self._state), "subscribers": len(self._subs)}
+
+
+progress = ProgressBroker()
@@ -0,0 +1,193 @@
+"""Content-addressed cache of enrichment results.
+
+A result is keyed by the video's content hash plus everything that changes the
+output (task type, mode, prompts, sampling config, model versions, pipeline
+version), so re-running the same video - under any filename, from the upload
+endpoint or a batch job - returns the stored timeline and frames without
+decoding or running a model.
+
+Layout:  <root>/<key>/result.json, entry.json, frames/...
+Env:     FIDELITY_RESULT_CACHE=0 disables it, FIDELITY_RESULT_CACHE_DIR moves it,
+         FIDELITY_RESULT_CACHE_MB caps its size (least recently used go first).
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+# Bump whenever pipeline output changes for the same inputs
+PIPELINE_VERSION = "1"
+
+CACHE_ENABLED = os.getenv("FIDELITY_RESULT_CACHE", "1") != "0"
+CACHE_DIR = os.getenv(
+    "FIDELITY_RESULT_CACHE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "enrichment_cache"))
+)
+CACHE_MAX_MB = float(os.getenv("FIDELITY_RESULT_CACHE_MB", "2048"))
+
+_digests = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(path):
+    """sha256 of a file's contents, memoized on (path, size, mtime)."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _digest_lock:
+        if memo_key in _digests: return _digests[memo_key]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _digest_lock:
+        _digests[memo_key] = digest
+    return digest
+
+
+def _tree_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try: total += os.path.getsize(os.path.join(root, name))
+            except OSError: pass
+    return total
+
+
+def _link_or_copy_tree(src, dst):
+    """Mirrors src into dst, hard-linking files when the filesystem allows it."""
+    for root, _, files in os.walk(src):
+        target_dir = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in files:
+            s, d = os.path.join(root, name), os.path.join(target_dir, name)
+            if os.path.exists(d): continue
+            try: os.link(s, d)
+            except OSError: shutil.copy2(s, d)
+
+
+class ResultCache:
+    def __init__(self, root=CACHE_DIR, max_mb=CACHE_MAX_MB, enabled=CACHE_ENABLED):
+        self.root = root
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Held while an entry's frames are linked out (lookup) or deleted (_evict),
+        # so a lookup never restores a half-removed entry
+        self._entry_lock = threading.Lock()
+        if self.enabled: os.makedirs(self.root, exist_ok=True)
+
+    def make_key(self, video_path, task_type, mode=None, prompts=None, sampling=None, models=None, sensor_path=None, options=None):
+        parts = {
+            "video": file_digest(video_path),
+            "sensor": file_digest(sensor_path) if sensor_path and os.path.exists(sensor_path) else None,
+            "task_type": task_type,
+            "mode": mode,
+            "prompts": prompts,
+            "sampling": sampling or {},
+            "models": models or {},
+            "options": options or {},
+            "pipeline": PIPELINE_VERSION,
+        }
+        blob = json.dumps(parts, sort_keys=True, default=str).encode()
+        return hashlib.sha256(blob).hexdigest()[:32]
+
+    def lookup(self, key, frame_dir, session_id):
+        """Returns the cached result with its frames restored into frame_dir, or None."""
+        entry_dir = os.path.join(self.root, key)
+        linked = False
+        try:
+            with self._entry_lock:
+                with open(os.path.join(entry_dir, "entry.json")) as f: entry = json.load(f)
+                with open(os.path.join(entry_dir, "result.json")) as f: text = f.read()
+                linked = True
+                _link_or_copy_tree(os.path.join(entry_dir, "frames"), frame_dir)
+        except (OSError, ValueError):
+            if linked:
+                # Don't leave a partial restore for the fresh run to write into
+                shutil.rmtree(frame_dir, ignore_errors=True)
+                os.makedirs(frame_dir, exist_ok=True)
+            with self._lock: self.misses += 1
+            return None
+
+        # Point frame URLs and paths at the new session
+        old_sid = entry["session_id"]
+        text = text.replace(f"/static/processed_frames/{old_sid}/", f"/static/processed_frames/{session_id}/")
+        text = text.replace(f"/frames/{old_sid}/", f"/frames/{session_id}/")
+        text = text.replace(json.dumps(entry["frame_dir"])[1:-1], json.dumps(frame_dir)[1:-1])
+        result = json.loads(text)
+        if isinstance(result.get("metadata"), dict) and "session_id" in result["metadata"]:
+            result["metadata"]["session_id"] = session_id
+
+        os.utime(os.path.join(entry_dir, "entry.json"))  # LRU recency
+        with self._lock: self.hits += 1
+        print(f"⚡ Result cache hit ({key[:12]})")
+        return result
+
+    def store(self, key, result, frame_dir, session_id):
+        entry_dir = os.path.join(self.root, key)
+        if os.path.exists(entry_dir): return
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            os.makedirs(tmp_dir)
+            with open(os.path.join(tmp_dir, "result.json"), "w") as f: json.dump(result, f, default=str)
+            _link_or_copy_tree(frame_dir, os.path.join(tmp_dir, "frames"))
+            entry = {"session_id": session_id, "frame_dir": frame_dir, "created": time.time(), "size_bytes": _tree_size(tmp_dir)}
+            with open(os.path.join(tmp_dir, "entry.json"), "w") as f: json.dump(entry, f)
+            os.rename(tmp_dir, entry_dir)
+        except OSError as e:
+            # Another worker stored the same key first, or the disk is full; either way not fatal
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.exists(entry_dir): print(f"Result cache store failed: {e}")
+            return
+        with self._lock: self.stores += 1
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for key in os.listdir(self.root):
+            if ".tmp-" in key: continue
+            meta = os.path.join(self.root, key, "entry.json")
+            try:
+                with open(meta) as f: size = json.load(f).get("size_bytes", 0)
+                entries.append((os.path.getmtime(meta), key, size))
+            except (OSError, ValueError):
+                continue
+        return sorted(entries)
+
+    def _evict(self):
+        with self._entry_lock, self._lock:
+            entries = self._entries()
+            total = sum(size for _, _, size in entries)
+            while entries and total > self.max_bytes:
+                _, key, size = entries.pop(0)
+                shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+                total -= size
+                self.evictions += 1
+                print(f"♻️ Result cache evicted {key[:12]} ({size / 1e6:.1f} MB)")
+
+    def stats(self):
+        entries = self._entries() if self.enabled else []
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(entries),
+            "size_mb": round(sum(size for _, _, size in entries) / (1024 * 1024), 1),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+
+result_cache = ResultCache()
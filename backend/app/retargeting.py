@@ -3,6 +3,8 @@ import pybullet_data
 import numpy as np
 from scipy.ndimage import gaussian_filter1d
 
+from .timeline import Timeline
+
 class KinematicSolver:
     def __init__(self):
         self.client = p.connect(p.DIRECT)
@@ -43,17 +45,16 @@ class KinematicSolver:
 
         raw_joint_trajectory = []
         
+        timeline = Timeline.coerce(timeline)
         print(f"🧮 Solving {mode.upper()} Kinematics for {len(timeline)} frames...")
 
         # 1. SOLVE INVERSE KINEMATICS (Frame by Frame)
-        for frame in timeline:
-            state = frame.get('state', {})
-            
+        for i in range(len(timeline)):
             # --- EXTRACT HANDS ---
             # Ideally, enrichment.py should provide 'left_hand' and 'right_hand' keys.
             # If standard 'human_joints' is used, we assume it's the RIGHT hand.
-            right_hand = state.get('right_hand') or state.get('human_joints')
-            left_hand = state.get('left_hand') # Only present if Vision pipeline supports it
+            right_hand = timeline.get(i, 'state', 'right_hand') or timeline.get(i, 'state', 'human_joints')
+            left_hand = timeline.get(i, 'state', 'left_hand') # Only present if Vision pipeline supports it
             
             frame_result = []
 
@@ -66,7 +67,7 @@ class KinematicSolver:
                 frame_result.extend(right_joints)
                 
                 # Gripper
-                frame_result.append(0.0 if state.get('contacts') else 0.04)
+                frame_result.append(0.0 if timeline.get(i, 'state', 'contacts') else 0.04)
             else:
                 frame_result.extend([0.0] * 8) # Pad empty
 
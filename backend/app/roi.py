@@ -0,0 +1,87 @@
+"""ROI-cropped hand detection for the factory pipeline.
+
+Once a hand has been seen, the next frame is detected on an expanded crop
+around the previous hand box at a small input size instead of the full
+frame. If the crop yields no hand, that frame falls back to full-frame
+detection, so a lost hand is re-acquired immediately.
+"""
+
+import numpy as np
+
+DEFAULT_EXPAND = 2.0      # crop side = expand * max(box w, box h)
+DEFAULT_ROI_SIZE = 192    # detector input size for crops (multiple of 32)
+MIN_CROP = 96             # px, so tiny boxes still get context
+
+HAND_LABELS = ("hand", "gripper")
+
+
+def is_hand(label):
+    label = label.lower()
+    return any(k in label for k in HAND_LABELS)
+
+
+def _detections(det, dx=0, dy=0):
+    if det is None: return []
+    out = []
+    for box in det.boxes:
+        x1, y1, x2, y2 = (float(v) for v in box.xyxy[0])
+        out.append((det.names[int(box.cls[0])], [x1 + dx, y1 + dy, x2 + dx, y2 + dy]))
+    return out
+
+
+class RoiDetector:
+    def __init__(self, detector, expand=DEFAULT_EXPAND, imgsz=DEFAULT_ROI_SIZE, conf=0.1):
+        self.detector = detector
+        self.expand = float(expand)
+        self.imgsz = int(imgsz)
+        self.conf = conf
+        self.last_hand = None
+
+        # Stats
+        self.frames = 0
+        self.roi_frames = 0
+        self.full_frames = 0
+
+    def detect(self, rgb):
+        """[(label, [x1, y1, x2, y2])] in full-frame pixels; frames must arrive in order."""
+        self.frames += 1
+        if self.last_hand is not None:
+            x0, y0, x1, y1 = self._crop(self.last_hand, rgb.shape[1], rgb.shape[0])
+            results = self.detector.predict([np.ascontiguousarray(rgb[y0:y1, x0:x1])], verbose=False, conf=self.conf, imgsz=self.imgsz)
+            detections = _detections(results[0] if results else None, x0, y0)
+            if self._remember_hand(detections):
+                self.roi_frames += 1
+                return detections
+
+        # No hand yet, or lost it: full frame
+        results = self.detector.predict([rgb], verbose=False, conf=self.conf)
+        detections = _detections(results[0] if results else None)
+        self._remember_hand(detections)
+        self.full_frames += 1
+        return detections
+
+    def _remember_hand(self, detections):
+        for label, box in detections:
+            if is_hand(label):
+                self.last_hand = box
+                return True
+        self.last_hand = None
+        return False
+
+    def _crop(self, box, w, h):
+        cx, cy = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+        size = max(box[2] - box[0], box[3] - box[1]) * self.expand
+        size = min(max(size, MIN_CROP), w, h)
+        x0 = int(np.clip(cx - size / 2, 0, w - size))
+        y0 = int(np.clip(cy - size / 2, 0, h - size))
+        return x0, y0, x0 + int(size), y0 + int(size)
+
+    def stats(self):
+        return {
+            "expand": self.expand,
+            "imgsz": self.imgsz,
+            "frames": self.frames,
+            "roi_frames": self.roi_frames,
+            "full_frames": self.full_frames,
+            "roi_hit_ratio": round(self.roi_frames / self.frames, 3) if self.frames else 0.0,
+        }
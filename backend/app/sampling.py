@@ -0,0 +1,127 @@
+"""Motion-adaptive keyframe sampling.
+
+Uniform striding spends as much inference on a static stretch as on a fast
+grasp. The adaptive sampler first scouts the video on tiny grayscale
+thumbnails (frame difference + sparse LK flow, the same signals the odometry
+stage uses), then places a fixed budget of keyframes so that sample density
+follows motion. A share of the budget is always spread uniformly so static
+stretches keep some coverage.
+
+Each keyframe gets a weight: how many source frames it stands for relative to
+uniform sampling (1.0 = same as a uniform stride, < 1 = oversampled motion).
+"""
+
+import time
+import cv2
+import numpy as np
+
+STRATEGIES = ("uniform", "adaptive")
+
+SCOUT_WIDTH = 64          # thumbnail width for motion signals
+SCOUT_FACTOR = 4          # scout points per keyframe in the budget
+UNIFORM_FLOOR = 0.25      # share of the budget spread uniformly
+
+
+def frame_motion(prev_gray, gray):
+    """(mean absolute difference, median LK flow magnitude), both relative to image size."""
+    diff = float(np.mean(cv2.absdiff(prev_gray, gray))) / 255.0
+    flow = 0.0
+    p0 = cv2.goodFeaturesToTrack(prev_gray, mask=None, maxCorners=40, qualityLevel=0.3, minDistance=3, blockSize=5)
+    if p0 is not None:
+        p1, st, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, p0, None, winSize=(9, 9), maxLevel=1)
+        if p1 is not None:
+            ok = st.reshape(-1) == 1
+            if ok.any():
+                flow = float(np.median(np.linalg.norm((p1 - p0).reshape(-1, 2)[ok], axis=1))) / gray.shape[1]
+    return diff, flow
+
+
+class MotionProfile:
+    """Motion signals at scouted frame indices; entry j measures frames[j-1] -> frames[j]."""
+
+    def __init__(self, frame_indices, diff, flow, seconds=0.0):
+        self.frame_indices = np.asarray(frame_indices, dtype=int)
+        self.diff = np.asarray(diff, dtype=float)
+        self.flow = np.asarray(flow, dtype=float)
+        self.seconds = seconds
+
+    def energy(self):
+        """Both signals scaled to mean 1 and summed (a constant signal contributes nothing extra)."""
+        total = np.zeros(len(self.frame_indices))
+        for signal in (self.diff, self.flow):
+            mean = signal.mean() if len(signal) else 0.0
+            if mean > 0: total += signal / mean
+        return total
+
+
+def scout_motion(video_path, step, width=SCOUT_WIDTH):
+    """Decodes every `step`-th frame as a thumbnail and measures motion between them."""
+    from .frame_source import open_frame_source
+
+    t0 = time.perf_counter()
+    indices, diffs, flows = [], [], []
+    prev = None
+    with open_frame_source(video_path, width=width) as source:
+        for idx, frame in source.frames(step=step):
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            d, f = frame_motion(prev, gray) if prev is not None else (0.0, 0.0)
+            indices.append(idx); diffs.append(d); flows.append(f)
+            prev = gray
+    return MotionProfile(indices, diffs, flows, seconds=time.perf_counter() - t0)
+
+
+def allocate(profile, total_frames, budget, floor=UNIFORM_FLOOR):
+    """
+    Picks `budget` distinct frame indices in [0, total_frames) with density
+    proportional to motion (plus a uniform floor). Returns (indices, weights).
+    """
+    total_frames = int(total_frames)
+    budget = max(1, min(int(budget), total_frames))
+
+    # Per-frame density: each scout interval's energy is spread over the frames it covers
+    density = np.full(total_frames, floor / total_frames)
+    energy = profile.energy()
+    if len(energy) > 1 and energy[1:].sum() > 0:
+        starts, ends = profile.frame_indices[:-1], np.minimum(profile.frame_indices[1:], total_frames)
+        share = (1.0 - floor) * energy[1:] / energy[1:].sum()
+        for a, b, s in zip(starts, ends, share):
+            if b > a: density[a:b] += s / (b - a)
+    else:
+        density[:] = 1.0 / total_frames
+
+    # Inverse CDF at evenly spaced quantiles, then forced strictly increasing within range
+    cdf = np.cumsum(density)
+    cdf /= cdf[-1]
+    k = np.arange(budget)
+    idx = np.searchsorted(cdf, (k + 0.5) / budget)
+    idx = np.maximum.accumulate(idx - k) + k
+    idx = np.minimum(idx, total_frames - budget + k)
+
+    # Weight = source frames this keyframe covers (midpoint to midpoint) / uniform stride
+    bounds = np.concatenate([[0.0], (idx[:-1] + idx[1:]) / 2.0, [float(total_frames)]])
+    weights = np.diff(bounds) * budget / total_frames
+    return idx, weights
+
+
+def plan_samples(strategy, video_path, total_frames, budget):
+    """
+    Returns (frame_indices, weights, stats) for the decode stage; frame_indices
+    is None for uniform striding.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown sampling strategy '{strategy}' (use one of {STRATEGIES})")
+    if strategy == "uniform":
+        return None, None, {"strategy": "uniform"}
+
+    profile = scout_motion(video_path, max(1, total_frames // (budget * SCOUT_FACTOR)))
+    if len(profile.frame_indices) == 0:
+        return None, None, {"strategy": "uniform", "fallback": "scout decoded no frames"}
+    # Container frame counts can be missing or wrong; trust what actually decoded
+    n = int(profile.frame_indices[-1]) + 1
+    indices, weights = allocate(profile, n, budget)
+    print(f"🎯 Adaptive sampling: {len(indices)} keyframes over {n} frames (scout {profile.seconds:.2f}s)")
+    return indices, weights, {
+        "strategy": "adaptive",
+        "scout_points": len(profile.frame_indices),
+        "scout_seconds": round(profile.seconds, 3),
+    }
@@ -82,4 +82,128 @@ class SyntheticIMU:
     def reset(self):
         self.prev_pos = None
         self.prev_vel = np.zeros(3)
-        self.prev_quat = None
\ No newline at end of file
+        self.prev_quat = None
+
+def _slerp(q0, q1, u):
+    """Spherical interpolation between unit quaternions [x, y, z, w]."""
+    dot = float(np.dot(q0, q1))
+    if dot < 0.0:  # take the short way round
+        q1, dot = -q1, -dot
+    if dot > 0.9995:
+        q = q0 + u * (q1 - q0)
+        return q / np.linalg.norm(q)
+    theta = np.arccos(dot)
+    return (np.sin((1 - u) * theta) * q0 + np.sin(u * theta) * q1) / np.sin(theta)
+
+
+class SensorStream:
+    """
+    A recorded sensor log (IMU CSV) held as typed NumPy columns.
+
+    Frames are aligned by binary search on the timestamp column instead of
+    scanning every row, so 1 kHz logs cost O(log n) per frame.
+
+    interpolation: "nearest" (closest row, the historical behaviour), "linear",
+                   or "slerp" (linear for vectors, spherical for qx/qy/qz/qw).
+    window:        seconds; if > 0, vector channels are averaged over
+                   [t - window/2, t + window/2] to de-alias high-rate IMUs.
+    clock_offset:  seconds added to frame time before lookup
+                   (sensor clock = video clock + offset).
+    """
+
+    CHANNELS = {"accel": ("ax", "ay", "az"), "gyro": ("gx", "gy", "gz")}
+    QUATERNION = ("qx", "qy", "qz", "qw")
+    MODES = ("nearest", "linear", "slerp")
+
+    def __init__(self, timestamps, channels, orientation=None, interpolation="nearest", window=0.0, clock_offset=0.0, rows=None):
+        if interpolation not in self.MODES:
+            raise ValueError(f"Unknown sensor interpolation '{interpolation}' (use one of {self.MODES})")
+        self.timestamps = timestamps  # sorted float64, or None for logs without a time column
+        self.channels = channels      # name -> (n, 3) float64
+        self.orientation = orientation
+        self.rows = rows              # original CSV row of each sorted row (breaks exact ties in file order)
+        self.interpolation = interpolation
+        self.window = float(window or 0.0)
+        self.clock_offset = float(clock_offset or 0.0)
+        # Prefix sums for O(1) window means
+        self._cumsum = {
+            name: np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+            for name, values in channels.items()
+        }
+
+    @classmethod
+    def from_csv(cls, path, **options):
+        import pandas as pd
+        df = pd.read_csv(path)
+        n = len(df)
+
+        def column(name):
+            return df[name].astype(float).to_numpy() if name in df.columns else np.zeros(n)
+
+        timestamps = None
+        order = np.arange(n)
+        if 'timestamp' in df.columns:
+            timestamps = df['timestamp'].astype(float).to_numpy()
+            keep = ~np.isnan(timestamps)
+            order = order[keep][np.argsort(timestamps[keep], kind="stable")]
+            timestamps = timestamps[order]
+
+        channels = {
+            name: np.column_stack([column(c) for c in cols])[order]
+            for name, cols in cls.CHANNELS.items()
+        }
+        orientation = None
+        if all(c in df.columns for c in cls.QUATERNION):
+            orientation = np.column_stack([column(c) for c in cls.QUATERNION])[order]
+        return cls(timestamps, channels, orientation, rows=order, **options)
+
+    def __len__(self):
+        return len(next(iter(self.channels.values())))
+
+    def sample(self, t, fraction=None):
+        """
+        Sensor reading for frame time t (seconds). Logs without timestamps are
+        indexed proportionally by `fraction` (frame index / total frames).
+        """
+        if self.timestamps is None:
+            idx = min(int(fraction * len(self)), len(self) - 1)
+            return self._reading(lambda values, name: values[idx], self.orientation[idx] if self.orientation is not None else None)
+
+        ts = self.timestamps
+        t = t + self.clock_offset
+        hi = int(np.searchsorted(ts, t, side="left"))
+        lo = max(hi - 1, 0)
+        hi = min(hi, len(ts) - 1)
+
+        if self.interpolation == "nearest" or lo == hi or t <= ts[lo] or t >= ts[hi]:
+            # Closest row; on a tie (or repeated timestamps) the one logged first wins
+            first_lo = int(np.searchsorted(ts, ts[lo], side="left"))
+            first_hi = int(np.searchsorted(ts, ts[hi], side="left"))
+            d_lo, d_hi = abs(t - ts[lo]), abs(ts[hi] - t)
+            if d_lo == d_hi and self.rows is not None:
+                idx = first_lo if self.rows[first_lo] <= self.rows[first_hi] else first_hi
+            else:
+                idx = first_lo if d_lo <= d_hi else first_hi
+            pick = lambda values: values[idx]
+            quat = self.orientation[idx] if self.orientation is not None else None
+        else:
+            u = (t - ts[lo]) / (ts[hi] - ts[lo])
+            pick = lambda values: values[lo] + (values[hi] - values[lo]) * u
+            quat = None
+            if self.orientation is not None:
+                q0, q1 = self.orientation[lo], self.orientation[hi]
+                quat = _slerp(q0, q1, u) if self.interpolation == "slerp" else pick(self.orientation)
+
+        if self.window > 0:
+            a = int(np.searchsorted(ts, t - self.window / 2, side="left"))
+            b = int(np.searchsorted(ts, t + self.window / 2, side="right"))
+            if b > a:
+                mean = lambda values, name: (self._cumsum[name][b] - self._cumsum[name][a]) / (b - a)
+                return self._reading(mean, quat)
+        return self._reading(lambda values, name: pick(values), quat)
+
+    def _reading(self, pick, quat):
+        reading = {name: [float(v) for v in pick(values, name)] for name, values in self.channels.items()}
+        if quat is not None:
+            reading["orientation"] = [float(v) for v in quat]
+        return reading
@@ -0,0 +1,144 @@
+"""Lazily constructed backend services.
+
+Nothing heavy (PyBullet, torch, ultralytics, transformers, model weights) is
+touched when app.main is imported. Each service is built on first use, or by
+warm_up() which main.py runs in a background thread once the server is
+already accepting connections.
+
+FIDELITY_WARMUP: "models" (default) builds services and loads the enrichment
+models, "services" builds services only, "none" leaves everything to first use.
+"""
+
+import os
+import threading
+import time
+
+from .startup import startup_timer
+from .model_registry import registry
+from .detectors import vocab_cache
+
+WARMUP_MODE = os.getenv("FIDELITY_WARMUP", "models")
+
+
+class LazyService:
+    """Builds a service once, on first get(), and remembers a failed build."""
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.instance = None
+        self.error = None
+        self.init_seconds = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self.instance is not None: return self.instance
+        with self._lock:
+            if self.instance is None:
+                if self.error is not None:
+                    raise RuntimeError(self.error)
+                t0 = time.perf_counter()
+                try:
+                    with startup_timer.measure(f"service:{self.name}"):
+                        self.instance = self.factory()
+                except Exception as e:
+                    self.error = str(e)
+                    print(f"{self.name} Warning: {e}")
+                    raise
+                finally:
+                    self.init_seconds = time.perf_counter() - t0
+        return self.instance
+
+    def status(self):
+        return {
+            "ready": self.instance is not None,
+            "error": self.error,
+            "init_seconds": round(self.init_seconds, 3) if self.init_seconds is not None else None,
+        }
+
+
+# --- FACTORIES ---
+# Module imports live inside the factories so they are only paid on first use.
+
+def _make_sim():
+    with startup_timer.measure("app.sim"):
+        from .sim import SimManager
+    sim = SimManager()
+    sim.load_env()
+    return sim
+
+def _make_logger():
+    with startup_timer.measure("app.logger"):
+        from .logger import DataLogger
+    return DataLogger()
+
+def _make_vision():
+    with startup_timer.measure("app.vision"):
+        from .vision import VisionPipeline
+    return VisionPipeline()
+
+def _make_augmenter():
+    with startup_timer.measure("app.augment"):
+        from .augment import AugmentationEngine
+    return AugmentationEngine()
+
+def _make_enricher():
+    with startup_timer.measure("app.enrichment"):
+        from .enrichment import EnrichmentPipeline
+    return EnrichmentPipeline()
+
+def _make_exo_extractor():
+    with startup_timer.measure("app.exocentric"):
+        from .exocentric import ExocentricExtractor
+    return ExocentricExtractor()
+
+def _make_exporter():
+    with startup_timer.measure("app.exporters"):
+        from .exporters import DataExporter
+    return DataExporter()
+
+
+sim = LazyService("sim", _make_sim)
+logger = LazyService("logger", _make_logger)
+vision = LazyService("vision", _make_vision)
+augmenter = LazyService("augmenter", _make_augmenter)
+enricher = LazyService("enricher", _make_enricher)
+exo_extractor = LazyService("exo_extractor", _make_exo_extractor)
+exporter = LazyService("exporter", _make_exporter)
+
+ALL_SERVICES = [sim, logger, vision, augmenter, enricher, exo_extractor, exporter]
+
+warmup_status = {"mode": WARMUP_MODE, "state": "pending", "seconds": None}
+
+
+def warm_up(mode=WARMUP_MODE):
+    """Builds every service (and optionally the enrichment models). Run off the event loop."""
+    if mode == "none":
+        warmup_status["state"] = "skipped"
+        return
+    warmup_status["state"] = "running"
+    t0 = time.perf_counter()
+    for service in ALL_SERVICES:
+        try: service.get()
+        except Exception: pass
+
+    if mode == "models" and enricher.instance is not None:
+        try:
+            enricher.instance.vision_model
+            enricher.instance.depth_model
+        except Exception as e:
+            print(f"Warm-up Warning: {e}")
+
+    warmup_status["seconds"] = round(time.perf_counter() - t0, 2)
+    warmup_status["state"] = "done"
+    print(f"🔥 Warm-up complete in {warmup_status['seconds']}s")
+
+
+def readiness():
+    return {
+        "ready": warmup_status["state"] in ("done", "skipped"),
+        "warmup": dict(warmup_status),
+        "services": {s.name: s.status() for s in ALL_SERVICES},
+        "models": registry.status(),
+        "vocab_cache": vocab_cache.stats(),
+    }
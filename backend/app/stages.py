@@ -0,0 +1,201 @@
+"""Thread-staged pipeline runner for the enrichment loops.
+
+Each stage runs on its own thread and talks to its neighbours through bounded
+queues, so decode, inference, odometry and frame writes overlap instead of
+running back to back. Stages are single-threaded and FIFO, so output order
+matches input order exactly.
+"""
+
+import queue
+import threading
+import time
+
+_END = object()
+_POLL = 0.1
+
+
+class StageStats:
+    """Per-stage throughput counters."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+
+    def as_dict(self):
+        end = self.finished_at or time.perf_counter()
+        wall = (end - self.started_at) if self.started_at else 0.0
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "fps": round(self.items_in / self.busy_seconds, 1) if self.busy_seconds > 0 else 0.0,
+            "wall_fps": round(self.items_in / wall, 1) if wall > 0 else 0.0,
+            "utilization": round(self.busy_seconds / wall, 2) if wall > 0 else 0.0,
+        }
+
+
+class _Stage:
+    def __init__(self, name, fn=None, flush=None, iterable=None):
+        self.name = name
+        self.fn = fn
+        self.flush = flush
+        self.iterable = iterable
+        self.inbox = None
+        self.outboxes = []
+        self.stats = StageStats(name)
+        self.thread = None
+
+
+class StagedPipeline:
+    """
+    Usage:
+        pipe = StagedPipeline(maxsize=8)
+        pipe.source("decode", frames)             # iterable producing items
+        pipe.stage("odometry", fn)                # fn(item) -> iterable of outputs
+        pipe.stage("inference", fn, flush=fn)     # flush() -> iterable, run at end of stream
+        pipe.tap("persist", fn, after="decode")   # side sink fed with a stage's outputs
+        for out in pipe.run(): ...
+    """
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self._chain = []
+        self._taps = []
+        self._by_name = {}
+        self._stop = threading.Event()
+        self._error = None
+        self._output = None
+
+    def source(self, name, iterable):
+        stage = _Stage(name, iterable=iterable)
+        self._chain.append(stage)
+        self._by_name[name] = stage
+        return self
+
+    def stage(self, name, fn, flush=None):
+        stage = _Stage(name, fn=fn, flush=flush)
+        self._chain.append(stage)
+        self._by_name[name] = stage
+        return self
+
+    def tap(self, name, fn, after):
+        stage = _Stage(name, fn=fn)
+        stage.inbox = queue.Queue(self.maxsize)
+        self._by_name[after].outboxes.append(stage.inbox)
+        self._taps.append(stage)
+        self._by_name[name] = stage
+        return self
+
+    def stats(self):
+        return {name: stage.stats.as_dict() for name, stage in self._by_name.items()}
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        """Starts every stage thread and yields the last stage's outputs in order."""
+        for upstream, downstream in zip(self._chain, self._chain[1:]):
+            downstream.inbox = queue.Queue(self.maxsize)
+            upstream.outboxes.append(downstream.inbox)
+        self._output = queue.Queue(self.maxsize)
+        self._chain[-1].outboxes.append(self._output)
+
+        for stage in self._chain + self._taps:
+            target = self._run_source if stage.iterable is not None else self._run_stage
+            stage.thread = threading.Thread(target=target, args=(stage,), name=f"stage-{stage.name}", daemon=True)
+            stage.thread.start()
+
+        drained = False
+        try:
+            while True:
+                item = self._get(self._output)
+                if item is _END: break
+                yield item
+            drained = True
+        finally:
+            if drained and self._error is None:
+                # Normal completion: let taps (frame writes) drain before returning
+                for stage in self._taps: stage.thread.join()
+            self._stop.set()
+            for stage in self._chain + self._taps: stage.thread.join()
+
+        if self._error is not None:
+            name, exc = self._error
+            raise RuntimeError(f"Pipeline stage '{name}' failed: {exc}") from exc
+
+    # --- internals ---
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while True:
+            try:
+                return q.get(timeout=_POLL)
+            except queue.Empty:
+                if self._stop.is_set(): return _END
+
+    def _emit(self, stage, outputs):
+        for out in outputs:
+            stage.stats.items_out += 1
+            for box in stage.outboxes:
+                if not self._put(box, out): return False
+        return True
+
+    def _fail(self, stage, exc):
+        if self._error is None: self._error = (stage.name, exc)
+        self._stop.set()
+
+    def _finish(self, stage):
+        stage.stats.finished_at = time.perf_counter()
+        for box in stage.outboxes: self._put(box, _END)
+
+    def _run_source(self, stage):
+        stage.stats.started_at = time.perf_counter()
+        try:
+            iterator = iter(stage.iterable)
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                item = next(iterator, _END)
+                stage.stats.busy_seconds += time.perf_counter() - t0
+                if item is _END: break
+                stage.stats.items_in += 1
+                if not self._emit(stage, [item]): break
+        except Exception as e:
+            self._fail(stage, e)
+        finally:
+            self._finish(stage)
+
+    def _run_stage(self, stage):
+        stage.stats.started_at = time.perf_counter()
+        try:
+            while True:
+                item = self._get(stage.inbox)
+                if item is _END: break
+                stage.stats.items_in += 1
+                t0 = time.perf_counter()
+                outputs = stage.fn(item)
+                # Taps are sinks; anything else returns an iterable of outputs
+                outputs = list(outputs) if outputs is not None and stage.outboxes else []
+                stage.stats.busy_seconds += time.perf_counter() - t0
+                if not self._emit(stage, outputs): break
+
+            if stage.flush is not None and not self._stop.is_set():
+                t0 = time.perf_counter()
+                outputs = list(stage.flush() or [])
+                stage.stats.busy_seconds += time.perf_counter() - t0
+                self._emit(stage, outputs)
+        except Exception as e:
+            self._fail(stage, e)
+        finally:
+            self._finish(stage)
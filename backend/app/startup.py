@@ -0,0 +1,49 @@
+"""Startup timing report.
+
+Records how long each module import / service construction took so slow
+worker start-up can be traced to a specific module (GET /health/startup).
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.sections = {}
+        self.top_level = {}  # sections not nested in another one, on the same thread
+        self.ready_at = None
+        self._local = threading.local()
+
+    @contextmanager
+    def measure(self, name):
+        """Times a with-block (usually a single import) under `name`."""
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            self._local.depth = depth
+            self.sections[name] = self.sections.get(name, 0.0) + elapsed
+            if depth == 0: self.top_level[name] = self.top_level.get(name, 0.0) + elapsed
+
+    def mark_ready(self):
+        if self.ready_at is None: self.ready_at = time.perf_counter()
+
+    def report(self):
+        ordered = sorted(self.sections.items(), key=lambda kv: kv[1], reverse=True)
+        return {
+            # Inclusive times: a shared dependency (cv2, numpy...) is billed to whoever imports it first,
+            # and a section includes the ones nested in it ("service:enricher" contains "app.enrichment")
+            "sections_ms": {name: round(sec * 1000, 1) for name, sec in ordered},
+            # Top-level sections only, so nested time is counted once
+            "total_ms": round(sum(self.top_level.values()) * 1000, 1),
+            "time_to_accepting_s": round(self.ready_at - self.started_at, 3) if self.ready_at else None,
+        }
+
+
+startup_timer = StartupTimer()
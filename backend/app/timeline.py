@@ -0,0 +1,182 @@
+"""Columnar timeline.
+
+Per-frame numeric fields (hand joints, camera pose, IMU, velocities, robot
+state...) live in contiguous NumPy arrays with one row per frame and a mask of
+the frames that actually carry the field. Everything else stays in the
+original frame dicts. The nested-dict JSON shape is only rebuilt by
+to_frames(), at the API boundary, and only for rows a stage actually changed.
+
+Columns are never written in place: set_column() swaps in a new array, so
+copy() is cheap and earlier copies keep seeing their own data.
+"""
+
+import numpy as np
+
+# name -> (section of the frame dict, or None for top level; key; dtype when no frame carries it)
+FIELDS = {
+    "timestamp": (None, "timestamp", float),
+    "human_joints": ("state", "human_joints", float),
+    "camera_pose": ("state", "camera_pose", float),
+    "contacts": ("state", "contacts", int),
+    "accel": ("sensors", "accel", float),
+    "gyro": ("sensors", "gyro", float),
+    "hand_velocity": ("kinematics", "hand_velocity", float),
+    "qpos": ("robot_state", "qpos", float),
+    "gripper_width": ("robot_state", "gripper_width", float),
+}
+
+_BY_PATH = {(section, key): name for name, (section, key, _) in FIELDS.items()}
+
+
+def _lookup(frame, section, key):
+    container = frame if section is None else frame.get(section)
+    if not isinstance(container, dict): return None
+    return container.get(key)
+
+
+def _carries(value):
+    if value is None: return False
+    if isinstance(value, (list, tuple, np.ndarray)): return len(value) > 0
+    return True
+
+
+class Timeline:
+    def __init__(self, frames):
+        self._frames = frames
+        self._columns = {}
+        self._masks = {}
+        self._changed = {}
+        self._materialized = None
+
+    @classmethod
+    def from_frames(cls, frames):
+        """Extracts every numeric field of a list of frame dicts into columns."""
+        tl = cls(list(frames or []))
+        n = len(tl._frames)
+        for name, (section, key, default_dtype) in FIELDS.items():
+            values = [_lookup(f, section, key) for f in tl._frames]
+            mask = np.array([_carries(v) for v in values], dtype=bool)
+            present = [v for v, m in zip(values, mask) if m]
+            if not present:
+                tl._columns[name] = np.zeros((n,), dtype=default_dtype)
+                tl._masks[name] = mask
+                continue
+            try:
+                arr = np.asarray(present) if default_dtype is int else np.asarray(present, dtype=float)
+            except (ValueError, TypeError):
+                continue  # ragged / non-numeric: stays in the frame dicts only
+            if arr.dtype.kind not in "biuf": continue
+            col = np.zeros((n,) + arr.shape[1:], dtype=arr.dtype)
+            col[mask] = arr
+            tl._columns[name] = col
+            tl._masks[name] = mask
+        return tl
+
+    @classmethod
+    def coerce(cls, timeline):
+        """Accepts a Timeline or the legacy list of frame dicts."""
+        return timeline if isinstance(timeline, Timeline) else cls.from_frames(timeline)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def copy(self):
+        tl = Timeline(self._frames)
+        tl._columns = dict(self._columns)
+        tl._masks = dict(self._masks)
+        tl._changed = dict(self._changed)
+        tl._materialized = self._materialized
+        return tl
+
+    # --- columns ---
+
+    def has(self, name):
+        return name in self._columns
+
+    def column(self, name):
+        """(N, ...) array; rows where mask(name) is False hold zeros. Treat as read-only."""
+        if name not in self._columns:
+            raise KeyError(f"Timeline field '{name}' is not columnar")
+        return self._columns[name]
+
+    def mask(self, name):
+        if name not in self._masks:
+            raise KeyError(f"Timeline field '{name}' is not columnar")
+        return self._masks[name]
+
+    def valid(self, name):
+        """Rows that carry `name`, stacked."""
+        return self.column(name)[self.mask(name)]
+
+    def set_column(self, name, values, mask=None, rows=None):
+        """
+        Replaces a column. `rows` marks the frames whose value actually changed
+        (default: all); only those are rewritten by to_frames().
+        """
+        values = np.asarray(values)
+        n = len(self._frames)
+        if len(values) != n: raise ValueError(f"Column '{name}' needs {n} rows, got {len(values)}")
+        mask = np.ones(n, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        rows = np.ones(n, dtype=bool) if rows is None else np.asarray(rows, dtype=bool)
+        self._columns[name] = values
+        self._masks[name] = mask
+        self._changed[name] = (self._changed[name] | rows) if name in self._changed else rows
+        self._materialized = None
+
+    # --- per-frame access ---
+
+    def get(self, i, section, key, default=None):
+        """Value of frame i's section[key] (section None = top level), columns first."""
+        name = _BY_PATH.get((section, key))
+        if name in self._columns:
+            if not self._masks[name][i]: return default
+            value = self._columns[name][i]
+            return value.tolist() if isinstance(value, np.ndarray) else value.item()
+        value = _lookup(self._frames[i], section, key)
+        return default if value is None else value
+
+    def image_paths(self):
+        """observation.image_path per frame (legacy string observations too), None when absent."""
+        paths = []
+        for frame in self._frames:
+            obs = frame.get("observation")
+            if isinstance(obs, dict): paths.append(obs.get("image_path"))
+            elif isinstance(obs, str): paths.append(obs)
+            else: paths.append(None)
+        return paths
+
+    # --- materialization ---
+
+    def to_frames(self):
+        """The legacy list-of-dicts shape. Unchanged frames are passed through as-is."""
+        if self._materialized is not None: return self._materialized
+        changed = {name: rows for name, rows in self._changed.items() if rows.any()}
+        if not changed:
+            self._materialized = list(self._frames)
+            return self._materialized
+
+        frames = []
+        for i, frame in enumerate(self._frames):
+            names = [name for name, rows in changed.items() if rows[i]]
+            if not names:
+                frames.append(frame)
+                continue
+            out = dict(frame)
+            copied = set()
+            for name in names:
+                section, key, _ = FIELDS.get(name, ("state", name, float))
+                if section is None:
+                    target = out
+                else:
+                    if section not in copied:
+                        out[section] = dict(frame.get(section) or {})
+                        copied.add(section)
+                    target = out[section]
+                if self._masks[name][i]:
+                    value = self._columns[name][i]
+                    target[key] = value.tolist() if isinstance(value, np.ndarray) else value.item()
+                elif key in target:
+                    target[key] = None
+            frames.append(out)
+        self._materialized = frames
+        return frames
@@ -0,0 +1,119 @@
+"""Detect-every-k box tracking for the grounding pipeline.
+
+YOLO-World only runs on keyframes. In between, each detected box (hand and
+objects) is carried forward by sparse LK flow of the corner features inside
+it. A track's confidence is the running product of the share of its features
+that survive a forward-backward check; once any track drops below
+`min_confidence`, or `interval` frames have passed, the frame is re-detected.
+While no hand is tracked (the last detection found none), every frame is
+detected, as without tracking.
+
+interval=1 is plain per-frame detection; larger values trade accuracy for
+fewer detector calls.
+"""
+
+import cv2
+import numpy as np
+
+from .roi import is_hand
+
+DEFAULT_INTERVAL = 4
+DEFAULT_MIN_CONFIDENCE = 0.5
+
+_FB_MAX_ERROR = 1.0  # px, forward-backward round trip
+_MIN_POINTS = 3
+
+
+def detections_from_results(det):
+    """ultralytics Results -> [(label, [x1, y1, x2, y2])] (empty for None)."""
+    if det is None: return []
+    return [(det.names[int(box.cls[0])], [float(v) for v in box.xyxy[0]]) for box in det.boxes]
+
+
+class _Track:
+    def __init__(self, label, box):
+        self.label = label
+        self.box = np.asarray(box, dtype=float)
+        self.confidence = 1.0
+
+
+class BoxTracker:
+    def __init__(self, detector, interval=DEFAULT_INTERVAL, min_confidence=DEFAULT_MIN_CONFIDENCE, conf=0.1):
+        self.detector = detector
+        self.interval = max(1, int(interval))
+        self.min_confidence = float(min_confidence)
+        self.conf = conf
+
+        self.prev_gray = None
+        self.tracks = []
+        self.since_detect = 0
+
+        # Stats
+        self.frames = 0
+        self.detector_frames = 0
+        self.confidence_redetects = 0
+        self.no_hand_redetects = 0
+
+    def update(self, rgb, gray):
+        """Boxes for this frame as [(label, [x1, y1, x2, y2])]; frames must arrive in order."""
+        self.frames += 1
+        detect = self.prev_gray is None or self.since_detect + 1 >= self.interval
+        if not detect and not any(is_hand(t.label) for t in self.tracks):
+            # Nothing to carry the hand forward: keep looking for it
+            detect = True
+            self.no_hand_redetects += 1
+
+        if not detect and self.tracks:
+            self._propagate(self.prev_gray, gray)
+            if min(t.confidence for t in self.tracks) < self.min_confidence:
+                detect = True
+                self.confidence_redetects += 1
+
+        if detect:
+            results = self.detector.predict([rgb], verbose=False, conf=self.conf)
+            self.tracks = [_Track(label, box) for label, box in detections_from_results(results[0] if results else None)]
+            self.detector_frames += 1
+            self.since_detect = 0
+        else:
+            self.since_detect += 1
+
+        self.prev_gray = gray
+        return [(t.label, t.box.tolist()) for t in self.tracks]
+
+    def _propagate(self, prev_gray, gray):
+        h, w = gray.shape[:2]
+        for track in self.tracks:
+            x1, y1, x2, y2 = np.clip(track.box, [0, 0, 0, 0], [w - 1, h - 1, w - 1, h - 1]).astype(int)
+            if x2 - x1 < 2 or y2 - y1 < 2:
+                track.confidence = 0.0
+                continue
+            mask = np.zeros_like(prev_gray)
+            mask[y1:y2 + 1, x1:x2 + 1] = 255
+            p0 = cv2.goodFeaturesToTrack(prev_gray, mask=mask, maxCorners=20, qualityLevel=0.01, minDistance=3, blockSize=5)
+            if p0 is None or len(p0) < _MIN_POINTS:
+                track.confidence = 0.0
+                continue
+
+            p1, st1, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, p0, None, winSize=(15, 15), maxLevel=2)
+            back, st2, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, p1, None, winSize=(15, 15), maxLevel=2)
+            fb_error = np.linalg.norm((back - p0).reshape(-1, 2), axis=1)
+            good = (st1.reshape(-1) == 1) & (st2.reshape(-1) == 1) & (fb_error < _FB_MAX_ERROR)
+
+            track.confidence *= good.mean()
+            if good.sum() < _MIN_POINTS:
+                track.confidence = 0.0
+                continue
+            shift = np.median((p1 - p0).reshape(-1, 2)[good], axis=0)
+            track.box = track.box + np.array([shift[0], shift[1], shift[0], shift[1]])
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "min_confidence": self.min_confidence,
+            "frames": self.frames,
+            "detector_frames": self.detector_frames,
+            "tracked_frames": self.frames - self.detector_frames,
+            "confidence_redetects": self.confidence_redetects,
+            "no_hand_redetects": self.no_hand_redetects,
+            "detector_call_reduction": round(self.frames / self.detector_frames, 2) if self.detector_frames else 0.0,
+        }
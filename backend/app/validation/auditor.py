@@ -3,6 +3,8 @@ import json
 import numpy as np
 from google import genai
 
+from ..timeline import Timeline
+
 # Reuse the client configuration from youtube_search
 def _get_client():
     api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
@@ -17,35 +19,28 @@ class DataAuditor:
 
     def _summarize_timeline(self, timeline):
         """Compresses the timeline into a statistical summary for the LLM."""
-        if not timeline:
+        timeline = Timeline.coerce(timeline)
+        if not len(timeline):
             return "Empty Timeline"
 
+        # 1. Objects
         objects_seen = set()
-        hand_present_count = 0
-        max_velocity = 0.0
-        interactions = 0
-        
-        for i, frame in enumerate(timeline):
-            state = frame.get('state', {})
-            
-            # 1. Objects
-            for obj in state.get('objects_poses', []):
+        for i in range(len(timeline)):
+            for obj in timeline.get(i, 'state', 'objects_poses', []):
                 if obj.get('label'):
                     objects_seen.add(obj['label'])
-            
-            # 2. Hand Stats
-            joints = state.get('human_joints')
-            if joints:
-                hand_present_count += 1
-                if i > 0:
-                    prev = timeline[i-1].get('state', {}).get('human_joints')
-                    if prev:
-                        vel = np.linalg.norm(np.array(joints) - np.array(prev))
-                        if vel > max_velocity: max_velocity = vel
 
-            # 3. Contacts
-            if state.get('contacts'):
-                interactions += 1
+        # 2. Hand Stats (frame-to-frame displacement where both frames see the hand)
+        present = timeline.mask('human_joints')
+        hand_present_count = int(present.sum())
+        joints = timeline.column('human_joints').reshape(len(timeline), -1)
+        pairs = present[1:] & present[:-1]
+        max_velocity = 0.0
+        if pairs.any():
+            max_velocity = float(np.linalg.norm(joints[1:] - joints[:-1], axis=1)[pairs].max())
+
+        # 3. Contacts
+        interactions = int((timeline.mask('contacts') & (timeline.column('contacts') != 0)).sum())
 
         duration = len(timeline) / 30.0 # Assuming 30fps
         
@@ -1,22 +1,46 @@
+import time
+import numpy as np
 from .validators import HandStabilityValidator, SensorSyncValidator, CommercialViabilityValidator
 from .correctors import SmoothingCorrector, InterpolationCorrector
+from .interface import apply_patch
+from .view import TimelineView
+from ..timeline import Timeline
+
+DEFAULT_SMOOTHING_ALPHA = 0.3
+# Fixes applied per run; each corrector is tried at most once
+DEFAULT_MAX_ITERATIONS = 3
+# A result at or below this (Critical Signal Loss, too little data) is fatal: the
+# remaining validators are skipped until a fix lifts the score back above it
+FATAL_SCORE = 0.3
 
 class ValidationPipeline:
-    def __init__(self):
+    def __init__(self, smoothing_alpha=DEFAULT_SMOOTHING_ALPHA, max_iterations=DEFAULT_MAX_ITERATIONS, short_circuit=FATAL_SCORE):
         # Register available tools
         self.correctors = {
-            "Exponential Smoothing": SmoothingCorrector(alpha=0.3),
+            "Exponential Smoothing": SmoothingCorrector(alpha=smoothing_alpha),
             "Linear Interpolation": InterpolationCorrector()
         }
+        self.max_iterations = max_iterations
+        # None runs every validator regardless of earlier scores
+        self.short_circuit = short_circuit
         
-    def process(self, timeline: list, mode='monocular'):
+    def process(self, timeline, mode='monocular'):
         """
         Runs the Validation -> Active Improvement loop.
-        Returns cleaned timeline, logs, and final quality score.
+        Returns cleaned timeline (same kind as given: Timeline or list of frames), logs, final quality score
+        and stats (one entry per fix in stats['steps']).
+
+        Validators run cheapest first, and once a result is fatal (score at or below
+        short_circuit) the rest are skipped. Then, up to max_iterations times, the first untried fix
+        suggested by a current result is applied and only the validators whose reads overlap
+        the corrector's writes are re-run. A fix that lowers their worst score is reverted; one that lifts
+        the score out of the fatal range also runs the validators skipped so far.
         """
-        current_data = timeline
+        # Columnar once up front; validators share one pre-extracted view per version of it
+        current_data = Timeline.coerce(timeline)
+        view = TimelineView(current_data)
         log = []
-        final_score = 1.0
+        started = time.perf_counter()
         
         log.append(f"--- Starting Validation Pipeline ({mode.upper()}) ---")
 
@@ -26,33 +50,111 @@ class ValidationPipeline:
         
         if mode == 'sensor_rich':
             validators.append(SensorSyncValidator())
+        validators.sort(key=lambda v: v.cost)
 
-        # Pass 1: Validation & Auto-Correction Loop
+        # Pass 1: Validation, cheapest first, stopping at the first fatal result
+        results, skipped = {}, []
         for validator in validators:
-            res = validator.validate(current_data)
-            final_score = min(final_score, res.score)
-            
-            if not res.passed or len(res.issues) > 0:
-                status_icon = "❌" if not res.passed else "⚠️"
-                log.append(f"{status_icon} {validator.name}: {', '.join(res.issues)}")
-                
-                # ACTIVE IMPROVEMENT
-                if res.suggested_fix and res.suggested_fix in self.correctors:
-                    corrector = self.correctors[res.suggested_fix]
-                    log.append(f"   🔧 Auto-Fix Triggered: Applying {corrector.name}...")
-                    
-                    # Apply Fix
-                    current_data = corrector.apply(current_data)
-                    
-                    # Re-Validate (Optional logic, for now we assume fix helps)
-                    # We could re-run validate() here to confirm improvement
-                elif res.suggested_fix:
-                    log.append(f"   ❌ Suggested fix '{res.suggested_fix}' not found in registry.")
+            if self._fatal(results):
+                skipped.append(validator)
+                continue
+            self._validate(validator, view, results, log)
+        runs = len(results)
+        if skipped:
+            log.append(f"⏭️ Skipped {', '.join(v.name for v in skipped)}: score already {self._score(results):.2f}")
+
+        # Active Improvement: fix -> re-validate what it touched, until nothing is left to try
+        tried, steps = set(), []
+        while len(steps) < self.max_iterations:
+            fix, source = self._next_fix(validators, results, tried)
+            if fix is None: break
+            tried.add(fix)
+            corrector = self.correctors[fix]
+            log.append(f"   🔧 Auto-Fix Triggered: Applying {corrector.name} (for {source})...")
+
+            t0 = time.perf_counter()
+            patch = corrector.patch(current_data)
+            undeclared = set(patch) - set(corrector.writes)
+            if undeclared:
+                raise ValueError(f"{corrector.name} patched {sorted(undeclared)}, which it does not declare in writes")
+            step = {"fix": fix, "for": source, "columns": list(patch), "frames": 0, "accepted": False, "scores": {}}
+            if patch:
+                # Apply Fix: a patch over the columns it touches, overlaid on the shared timeline
+                candidate = apply_patch(current_data, patch)
+                candidate_view = TimelineView(candidate)
+                step["frames"] = int(np.logical_or.reduce([col.rows for col in patch.values()]).sum())
+                log.append(f"      Patched {', '.join(patch)} on {step['frames']} frames")
+
+                # Re-Validate only what reads a column this corrector writes
+                rerun = {}
+                for validator in validators:
+                    if validator.name not in results or not validator.depends_on(corrector.writes): continue
+                    v0 = time.perf_counter()
+                    rerun[validator.name] = validator.validate(candidate_view)
+                    ms = (time.perf_counter() - v0) * 1000
+                    before, after = results[validator.name].score, rerun[validator.name].score
+                    step["scores"][validator.name] = {"before": before, "after": after, "ms": round(ms, 2)}
+                    log.append(f"      ↻ {validator.name}: {before:.2f} → {after:.2f} ({ms:.1f} ms)")
+                runs += len(rerun)
+
+                worst_before = min((results[name].score for name in rerun), default=1.0)
+                worst_after = min((res.score for res in rerun.values()), default=1.0)
+                if worst_after >= worst_before:
+                    current_data, view = candidate, candidate_view
+                    results.update(rerun)
+                    step["accepted"] = True
+                    if skipped and not self._fatal(results):
+                        log.append(f"      ▶️ Score recovered to {self._score(results):.2f}: running skipped validators")
+                        for validator in skipped: self._validate(validator, view, results, log)
+                        runs += len(skipped)
+                        skipped = []
+                else:
+                    log.append(f"      ↩️ Reverted {corrector.name}: score dropped ({worst_before:.2f} → {worst_after:.2f})")
             else:
-                log.append(f"✅ {validator.name}: Passed (Score: {res.score:.2f})")
+                log.append("      Nothing to change")
+            step["ms"] = round((time.perf_counter() - t0) * 1000, 2)
+            steps.append(step)
+
+        final_score = self._score(results)
+        if steps:
+            log.append(f"🔁 {len(steps)} fix step(s), {runs} validator runs, final score {final_score:.2f}")
 
         return {
-            "timeline": current_data,
+            "timeline": current_data if isinstance(timeline, Timeline) else current_data.to_frames(),
             "validation_log": log,
-            "quality_score": final_score
-        }
\ No newline at end of file
+            "quality_score": final_score,
+            "stats": {
+                "iterations": len(steps),
+                "validator_runs": runs,
+                "converged": self._next_fix(validators, results, tried)[0] is None,
+                "skipped": [v.name for v in skipped],
+                "seconds": round(time.perf_counter() - started, 4),
+                "steps": steps,
+            },
+        }
+
+    def _validate(self, validator, view, results, log):
+        res = results[validator.name] = validator.validate(view)
+        
+        if not res.passed or len(res.issues) > 0:
+            status_icon = "❌" if not res.passed else "⚠️"
+            log.append(f"{status_icon} {validator.name}: {', '.join(res.issues)}")
+            if res.suggested_fix and res.suggested_fix not in self.correctors:
+                log.append(f"   ❌ Suggested fix '{res.suggested_fix}' not found in registry.")
+        else:
+            log.append(f"✅ {validator.name}: Passed (Score: {res.score:.2f})")
+
+    def _score(self, results):
+        return min((res.score for res in results.values()), default=1.0)
+
+    def _fatal(self, results):
+        return self.short_circuit is not None and bool(results) and self._score(results) <= self.short_circuit
+
+    def _next_fix(self, validators, results, tried):
+        """(fix, validator name) of the first untried registered fix a current result suggests, or (None, None)."""
+        for validator in validators:
+            res = results.get(validator.name)
+            if res is None: continue
+            if (not res.passed or res.issues) and res.suggested_fix in self.correctors and res.suggested_fix not in tried:
+                return res.suggested_fix, validator.name
+        return None, None
@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+
+from ..timeline import Timeline
+
 @dataclass
 class ValidationResult:
     passed: bool
@@ -10,28 +14,103 @@ class ValidationResult:
     suggested_fix: Optional[str] = None
 
 class BaseValidator(ABC):
+    # Timeline columns the result depends on. After a fix, ValidationPipeline only
+    # re-runs validators that read a column the corrector writes; None means "any column".
+    reads: Optional[Tuple[str, ...]] = None
+    # Relative run time; ValidationPipeline runs the cheapest validators first
+    cost: float = 1.0
+
     @property
     @abstractmethod
     def name(self) -> str: 
         pass
 
     @abstractmethod
-    def validate(self, timeline: List[Dict]) -> ValidationResult: 
+    def validate(self, timeline) -> ValidationResult: 
         """
         Analyze the timeline and return a result.
-        timeline: List of frame dictionaries containing 'state', 'timestamp', etc.
+        timeline: a Timeline (see app/timeline.py) or a list of frame dictionaries
+        containing 'state', 'timestamp', etc.
+        """
+        pass
+
+    def depends_on(self, columns) -> bool:
+        """Whether a change to any of these columns can change this validator's result."""
+        return self.reads is None or not set(self.reads).isdisjoint(columns)
+
+class BaseOnlineValidator(ABC):
+    """Incremental counterpart of a BaseValidator, fed frame by frame while the timeline is produced."""
+
+    @property
+    @abstractmethod
+    def name(self) -> str: 
+        pass
+
+    @abstractmethod
+    def update(self, frame) -> None:
+        """Adds one frame (a frame dict with 'state', as in the timeline)."""
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Running statistics over the frames seen so far."""
+        pass
+
+    @abstractmethod
+    def finalize(self) -> ValidationResult:
+        """
+        Result over the frames seen so far, as the batch validator would give for
+        them. Does not reset; more frames may follow.
         """
         pass
 
+@dataclass
+class ColumnPatch:
+    """Replacement for one timeline column: values/mask cover every frame, rows marks the ones that changed."""
+    values: np.ndarray
+    mask: np.ndarray
+    rows: np.ndarray
+
+# column name -> ColumnPatch; untouched columns are simply absent
+Patch = Dict[str, ColumnPatch]
+
+
+def apply_patch(timeline: Timeline, patch: Patch) -> Timeline:
+    """
+    A new Timeline with the patched columns swapped in. Every other column,
+    and every frame dict, is shared with the input, which is left unchanged.
+    """
+    if not patch: return timeline
+    patched = timeline.copy()
+    for name, col in patch.items():
+        patched.set_column(name, col.values, col.mask, rows=col.rows)
+    return patched
+
+
 class BaseCorrector(ABC):
+    # Columns this corrector's patches may contain (ValidationPipeline rejects any other)
+    writes: Tuple[str, ...] = ()
+
     @property
     @abstractmethod
     def name(self) -> str: 
         pass
 
     @abstractmethod
-    def apply(self, timeline: List[Dict]) -> List[Dict]: 
+    def patch(self, timeline: Timeline) -> Patch:
+        """
+        The fix as a patch over the columns it changes (empty if there is
+        nothing to fix). Must not modify the timeline.
+        """
+        pass
+
+    def apply(self, timeline): 
         """
-        Apply a fix to the timeline and return the modified list.
+        Applies the fix and returns the corrected timeline, of the same kind as
+        given (Timeline or list of frame dicts). The input is not modified.
         """
-        pass
\ No newline at end of file
+        source = Timeline.coerce(timeline)
+        patch = self.patch(source)
+        if not patch: return timeline
+        cleaned = apply_patch(source, patch)
+        return cleaned if isinstance(timeline, Timeline) else cleaned.to_frames()
@@ -0,0 +1,128 @@
+"""Online (streaming) validators.
+
+The batch validators need the whole timeline; these keep running statistics
+instead, so a pipeline can score frames as it produces them: gap ratio,
+Welford mean/variance of the per-step hand displacement (jitter), cumulative
+path length and the largest single jump. finalize() scores the frames seen so
+far with the same rules as the batch validators (see their judge()), so the
+final result matches running the batch validator on the same frames.
+
+OnlineQA bundles them for the grounding loop, which feeds it the raw
+(un-interpolated) hand positions and reports snapshot() with its progress.
+"""
+
+import math
+
+from .interface import BaseOnlineValidator
+from .validators import HandStabilityValidator, CommercialViabilityValidator
+
+
+class RunningStats:
+    """Welford's online mean / population variance."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def variance(self):
+        return self.m2 / self.n if self.n else 0.0
+
+
+def _joints(frame):
+    return (frame.get("state") or {}).get("human_joints")
+
+
+def _step(prev, point):
+    return math.sqrt(sum((a - b) ** 2 for a, b in zip(point, prev)))
+
+
+class OnlineHandStability(BaseOnlineValidator):
+    name = HandStabilityValidator.name
+
+    def __init__(self):
+        self.frames = 0
+        self.gaps = 0
+        self.valid = 0
+        self.steps = RunningStats()
+        self._prev = None
+
+    def update(self, frame):
+        self.frames += 1
+        point = _joints(frame)
+        if not point:
+            self.gaps += 1
+            return
+        self.valid += 1
+        # Steps span gaps, as in the batch validator (consecutive frames that have a hand)
+        if self._prev is not None: self.steps.add(_step(self._prev, point))
+        self._prev = point
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "gap_ratio": round(self.gaps / self.frames, 4) if self.frames else 0.0,
+            "jitter_var": round(self.steps.variance, 6),
+        }
+
+    def finalize(self):
+        return HandStabilityValidator.judge(self.frames, self.gaps, self.steps.variance if self.valid > 2 else None)
+
+
+class OnlineCommercialViability(BaseOnlineValidator):
+    name = CommercialViabilityValidator.name
+
+    def __init__(self):
+        self.valid = 0
+        self.path_length = 0.0
+        self.max_jump = 0.0
+        self._prev = None
+
+    def update(self, frame):
+        point = _joints(frame)
+        if not point: return
+        self.valid += 1
+        if self._prev is not None:
+            step = _step(self._prev, point)
+            self.path_length += step
+            self.max_jump = max(self.max_jump, step)
+        self._prev = point
+
+    def stats(self):
+        return {"path_length": round(self.path_length, 4), "max_jump": round(self.max_jump, 4)}
+
+    def finalize(self):
+        return CommercialViabilityValidator.judge(self.valid, self.path_length, self.max_jump)
+
+
+class OnlineQA:
+    """The online validators of a grounding run, fed together."""
+
+    def __init__(self, validators=None):
+        self.validators = validators or [OnlineHandStability(), OnlineCommercialViability()]
+        self.hand_frames = 0
+
+    def update(self, frame):
+        if _joints(frame): self.hand_frames += 1
+        for validator in self.validators: validator.update(frame)
+
+    def finalize(self):
+        return {validator.name: validator.finalize() for validator in self.validators}
+
+    def score(self):
+        return min((res.score for res in self.finalize().values()), default=1.0)
+
+    def snapshot(self):
+        """Live quality for progress updates: score, issues and the running statistics."""
+        results = self.finalize()
+        info = {"score": round(min((res.score for res in results.values()), default=1.0), 4)}
+        for validator in self.validators: info.update(validator.stats())
+        info["issues"] = [issue for res in results.values() for issue in res.issues]
+        return info
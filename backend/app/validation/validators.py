@@ -1,22 +1,28 @@
 import numpy as np
 from .interface import BaseValidator, ValidationResult
+from .view import TimelineView
 
 class HandStabilityValidator(BaseValidator):
     name = "Hand Stability & Presence"
+    reads = ('human_joints',)
 
-    def validate(self, timeline: list) -> ValidationResult:
+    def validate(self, timeline) -> ValidationResult:
+        view = TimelineView.coerce(timeline)
+        step_var = float(np.var(view.joint_steps)) if len(view.valid_joints) > 2 else None
+        return self.judge(len(view), view.gap_count, step_var)
+
+    @staticmethod
+    def judge(total_frames, gaps, step_var=None) -> ValidationResult:
+        """
+        Scores the presence/jitter statistics (shared with OnlineHandStability).
+        step_var: variance of the distance between consecutive hand positions, None below 3 of them.
+        """
         issues = []
-        gaps = 0
-        total_frames = len(timeline)
         
         if total_frames == 0:
             return ValidationResult(False, 0.0, ["Empty Timeline"])
 
         # 1. Check for Gaps (Presence)
-        for frame in timeline:
-            if not frame.get('state', {}).get('human_joints'):
-                gaps += 1
-        
         gap_ratio = gaps / total_frames
         suggested_fix = None
         
@@ -29,16 +35,12 @@ class HandStabilityValidator(BaseValidator):
              return ValidationResult(False, 0.3, issues, suggested_fix)
 
         # 2. Check for Jitter
-        valid_joints = [np.array(f['state']['human_joints']) for f in timeline if f.get('state', {}).get('human_joints')]
         jitter_detected = False
-        if len(valid_joints) > 2:
-            velocities = [np.linalg.norm(valid_joints[i] - valid_joints[i-1]) for i in range(1, len(valid_joints))]
-            if len(velocities) > 0:
-                velocity_var = np.var(velocities)
-                if velocity_var > 0.05:
-                    issues.append("High Frequency Jitter / Instability")
-                    jitter_detected = True
-                    suggested_fix = "Exponential Smoothing"
+        if step_var is not None:
+            if step_var > 0.05:
+                issues.append("High Frequency Jitter / Instability")
+                jitter_detected = True
+                suggested_fix = "Exponential Smoothing"
 
         score = 1.0 - (gap_ratio * 0.8)
         if jitter_detected: score -= 0.1
@@ -47,31 +49,33 @@ class HandStabilityValidator(BaseValidator):
         passed = score > 0.5
         return ValidationResult(passed, score, issues, suggested_fix)
 
+# Fewer frames with a hand than this always score 0.0 ("Data too short")
+MIN_COMMERCIAL_FRAMES = 10
+
 class CommercialViabilityValidator(BaseValidator):
     name = "Commercial Viability (Physics Check)"
+    reads = ('human_joints',)
     
-    def validate(self, timeline: list) -> ValidationResult:
+    def validate(self, timeline) -> ValidationResult:
+        view = TimelineView.coerce(timeline)
+        deltas = view.joint_steps
+        return self.judge(len(view.valid_joints), float(deltas.sum()), float(deltas.max()) if len(deltas) else 0)
+
+    @staticmethod
+    def judge(valid_frames, total_dist, max_jump) -> ValidationResult:
+        """Scores path length / largest single step over the frames with a hand (shared with OnlineCommercialViability)."""
         issues = []
         score = 1.0
         
-        positions = []
-        for frame in timeline:
-            if frame.get('state', {}).get('human_joints'):
-                positions.append(np.array(frame['state']['human_joints']))
-        
-        if len(positions) < 10:
+        if valid_frames < MIN_COMMERCIAL_FRAMES:
             return ValidationResult(False, 0.0, ["Data too short for commercial use"], None)
             
         # 1. Check for "Zombie Hand" (No movement)
-        deltas = [np.linalg.norm(positions[i] - positions[i-1]) for i in range(1, len(positions))]
-        total_dist = sum(deltas)
-        
         if total_dist < 0.05: # Less than 5cm movement in whole video
             issues.append("Static Trajectory (No Movement Detected)")
             score -= 0.5
             
         # 2. Check for "Teleportation" (Tracking Glitches)
-        max_jump = max(deltas) if deltas else 0
         if max_jump > 0.5: # 50cm jump in one frame (impossible)
             issues.append(f"Teleportation Detected ({max_jump:.2f}m jump)")
             score -= 0.3
@@ -81,36 +85,24 @@ class CommercialViabilityValidator(BaseValidator):
 
 class SensorSyncValidator(BaseValidator):
     name = "Sensor Synchronization (Rich)"
+    reads = ('hand_velocity', 'accel')
+    cost = 2.0  # two normalizations and a correlation over every frame
     
-    def validate(self, timeline: list) -> ValidationResult:
+    def validate(self, timeline) -> ValidationResult:
+        view = TimelineView.coerce(timeline)
         issues = []
         score = 1.0
         
-        # Extract Magnitudes
-        vis_vel = []
-        imu_acc = []
-        
-        has_sensors = False
-        
-        for frame in timeline:
-            v = frame.get('kinematics', {}).get('hand_velocity', [0,0,0])
-            a = frame.get('sensors', {}).get('accel', [0,0,0])
-            
-            if a[0] != 0 or a[1] != 0 or a[2] != 0:
-                has_sensors = True
-
-            vis_vel.append(np.linalg.norm(v))
-            imu_acc.append(np.linalg.norm(a))
-            
-        if not has_sensors:
+        # Magnitudes (frames without the field read as zeros)
+        if not view.has_sensors:
             return ValidationResult(True, 1.0, ["Skipped: No Real Sensor Data"], None)
 
-        if len(vis_vel) < 10: 
+        if len(view) < 10: 
             return ValidationResult(False, 0.0, ["Insufficient Data"], None)
 
         # Normalize
-        vis_vel = np.array(vis_vel)
-        imu_acc = np.array(imu_acc)
+        vis_vel = view.hand_speed
+        imu_acc = view.accel_norm
         
         if vis_vel.std() == 0 or imu_acc.std() == 0:
              return ValidationResult(True, 0.5, ["Flatline Data Detected"], None)
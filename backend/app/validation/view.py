@@ -0,0 +1,78 @@
+"""Shared, pre-extracted arrays for the validators.
+
+ValidationPipeline.process builds one TimelineView per version of the
+timeline (again only after a corrector changed it) and hands it to every
+validator. Derived arrays (valid joints, per-step displacement, speed and
+acceleration magnitudes) are computed once, on first use, so each validator
+is a handful of NumPy reductions instead of its own walk over the frames.
+"""
+
+from functools import cached_property
+
+import numpy as np
+
+from ..timeline import Timeline
+
+
+class TimelineView:
+    def __init__(self, timeline):
+        self.timeline = Timeline.coerce(timeline)
+        self.n = len(self.timeline)
+
+    @classmethod
+    def coerce(cls, timeline):
+        """Accepts a TimelineView, a Timeline or a list of frame dicts."""
+        return timeline if isinstance(timeline, TimelineView) else cls(timeline)
+
+    def __len__(self):
+        return self.n
+
+    def _matrix(self, name):
+        """(N, k) float matrix of a column; zeros where a frame lacks it (or the column is not columnar)."""
+        if not self.timeline.has(name): return np.zeros((self.n, 0))
+        if self.n == 0: return np.zeros((0, 3))
+        return np.asarray(self.timeline.column(name), dtype=float).reshape(self.n, -1)
+
+    # --- hand joints ---
+
+    @cached_property
+    def joint_mask(self):
+        return self.timeline.mask('human_joints') if self.timeline.has('human_joints') else np.zeros(self.n, dtype=bool)
+
+    @cached_property
+    def valid_joints(self):
+        """(K, 3) joints of the frames that carry them, in order."""
+        return self._matrix('human_joints')[self.joint_mask]
+
+    @cached_property
+    def joint_steps(self):
+        """(K-1,) distance between consecutive valid joint positions."""
+        joints = self.valid_joints
+        if len(joints) < 2: return np.zeros(0)
+        return np.linalg.norm(np.diff(joints, axis=0), axis=1)
+
+    @cached_property
+    def gap_count(self):
+        return int(self.n - self.joint_mask.sum())
+
+    # --- kinematics & sensors ---
+
+    @cached_property
+    def hand_velocity(self):
+        return self._matrix('hand_velocity')
+
+    @cached_property
+    def hand_speed(self):
+        return np.linalg.norm(self.hand_velocity, axis=1) if self.hand_velocity.size else np.zeros(self.n)
+
+    @cached_property
+    def accel(self):
+        return self._matrix('accel')
+
+    @cached_property
+    def accel_norm(self):
+        return np.linalg.norm(self.accel, axis=1) if self.accel.size else np.zeros(self.n)
+
+    @cached_property
+    def has_sensors(self):
+        return bool((self.accel[:, :3] != 0).any()) if self.accel.size else False
@@ -3,12 +3,11 @@ import cv2
 import numpy as np
 import yt_dlp
 import trimesh
-import torch
 import uuid
 from PIL import Image
-from transformers import pipeline
-from ultralytics import YOLO, SAM
-from simple_lama_inpainting import SimpleLama
+
+from .model_registry import registry
+from .frame_source import open_frame_source
 
 class VisionPipeline:
     def __init__(self):
@@ -23,32 +22,11 @@ class VisionPipeline:
         
         self.current_frame = None
         self.clean_frame = None
-        
-        # Lazy Load Models
-        self.lama = None
-        self.depth_model = None
-        self.human_model = None
-        self.sam_model = None
-
-    def _get_lama(self):
-        if not self.lama: self.lama = SimpleLama()
-        return self.lama
-
-    def _get_depth(self):
-        if not self.depth_model:
-            device = 0 if torch.cuda.is_available() else -1
-            self.depth_model = pipeline(task="depth-estimation", model="depth-anything/Depth-Anything-V2-Small-hf", device=device)
-        return self.depth_model
-
-    def _get_human_seg(self):
-        if not self.human_model: self.human_model = YOLO("yolov8n-seg.pt")
-        return self.human_model
 
-    def _get_sam(self):
-        if not self.sam_model:
-            try: self.sam_model = SAM('mobile_sam.pt')
-            except: self.sam_model = SAM('sam_b.pt')
-        return self.sam_model
+    def _run(self, name, *args, **kwargs):
+        """Calls a registry model, holding a reference only for the call so idle weights stay evictable."""
+        with registry.lease(name) as model:
+            return model(*args, **kwargs)
 
     def download_youtube(self, url):
         # 1. Clean up previous video
@@ -89,12 +67,10 @@ class VisionPipeline:
 
     def capture_frame(self, time_sec):
         if not os.path.exists(self.video_path): return False
-        cap = cv2.VideoCapture(self.video_path)
-        cap.set(cv2.CAP_PROP_POS_FRAMES, int(time_sec * cap.get(cv2.CAP_PROP_FPS)))
-        ret, frame = cap.read()
-        cap.release()
+        with open_frame_source(self.video_path) as source:
+            frame = source.read_at(int(time_sec * source.fps))
         
-        if ret:
+        if frame is not None:
             self.current_frame = frame
             self._process_scene()
             return True
@@ -105,7 +81,7 @@ class VisionPipeline:
         print("Processing Scene...")
         
         # --- A. DETECT HUMANS ---
-        results = self._get_human_seg()(self.current_frame, classes=[0], verbose=False)
+        results = self._run("yolov8n-seg", self.current_frame, classes=[0], verbose=False)
         h, w = self.current_frame.shape[:2]
         mask = np.zeros((h, w), dtype=np.uint8)
         
@@ -122,7 +98,7 @@ class VisionPipeline:
             print("Erasing Humans...")
             img_pil = Image.fromarray(cv2.cvtColor(self.current_frame, cv2.COLOR_BGR2RGB))
             mask_pil = Image.fromarray(mask).convert('L')
-            res_pil = self._get_lama()(img_pil, mask_pil)
+            res_pil = self._run("lama", img_pil, mask_pil)
             self.clean_frame = cv2.cvtColor(np.array(res_pil), cv2.COLOR_RGB2BGR)
         else:
             self.clean_frame = self.current_frame.copy()
@@ -138,7 +114,7 @@ class VisionPipeline:
         
         print("Generating 3D Geometry...")
         pil_img = Image.fromarray(cv2.cvtColor(self.clean_frame, cv2.COLOR_BGR2RGB))
-        depth_map = self._get_depth()(pil_img)["depth"]
+        depth_map = self._run("depth-anything", pil_img)["depth"]
         depth_map.save(os.path.join(self.static_dir, "scene_depth.png"))
 
         # Downsample for speed
@@ -181,7 +157,7 @@ class VisionPipeline:
         if self.clean_frame is None: return None
         
         h, w = self.clean_frame.shape[:2]
-        results = self._get_sam()(self.clean_frame, points=[[int(u*w), int(v*h)]], labels=[1])
+        results = self._run("sam", self.clean_frame, points=[[int(u*w), int(v*h)]], labels=[1])
         if not results or not results[0].masks: return None
         
         mask = results[0].masks.xy[0]
@@ -211,7 +187,7 @@ class VisionPipeline:
                 img_pil = Image.fromarray(cv2.cvtColor(self.clean_frame, cv2.COLOR_BGR2RGB))
                 mask_pil = Image.fromarray(dilated_mask).convert('L')
                 
-                res_pil = self._get_lama()(img_pil, mask_pil)
+                res_pil = self._run("lama", img_pil, mask_pil)
                 self.clean_frame = cv2.cvtColor(np.array(res_pil), cv2.COLOR_RGB2BGR)
                 
                 cv2.imwrite(self.clean_frame_path, self.clean_frame)
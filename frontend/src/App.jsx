@@ -596,37 +596,35 @@ export const BatchProgressPanel = ({ jobId, onVideoComplete, onVideoSelect }) =>
   useEffect(() => {
     if (!jobId) return;
 
-    const fetchStatus = async () => {
-      try {
-        const res = await fetch(`http://localhost:8001/enrich/batch/${jobId}/status`).then(r => r.json());
-        setJobStatus(res);
-
-        // Notify parent when a video completes
-        if (onVideoComplete && res.videos) {
-          res.videos.forEach(vid => {
-            if (vid.status === 'complete' && !vid.notified) {
-              onVideoComplete(vid);
-              vid.notified = true;
-            }
-          });
-        }
-
-        if (res.status === 'complete' || res.status === 'failed') {
-          return true; // Stop polling
-        }
-      } catch (e) {
-        console.error("Failed to fetch batch status:", e);
+    // Server-sent deltas (see /enrich/batch/{id}/events): videos are keyed by index
+    const state = { videos: {} };
+    const notified = new Set();
+    const events = new EventSource(`http://localhost:8001/enrich/batch/${jobId}/events`);
+
+    const onEvent = (e) => {
+      const { videos = {}, ...rest } = JSON.parse(e.data);
+      Object.assign(state, rest);
+      Object.entries(videos).forEach(([i, delta]) => { state.videos[i] = { ...state.videos[i], ...delta }; });
+      const videoList = Object.keys(state.videos).sort((a, b) => a - b).map(i => state.videos[i]);
+      setJobStatus({ ...state, videos: videoList });
+
+      // Notify parent when a video completes
+      if (onVideoComplete) {
+        videoList.forEach((vid, i) => {
+          if (vid.status === 'complete' && !notified.has(i)) {
+            onVideoComplete(vid);
+            notified.add(i);
+          }
+        });
       }
-      return false;
-    };
 
-    fetchStatus();
-    const interval = setInterval(async () => {
-      const done = await fetchStatus();
-      if (done) clearInterval(interval);
-    }, 2000);
+      if (state.status === 'complete' || state.status === 'failed' || state.status === 'cancelled') events.close();
+    };
+    events.addEventListener('snapshot', onEvent);
+    events.addEventListener('progress', onEvent);
+    events.onerror = (e) => console.error("Batch progress stream error:", e);
 
-    return () => clearInterval(interval);
+    return () => events.close();
   }, [jobId, onVideoComplete]);
 
   if (!jobId || !jobStatus) return null;
@@ -324,16 +324,24 @@ export function EgoEnrichment({ onBack, onSearchRedirect, initialUrl = "", initi
     
     if(proc.status !== 'started') { setError("Backend Error"); setCurrentStep(0); setIsReprocessing(false); return; }
 
-    // POLL STATUS
-    const poll = setInterval(async () => {
-        const stat = await fetch(`${API_BASE}/enrich/status`).then(r=>r.json());
-        if (stat.state === 'processing') {
-            setProgress(stat.progress || 0); setProgressText(`Processing... ${stat.progress}%`);
+    // STREAM PROGRESS (server-sent deltas; see /enrich/jobs/{id}/events)
+    const jobId = proc.job_id;
+    const events = new EventSource(`${API_BASE}/enrich/jobs/${jobId}/events`);
+    const stat = {};
+    const onEvent = async (e) => {
+        const delta = JSON.parse(e.data);
+        if (delta.quality && stat.quality) delta.quality = { ...stat.quality, ...delta.quality };
+        Object.assign(stat, delta);
+        if (stat.state === 'queued' || stat.state === 'running') {
+            const eta = stat.eta_seconds ? ` • ETA ${Math.ceil(stat.eta_seconds)}s` : '';
+            // Live QA of the frames grounded so far
+            const qa = stat.quality && stat.quality.frames ? ` • QA ${(stat.quality.score * 100).toFixed(0)}%` : '';
+            setProgress(stat.progress || 0); setProgressText(`Processing... ${stat.progress || 0}%${qa}${eta}`);
             if(stat.progress > 10) setCurrentStep(3); if(stat.progress > 80) setCurrentStep(4);
         } else if (stat.state === 'completed') {
-            clearInterval(poll); setProgress(100); setResultSummary(stat.summary); setCurrentStep(5);
-            const res = await fetch(`${API_BASE}/enrich/result`).then(r=>r.json());
-            setEnrichmentData(res.result); setIsReprocessing(false);
+            events.close(); setProgress(100); setCurrentStep(5);
+            const res = await fetch(`${API_BASE}/enrich/jobs/${jobId}/result`).then(r=>r.json());
+            setResultSummary(res.result?.summary_stats); setEnrichmentData(res.result); setIsReprocessing(false);
 
             // Show success toast
             const qualityScore = res.result?.quality_score ? (res.result.quality_score * 100).toFixed(0) : 'N/A';
@@ -341,8 +349,8 @@ export function EgoEnrichment({ onBack, onSearchRedirect, initialUrl = "", initi
                 factoryMode ? 'SKU Generation Complete!' : 'Processing Complete!',
                 `Quality Score: ${qualityScore}% • ${res.result?.timeline?.length || 0} frames processed`
             );
-        } else if (stat.state === 'error') {
-            clearInterval(poll); setError(stat.error); setCurrentStep(0); setIsReprocessing(false);
+        } else if (stat.state === 'error' || stat.state === 'cancelled') {
+            events.close(); setError(stat.error || 'Processing cancelled'); setCurrentStep(0); setIsReprocessing(false);
 
             // Show error toast with retry option
             toast.error(
@@ -353,7 +361,9 @@ export function EgoEnrichment({ onBack, onSearchRedirect, initialUrl = "", initi
                 }
             );
         }
-    }, 1000);
+    };
+    events.addEventListener('snapshot', onEvent);
+    events.addEventListener('progress', onEvent);
   };
 
   // --- HANDLERS ---
@@ -383,7 +393,24 @@ export function EgoEnrichment({ onBack, onSearchRedirect, initialUrl = "", initi
 
   const handleExport = async (format) => { /* ... Keep existing export logic ... */ alert("Exporting..."); };
   const handleDownload = () => { /* ... Keep existing download logic ... */ };
-  const handleReprocess = () => { if(videoPath) { setIsValidationPanelOpen(false); startProcessing({path: videoPath.replace(API_BASE, "")}, true); }};
+  const handleReprocess = async () => {
+    if(!videoPath) return;
+    setIsValidationPanelOpen(false);
+    // Grounding sessions keep their per-frame artifact: re-run QA only, no decode or inference
+    const sessionId = enrichmentData?.metadata?.session_id;
+    if (!factoryMode && sessionId) {
+        setIsReprocessing(true);
+        const res = await fetch(`${API_BASE}/enrich/rederive`, {
+            method: 'POST', headers: {'Content-Type':'application/json'},
+            body: JSON.stringify({ session_id: sessionId, mode: enrichmentMode, config: { smoothing_alpha: smoothingAlpha, gap_fill_limit: gapFillLimit } })
+        }).then(r=>r.json()).catch(() => null);
+        if (res?.status === 'ok') {
+            setEnrichmentData(res.result); setResultSummary(res.result.summary_stats); setIsReprocessing(false);
+            return;
+        }
+    }
+    startProcessing({path: videoPath.replace(API_BASE, "")}, true);
+  };
   const handleReject = () => { onSearchRedirect ? onSearchRedirect(prompts) : onBack(); };
 
   // NEW: Download frames only (for enrichment mode)